@@ -0,0 +1,93 @@
+"""Account creation for /register, /candidates, /companies, /admin/users and /admin/admins.
+
+The UNIQUE key on people.email is the duplicate check: people are inserted directly and
+a duplicate-key error becomes the usual 400, with no SELECT beforehand and no window for
+a concurrent sign-up between the two. Callers hash the password (passwords.hash_password)
+before run_db(), so no connection is held while bcrypt runs, and commit the transaction
+themselves after adding whatever else belongs to it.
+"""
+from fastapi import HTTPException
+
+import stats
+from db import IntegrityError, is_duplicate_entry
+
+EMAIL_TAKEN = "Email already registered"
+
+
+def insert_person(cursor, person, role, password_hash=None, company_id=None):
+    """Insert a row into people from the first_name/last_name/email/phone of `person`; return its id."""
+    try:
+        cursor.execute("""
+            INSERT INTO people (company_id, first_name, last_name, email, phone, role, password)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, (
+            company_id,
+            person.get("first_name"),
+            person.get("last_name"),
+            person["email"],
+            person.get("phone"),
+            role,
+            password_hash,
+        ))
+    except IntegrityError as exc:
+        if is_duplicate_entry(exc):
+            raise HTTPException(status_code=400, detail=EMAIL_TAKEN) from exc
+        raise
+    person_id = cursor.lastrowid
+    stats.person_added(cursor)
+    return person_id
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def create_candidate(cursor, data, password_hash):
+    """Candidate account and profile; return the person id."""
+    person_id = insert_person(cursor, data, "Applicant", password_hash)
+    cursor.execute("""
+        INSERT INTO candidate_profiles (person_id, location, experience, education, years_experience, skills, about)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (
+        person_id,
+        data.get("location"),
+        data.get("experience"),
+        data.get("education"),
+        _int_or_none(data.get("years_experience")),
+        data.get("skills"),
+        data.get("about"),
+    ))
+    return person_id
+
+
+def create_company(cursor, company, recruiter, password_hash):
+    """Company and its first recruiter; return the company id and the recruiter's people row."""
+    cursor.execute("""
+        INSERT INTO companies (name, industry, size, website, email, phone, address)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, (
+        company.get("name"),
+        company.get("industry"),
+        company.get("size"),
+        company.get("website"),
+        company.get("email"),
+        company.get("phone"),
+        company.get("address"),
+    ))
+    company_id = cursor.lastrowid
+    # Rolled back with the company when the recruiter's email is taken.
+    recruiter_id = insert_person(cursor, recruiter, "Recruiter", password_hash, company_id)
+    stats.company_added(cursor)
+    record = {
+        "person_id": recruiter_id,
+        "company_id": company_id,
+        "first_name": recruiter.get("first_name"),
+        "last_name": recruiter.get("last_name"),
+        "email": recruiter["email"],
+        "phone": recruiter.get("phone"),
+        "role": "Recruiter",
+    }
+    return company_id, record
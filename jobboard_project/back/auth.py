@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+import cache
+from db import run_db
+
+load_dotenv()
+
+AUTH_SECRET = os.getenv("AUTH_SECRET")
+TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", str(8 * 3600)))
+PRINCIPAL_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+if not AUTH_SECRET:
+    AUTH_SECRET = secrets.token_urlsafe(32)
+    print("[Startup] AUTH_SECRET is not set: using a random key, sessions end when the server restarts")
+
+_KEY = AUTH_SECRET.encode()
+
+# people.role values and their row in the roles table.
+ROLE_NAMES = {"Admin": "admin", "Recruiter": "recruteur", "Applicant": "candidat"}
+
+cache.configure("principals", ttl=PRINCIPAL_CACHE_TTL)
+
+
+class Principal:
+    __slots__ = ("person_id", "role", "company_id", "permissions", "valid_after")
+
+    def __init__(self, person_id, role, company_id, permissions, valid_after):
+        self.person_id = person_id
+        self.role = role
+        self.company_id = company_id
+        self.permissions = frozenset(permissions)
+        self.valid_after = valid_after
+
+    def can(self, permission):
+        return permission in self.permissions
+
+
+def _unauthorized(detail):
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64encode(hmac.new(_KEY, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(person_id, role):
+    now = time.time()
+    claims = {"sub": person_id, "role": role, "iat": now, "exp": int(now) + TOKEN_TTL}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_token(token):
+    """Return the claims of a correctly signed, unexpired token, or raise a 401."""
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("bad signature")
+        claims = json.loads(_b64decode(payload))
+        int(claims["sub"]), float(claims["iat"]), float(claims["exp"])
+    except (ValueError, TypeError, KeyError):
+        raise _unauthorized("Invalid session token")
+    if claims["exp"] < time.time():
+        raise _unauthorized("Session expired, please log in again")
+    return claims
+
+
+def _load_principal(conn, cursor, person_id):
+    cursor.execute("""
+        SELECT person_id, role, company_id, UNIX_TIMESTAMP(tokens_valid_after) AS valid_after
+        FROM people WHERE person_id = %s
+    """, (person_id,))
+    person = cursor.fetchone()
+    if not person:
+        return None
+    cursor.execute("""
+        SELECT DISTINCT p.code
+        FROM permissions p
+        JOIN role_permissions rp ON rp.permission_id = p.permission_id
+        JOIN roles r ON r.role_id = rp.role_id
+        WHERE r.name = %s
+           OR r.role_id IN (SELECT role_id FROM people_roles WHERE person_id = %s)
+    """, (ROLE_NAMES.get(person["role"]), person_id))
+    permissions = [row["code"] for row in cursor.fetchall()]
+    valid_after = float(person["valid_after"]) if person["valid_after"] is not None else None
+    return Principal(person["person_id"], person["role"], person["company_id"], permissions, valid_after)
+
+
+async def _principal(person_id):
+    async def load():
+        return await run_db(_load_principal, person_id)
+
+    return await cache.cached_async("principals", person_id, load)
+
+
+async def authenticate(request: Request):
+    """Resolve the Bearer token of `request`; no query runs while the principal is cached."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise _unauthorized("Authentication required")
+    claims = decode_token(token.strip())
+    principal = await _principal(int(claims["sub"]))
+    if principal is None:
+        raise _unauthorized("Account no longer exists")
+    if principal.valid_after is not None and float(claims["iat"]) < principal.valid_after:
+        raise _unauthorized("Session revoked, please log in again")
+    return principal
+
+
+async def require_admin(request: Request):
+    principal = await authenticate(request)
+    if principal.role != "Admin":
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return principal
+
+
+def ensure_company_access(principal, company_id):
+    if principal.role == "Admin":
+        return
+    if not principal.can("jobs:manage") or principal.company_id != company_id:
+        raise HTTPException(status_code=403, detail="You cannot manage this company")
+
+
+def managed_company(principal):
+    """Company whose jobs `principal` may manage, or None for an admin who may manage them all."""
+    if principal.role == "Admin":
+        return None
+    if not principal.can("jobs:manage") or principal.company_id is None:
+        raise HTTPException(status_code=403, detail="You cannot manage job postings")
+    return principal.company_id
+
+
+def revoke_sessions(cursor, person_id):
+    """Invalidate every token issued to `person_id` so far; call forget() once committed."""
+    cursor.execute(
+        "UPDATE people SET tokens_valid_after = FROM_UNIXTIME(%s) WHERE person_id = %s",
+        (time.time(), person_id),
+    )
+
+
+def forget(person_id):
+    """Drop the cached principal so role, permission or revocation changes apply at once.
+
+    Other worker processes pick the change up within AUTH_CACHE_TTL.
+    """
+    cache.invalidate("principals", person_id)
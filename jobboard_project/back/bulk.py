@@ -0,0 +1,165 @@
+"""Set-based bulk operations on applications, advertisements and people.
+
+Each operation locks the requested rows with one SELECT, changes every row it is allowed
+to with one statement per table and reports per id. The caller commits, then applies the
+cache and index updates for the ids in `done`.
+"""
+from collections import Counter
+
+from fastapi import HTTPException
+
+import jobs
+import matching
+import stats
+
+MAX_BULK_IDS = 500
+
+
+class BulkResult:
+    def __init__(self, ids):
+        self.ids = ids
+        self.errors = {}
+
+    def fail(self, item_id, error):
+        self.errors.setdefault(item_id, error)
+
+    @property
+    def done(self):
+        return [item_id for item_id in self.ids if item_id not in self.errors]
+
+    def as_dict(self):
+        results = []
+        for item_id in self.ids:
+            if item_id in self.errors:
+                results.append({"id": item_id, "ok": False, "error": self.errors[item_id]})
+            else:
+                results.append({"id": item_id, "ok": True})
+        return {"results": results, "succeeded": len(self.ids) - len(self.errors), "failed": len(self.errors)}
+
+
+def parse_ids(data, field="ids"):
+    values = data.get(field) if isinstance(data, dict) else None
+    if not isinstance(values, list) or not values:
+        raise HTTPException(status_code=400, detail=f"{field} must be a non-empty list of ids")
+    if len(values) > MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request")
+    ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise HTTPException(status_code=400, detail=f"Invalid id: {value!r}")
+        try:
+            item_id = int(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid id: {value!r}")
+        if item_id not in ids:
+            ids.append(item_id)
+    return ids
+
+
+def _in(ids):
+    return ", ".join(["%s"] * len(ids))
+
+
+def _lock_applications(cursor, result, company_id):
+    cursor.execute(f"""
+        SELECT a.application_id, a.status, ad.company_id
+        FROM applications a
+        JOIN advertisements ad ON ad.ad_id = a.ad_id
+        WHERE a.application_id IN ({_in(result.ids)})
+        FOR UPDATE OF a
+    """, result.ids)
+    rows = {row["application_id"]: row for row in cursor.fetchall()}
+    for application_id in result.ids:
+        row = rows.get(application_id)
+        if row is None:
+            result.fail(application_id, "Application not found")
+        elif company_id is not None and row["company_id"] != company_id:
+            result.fail(application_id, "Not allowed")
+    return rows
+
+
+def update_application_statuses(cursor, ids, status, company_id=None):
+    """Set `status` on the given applications, limited to ads of `company_id` when set."""
+    result = BulkResult(ids)
+    rows = _lock_applications(cursor, result, company_id)
+    done = result.done
+    if done:
+        cursor.execute(
+            f"UPDATE applications SET status = %s WHERE application_id IN ({_in(done)})",
+            [status] + done,
+        )
+        for old_status, count in Counter(rows[application_id]["status"] for application_id in done).items():
+            stats.application_status_changed(cursor, old_status, status, count)
+        jobs.enqueue_many(cursor, "application.status_changed", [
+            {"application_id": application_id, "status": status}
+            for application_id in done if rows[application_id]["status"] != status
+        ])
+    return result
+
+
+def delete_applications(cursor, ids, company_id=None):
+    result = BulkResult(ids)
+    rows = _lock_applications(cursor, result, company_id)
+    done = result.done
+    if done:
+        cursor.execute(f"DELETE FROM applications WHERE application_id IN ({_in(done)})", done)
+        for status, count in Counter(rows[application_id]["status"] for application_id in done).items():
+            stats.application_removed(cursor, status, count)
+    return result
+
+
+def delete_advertisements(cursor, ids, company_id=None):
+    """Delete ads that have no applications, limited to `company_id` when set."""
+    result = BulkResult(ids)
+    cursor.execute(
+        f"SELECT ad_id, company_id FROM advertisements WHERE ad_id IN ({_in(ids)}) FOR UPDATE",
+        ids,
+    )
+    owners = {row["ad_id"]: row["company_id"] for row in cursor.fetchall()}
+    for ad_id in ids:
+        if ad_id not in owners:
+            result.fail(ad_id, "Advertisement not found")
+        elif company_id is not None and owners[ad_id] != company_id:
+            result.fail(ad_id, "Not allowed")
+    candidates = result.done
+    if candidates:
+        cursor.execute(
+            f"SELECT DISTINCT ad_id FROM applications WHERE ad_id IN ({_in(candidates)})",
+            candidates,
+        )
+        for row in cursor.fetchall():
+            result.fail(row["ad_id"], "Advertisement has applications")
+    done = result.done
+    if done:
+        matching.forget_ad(cursor, *done)
+        cursor.execute(f"DELETE FROM advertisements WHERE ad_id IN ({_in(done)})", done)
+        for owner, count in Counter(owners[ad_id] for ad_id in done).items():
+            stats.ad_removed(cursor, owner, count)
+    return result
+
+
+def delete_people(cursor, ids, current_admin_id):
+    """Delete users that are not referenced by an application, never `current_admin_id`."""
+    result = BulkResult(ids)
+    cursor.execute(f"SELECT person_id FROM people WHERE person_id IN ({_in(ids)}) FOR UPDATE", ids)
+    found = {row["person_id"] for row in cursor.fetchall()}
+    for person_id in ids:
+        if person_id not in found:
+            result.fail(person_id, "User not found")
+        elif person_id == current_admin_id:
+            result.fail(person_id, "You cannot delete your own admin account.")
+    candidates = result.done
+    if candidates:
+        cursor.execute(f"""
+            SELECT applicant_id AS person_id FROM applications WHERE applicant_id IN ({_in(candidates)})
+            UNION
+            SELECT recruiter_id FROM applications WHERE recruiter_id IN ({_in(candidates)})
+        """, candidates + candidates)
+        for row in cursor.fetchall():
+            result.fail(row["person_id"], "User has applications")
+    done = result.done
+    if done:
+        matching.forget_candidate(cursor, *done)
+        cursor.execute(f"DELETE FROM people WHERE person_id IN ({_in(done)})", done)
+        stats.person_removed(cursor, len(done))
+    return result
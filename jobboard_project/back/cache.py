@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+# Comma-separated namespaces that always go to the database, or "*" to disable caching.
+CACHE_DISABLED = {name.strip() for name in os.getenv("CACHE_DISABLED", "").split(",") if name.strip()}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load that started before it is not stored.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return _MISSING
+
+    def set(self, key, value, generation=None):
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def invalidate(self, key=_MISSING):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if key is _MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _namespace(name):
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = TTLCache()
+        return _caches[name]
+
+
+def configure(name, maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+    """Create namespace `name` with its own size and TTL instead of the global defaults."""
+    with _caches_lock:
+        _caches[name] = TTLCache(maxsize, ttl)
+
+
+def is_enabled(name):
+    return "*" not in CACHE_DISABLED and name not in CACHE_DISABLED
+
+
+def cached(name, key, load):
+    """Return the value cached under (name, key), calling load() and storing its result on a miss."""
+    cache = _namespace(name)
+    if not is_enabled(name):
+        return load()
+    value = cache.get(key)
+    if value is not _MISSING:
+        return value
+    generation = cache.generation
+    value = load()
+    cache.set(key, value, generation)
+    return value
+
+
+async def cached_async(name, key, load):
+    """cached() for a coroutine function loader."""
+    cache = _namespace(name)
+    if not is_enabled(name):
+        return await load()
+    value = cache.get(key)
+    if value is not _MISSING:
+        return value
+    generation = cache.generation
+    value = await load()
+    cache.set(key, value, generation)
+    return value
+
+
+def invalidate(name, key=_MISSING):
+    """Drop one key, or the whole namespace when no key is given."""
+    _namespace(name).invalidate(key)
+
+
+def stats():
+    with _caches_lock:
+        names = sorted(_caches)
+    return {name: dict(_namespace(name).stats(), enabled=is_enabled(name)) for name in names}
@@ -0,0 +1,122 @@
+"""Negotiated gzip/brotli compression of API responses.
+
+CompressionMiddleware compresses a response when the client accepts it, its content type
+is textual and its body is at least COMPRESS_MIN_BYTES. Brotli is preferred when the
+brotli package is installed and the client accepts it, gzip otherwise.
+
+Only responses sent in a single body message are compressed. Streamed responses (the
+CSV/NDJSON exports) and files go out untouched: the /front build already has
+precompressed variants (static_assets.py).
+"""
+import gzip
+import os
+
+from dotenv import load_dotenv
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/x-ndjson", "image/svg+xml")
+# Statuses whose body is empty or must be sent byte for byte.
+SKIPPED_STATUSES = {204, 206, 304}
+
+
+def accepted_encodings(header):
+    """Content codings accepted by an Accept-Encoding header, leaving out those with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def _header(headers, name):
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _replace_header(headers, name, value):
+    return [(key, old) for key, old in headers if key.lower() != name] + [(name, value)]
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding((_header(scope["headers"], b"accept-encoding") or b"").decode("latin-1"))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether the body is complete.
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            held, start = start, None
+            headers = list(held.get("headers", []))
+            body = message.get("body", b"")
+            content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+            if content_type.startswith(COMPRESSIBLE_TYPES) and _header(headers, b"content-encoding") is None:
+                # The body depends on Accept-Encoding whether or not this one is compressed.
+                vary = _header(headers, b"vary")
+                if vary is None:
+                    headers.append((b"vary", b"Accept-Encoding"))
+                elif b"accept-encoding" not in vary.lower():
+                    headers = _replace_header(headers, b"vary", vary + b", Accept-Encoding")
+                if (
+                    encoding
+                    and not message.get("more_body", False)
+                    and held["status"] not in SKIPPED_STATUSES
+                    and len(body) >= self.minimum_size
+                ):
+                    body = compress(body, encoding)
+                    headers = _replace_header(headers, b"content-encoding", encoding.encode())
+                    headers = _replace_header(headers, b"content-length", str(len(body)).encode())
+                    # The encoded bytes differ from the identity ones, so a strong tag would lie.
+                    etag = _header(headers, b"etag")
+                    if etag is not None and not etag.startswith(b"W/"):
+                        headers = _replace_header(headers, b"etag", b"W/" + etag)
+                    message = {**message, "body": body}
+            await send({**held, "headers": headers})
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,48 @@
+import hashlib
+from email.utils import formatdate
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def make_etag(*parts):
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison: a W/ prefix on the client's tag is ignored.
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def version_etag(request: Request, version):
+    """Strong ETag for a GET from its URL and the values of a version dict.
+
+    The version is a {total, max_id, last_modified} row version: any insert bumps max_id,
+    any update bumps last_modified and any delete lowers total, so the tag changes
+    whenever the rows behind the response do.
+    """
+    return make_etag(request.url.path, request.url.query, *sorted(version.items()))
+
+
+def conditional(request: Request, response: Response, version):
+    """Set ETag / Last-Modified on `response`, or return a 304 when the client's copy is current.
+
+    If-Modified-Since is not evaluated: deletions do not move the last modification time.
+    """
+    etag = version_etag(request, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if version["last_modified"] is not None:
+        headers["Last-Modified"] = formatdate(float(version["last_modified"]), usegmt=True)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,265 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import anyio.to_thread
+import pymysql
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+
+load_dotenv()
+
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_USER = os.getenv("DB_USER")
+DB_PASSWORD = os.getenv("DB_PWD")
+DB_NAME = os.getenv("DB_NAME")
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))
+
+# Errors after which a connection can no longer be trusted and must not go back to the pool.
+BROKEN_CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+IntegrityError = pymysql.err.IntegrityError
+ER_DUP_ENTRY = 1062
+
+
+class _TimedExecute:
+    """Reports every statement to metrics; executemany() goes through execute() too."""
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, args)
+        except Exception:
+            metrics.record_query(query, args, time.perf_counter() - started, 0)
+            raise
+        # Unbuffered cursors do not know their row count yet (reported as 2**64 - 1).
+        rows = self.rowcount if 0 <= self.rowcount < 2 ** 63 else 0
+        metrics.record_query(query, args, time.perf_counter() - started, rows)
+        return result
+
+
+class Cursor(_TimedExecute, pymysql.cursors.DictCursor):
+    pass
+
+
+class StreamingCursor(_TimedExecute, pymysql.cursors.SSDictCursor):
+    pass
+
+
+def connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=Cursor
+    )
+
+
+def is_duplicate_entry(exc):
+    """True for the error raised when an insert or update hits a UNIQUE key."""
+    return isinstance(exc, IntegrityError) and bool(exc.args) and exc.args[0] == ER_DUP_ENTRY
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Thread-safe pool of pymysql connections.
+
+    Keeps up to `size` idle connections around and allows `max_overflow` extra
+    ones under bursts; overflow connections are closed as soon as they are returned.
+    """
+
+    def __init__(self, connect_fn, size=POOL_SIZE, max_overflow=POOL_MAX_OVERFLOW,
+                 timeout=POOL_TIMEOUT, recycle=POOL_RECYCLE, ping_after=POOL_PING_AFTER):
+        self._connect = connect_fn
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_after = ping_after
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def capacity(self):
+        return self.size + self.max_overflow
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        entry = None
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.capacity:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout:.1f}s")
+                self._cond.wait(remaining)
+            waited = time.monotonic() - started
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        try:
+            if entry is not None:
+                entry = self._validate(entry)
+            if entry is None:
+                entry = _PooledConnection(self._connect())
+                with self._cond:
+                    self._created += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return entry
+
+    def _validate(self, entry):
+        now = time.monotonic()
+        if self.recycle and now - entry.created_at > self.recycle:
+            self._close(entry)
+            return None
+        if self.ping_after is not None and now - entry.last_used > self.ping_after:
+            try:
+                entry.conn.ping(reconnect=False)
+            except Exception:
+                self._close(entry)
+                return None
+        return entry
+
+    def _close(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._discarded += 1
+
+    def release(self, entry, discard=False):
+        if not discard:
+            try:
+                # Ends any transaction left open (including read snapshots) before reuse.
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or len(self._idle) >= self.size:
+                self._open -= 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                entry = None
+            self._cond.notify()
+        if entry is not None:
+            self._close(entry)
+
+    def dispose(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for entry in idle:
+            self._close(entry)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+                "wait_seconds_avg": round(self._wait_total / self._checkouts, 6) if self._checkouts else 0.0,
+            }
+
+
+pool = ConnectionPool(connect)
+
+
+@contextmanager
+def db_cursor(cursorclass=None):
+    entry = pool.acquire()
+    conn = entry.conn
+    discard = False
+    cursor = None
+    try:
+        cursor = conn.cursor(cursorclass) if cursorclass else conn.cursor()
+        yield conn, cursor
+    except BROKEN_CONNECTION_ERRORS:
+        discard = True
+        raise
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                discard = True
+        pool.release(entry, discard=discard)
+
+
+def limit_threads(reserved=0):
+    """Cap the worker threads of sync endpoints and run_db() to the connections left after `reserved`.
+
+    Both run on Starlette's default thread limiter, so a request waits for a thread there
+    instead of parking one in pool.acquire(). Connections held outside that limit (the job
+    workers, an export being streamed) can still make a thread wait up to DB_POOL_TIMEOUT.
+    Must run on the event loop, e.g. in a startup handler.
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = max(1, pool.capacity - reserved)
+
+
+def _run_with_cursor(fn, args, cursorclass):
+    with db_cursor(cursorclass) as (conn, cursor):
+        return fn(conn, cursor, *args)
+
+
+async def run_db(fn, *args, cursorclass=None):
+    """Run fn(conn, cursor, *args) on a pooled connection without blocking the event loop."""
+    ctx = contextvars.copy_context()
+    return await run_in_threadpool(ctx.run, _run_with_cursor, fn, args, cursorclass)
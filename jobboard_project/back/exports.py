@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from db import StreamingCursor, pool
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class RowStream:
+    """Rows of one query read through an unbuffered cursor on a pooled connection.
+
+    The query is sent when the stream is opened, so pool and SQL errors surface before
+    the response starts; rows are then pulled from the server EXPORT_BATCH_SIZE at a time.
+    """
+
+    def __init__(self, sql, params):
+        self.entry = pool.acquire()
+        self.finished = False
+        try:
+            self.cursor = self.entry.conn.cursor(StreamingCursor)
+            self.cursor.execute(sql, params)
+        except Exception:
+            self.close()
+            raise
+        self.columns = [column[0] for column in self.cursor.description]
+
+    def batches(self):
+        try:
+            while True:
+                rows = self.cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    self.finished = True
+                    return
+                yield rows
+        finally:
+            self.close()
+
+    def close(self):
+        if self.entry is None:
+            return
+        entry, self.entry = self.entry, None
+        # An unfinished unbuffered result would have to be read to the end before the
+        # connection could run another query, so an aborted export drops the connection.
+        if self.finished:
+            try:
+                self.cursor.close()
+            except Exception:
+                self.finished = False
+        pool.release(entry, discard=not self.finished)
+
+
+def _ndjson(stream):
+    for rows in stream.batches():
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows)
+
+
+def _csv(stream):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(stream.columns)
+    for rows in stream.batches():
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in stream.columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def export_response(sql, params, fmt, filename):
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of: {', '.join(FORMATS)}")
+    stream = await run_in_threadpool(RowStream, sql, params)
+    body = _ndjson(stream) if fmt == "ndjson" else _csv(stream)
+    return StreamingResponse(
+        body,
+        media_type=FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+            # Lets reverse proxies pass chunks through instead of buffering the whole export.
+            "X-Accel-Buffering": "no",
+        },
+        # Returns the connection even when the body is never iterated; a no-op otherwise.
+        background=BackgroundTask(stream.close),
+    )
@@ -0,0 +1,63 @@
+"""JSON responses for the listing endpoints, encoded without FastAPI's jsonable_encoder.
+
+A route that returns plain rows has them walked by jsonable_encoder and then dumped by
+the json module, which is most of the CPU time of a large page. FastJSONResponse encodes
+the rows directly: with orjson when it is installed (pip install orjson), with the json
+module otherwise. Decimal, date and datetime values come out exactly as jsonable_encoder
+writes them, so clients see the same documents.
+"""
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        # Same as FastAPI's decimal_encoder: whole numbers as int, the rest as float.
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, bytes):
+        return value.decode()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """Encode `content` to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes with dumps(); bytes are taken as an already encoded document."""
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def json_response(content, response=None, status_code=200):
+    """FastJSONResponse for `content`, keeping the headers already set on the injected `response`.
+
+    FastAPI drops the headers of the injected Response when a route returns its own,
+    so ETag and Cache-Control set by conditional() are copied over.
+    """
+    result = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in ("content-length", "content-type"):
+                result.headers[name] = value
+    return result
@@ -0,0 +1,273 @@
+"""Responsive variants of the raster images in front/, used by the static build.
+
+For every PNG/JPEG in front/, the build (static_assets.py) writes AVIF and WebP copies
+at each IMAGE_WIDTHS width narrower than the original, plus one at the original width.
+It then turns the pages' <img> tags into <picture> elements with a srcset per format.
+The original file stays as the fallback <img src>.
+
+Images are lazy-loaded unless listed in EAGER_IMAGES (above the fold), and get their
+intrinsic width/height so the layout does not shift while they load. Encoded variants
+are kept in IMAGE_CACHE_DIR, so only new or changed images are encoded again.
+
+Needs Pillow (pip install pillow). Without it, or without AVIF support in the installed
+Pillow, the build skips the missing formats and says so.
+
+    python3 back/images.py report                       # size report of the current build
+    python3 back/images.py report --budget-kb 300       # exit 1 when a page exceeds it
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+
+from dotenv import load_dotenv
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_WIDTHS = tuple(int(width) for width in os.getenv("IMAGE_WIDTHS", "320,640,960,1280,1920").split(","))
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.normpath(os.path.join(BASE_DIR, "../.image_cache")))
+SOURCE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+# Most capable format first: browsers use the first <source> they support.
+FORMATS = (
+    ("avif", "image/avif", {"quality": 50, "speed": 6}),
+    ("webp", "image/webp", {"quality": 75, "method": 6}),
+)
+# Display width of each image, for the `sizes` attribute; the tag's own `sizes` wins.
+IMAGE_SIZES = {
+    "assets/erasebg-transformed.png": "200px",
+}
+DEFAULT_SIZES = "100vw"
+# Above-the-fold images: loaded eagerly, and the ones marked True with fetchpriority="high".
+EAGER_IMAGES = {
+    "assets/gratte_ciel.png": True,
+    "assets/erasebg-transformed.png": False,
+}
+REPORT_NAME = "image-report.json"
+# Viewport used to estimate what a browser downloads, in CSS pixels at 1x.
+REPORT_VIEWPORTS = (375, 1280)
+
+_IMG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_ATTR_RE = re.compile(r"""([\w:-]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+
+
+def available_formats():
+    if Image is None:
+        return []
+    return [entry for entry in FORMATS if features.check(entry[0])]
+
+
+def _encode(image, fmt, options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def _cached(key, produce):
+    path = os.path.join(IMAGE_CACHE_DIR, key)
+    try:
+        with open(path, "rb") as handle:
+            return handle.read()
+    except FileNotFoundError:
+        pass
+    data = produce()
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    with open(path + ".tmp", "wb") as handle:
+        handle.write(data)
+    os.replace(path + ".tmp", path)
+    return data
+
+
+def build_variants(path, content, write, hashed_name):
+    """Encode the variants of one source image; return its manifest entry, or None if it is not an image.
+
+    `write(path, data)` stores a file in the build and `hashed_name(path, data)` names it.
+    """
+    if Image is None or os.path.splitext(path)[1].lower() not in SOURCE_EXTENSIONS:
+        return None
+    formats = available_formats()
+    source = Image.open(io.BytesIO(content))
+    source.load()
+    width, height = source.size
+    widths = sorted({w for w in IMAGE_WIDTHS if w < width} | {width})
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    stem = os.path.splitext(path)[0]
+    variants = {}
+    for fmt, mime, options in formats:
+        entries = []
+        for target in widths:
+            def produce(target=target):
+                image = source if target == width else source.resize(
+                    (target, max(1, round(height * target / width))), Image.LANCZOS
+                )
+                return _encode(image, fmt, options)
+
+            settings = ",".join(f"{key}={value}" for key, value in sorted(options.items()))
+            data = _cached(f"{digest}-{target}-{fmt}-{hashlib.sha1(settings.encode()).hexdigest()[:8]}", produce)
+            name = hashed_name(f"{stem}-{target}w.{fmt}", data)
+            write(name, data)
+            entries.append({"path": name, "width": target, "bytes": len(data)})
+        variants[fmt] = {"type": mime, "files": entries}
+    return {"width": width, "height": height, "bytes": len(content), "variants": variants}
+
+
+def _attributes(tag):
+    inner = tag[4:-1].rstrip("/ ")
+    attributes = {}
+    for name, value in _ATTR_RE.findall(inner):
+        if value[:1] in ("'", '"'):
+            value = value[1:-1]
+        elif not value:
+            value = None
+        attributes[name.lower()] = value
+    return attributes
+
+
+def _tag(name, attributes):
+    parts = [name]
+    for key, value in attributes.items():
+        parts.append(key if value is None else f'{key}="{value}"')
+    return "<" + " ".join(parts) + ">"
+
+
+def rewrite_images(text, page, images, resolve, relative):
+    """Wrap the <img> tags of `page` that point at a built image in a <picture> element.
+
+    `resolve(src, page)` gives the source path a reference points to and `relative(path, page)`
+    the reference to a build file from `page`. Returns the new text and the images it uses.
+    """
+    used = []
+
+    def replace(match):
+        attributes = _attributes(match.group(0))
+        source = resolve(attributes.get("src", ""), page)
+        entry = images.get(source)
+        if not entry:
+            return match.group(0)
+        used.append(source)
+        eager = source in EAGER_IMAGES
+        attributes.setdefault("width", str(entry["width"]))
+        attributes.setdefault("height", str(entry["height"]))
+        attributes.setdefault("loading", "eager" if eager else "lazy")
+        if not eager:
+            attributes.setdefault("decoding", "async")
+        if EAGER_IMAGES.get(source):
+            attributes.setdefault("fetchpriority", "high")
+        sizes = attributes.pop("sizes", None) or IMAGE_SIZES.get(source, DEFAULT_SIZES)
+        sources = []
+        for variant in entry["variants"].values():
+            srcset = ", ".join(f"{relative(file['path'], page)} {file['width']}w" for file in variant["files"])
+            sources.append(f'<source type="{variant["type"]}" srcset="{srcset}" sizes="{sizes}">')
+        if not sources:
+            return _tag("img", attributes)
+        return "<picture>" + "".join(sources) + _tag("img", attributes) + "</picture>"
+
+    return _IMG_RE.sub(replace, text), used
+
+
+def _display_width(sizes, viewport):
+    value = sizes.split(",")[-1].strip()
+    if value.endswith("px"):
+        return float(value[:-2])
+    if value.endswith("vw"):
+        return viewport * float(value[:-2]) / 100
+    return viewport
+
+
+def _downloaded(entry, sizes, viewport):
+    """Bytes a browser supporting the best built format downloads for this image at `viewport`."""
+    if not entry["variants"]:
+        return entry["bytes"]
+    files = next(iter(entry["variants"].values()))["files"]
+    needed = _display_width(sizes, viewport)
+    for file in files:
+        if file["width"] >= needed:
+            return file["bytes"]
+    return files[-1]["bytes"]
+
+
+def report(manifest, pages_images):
+    """Per image and per page weights of the build, before and after the responsive variants."""
+    images = manifest.get("images", {})
+    result = {"viewports": list(REPORT_VIEWPORTS), "images": {}, "pages": {}}
+    for source, entry in sorted(images.items()):
+        result["images"][source] = {
+            "original_bytes": entry["bytes"],
+            "variants": {fmt: {str(file["width"]): file["bytes"] for file in variant["files"]}
+                         for fmt, variant in entry["variants"].items()},
+        }
+    for page, sources in sorted(pages_images.items()):
+        original = sum(images[source]["bytes"] for source in sources)
+        result["pages"][page] = {
+            "images": sorted(sources),
+            "original_bytes": original,
+            **{f"bytes_at_{viewport}px": sum(
+                _downloaded(images[source], IMAGE_SIZES.get(source, DEFAULT_SIZES), viewport) for source in sources
+            ) for viewport in REPORT_VIEWPORTS},
+        }
+    return result
+
+
+def _kb(value):
+    return f"{value / 1024:,.0f} KB"
+
+
+def _delta(old, new):
+    if old is None or old == new:
+        return ""
+    return f" ({'+' if new > old else ''}{(new - old) / 1024:,.0f} KB)"
+
+
+def print_report(current, previous=None, budget_kb=None):
+    """Print the page weights, with the change since `previous`; return the pages over budget."""
+    previous_pages = (previous or {}).get("pages", {})
+    columns = [f"@{viewport}px" for viewport in current["viewports"]]
+    print(f"{'page':<24} {'original':>12} " + " ".join(f"{column:>22}" for column in columns))
+    over = []
+    for page, row in current["pages"].items():
+        old = previous_pages.get(page, {})
+        cells = []
+        for viewport in current["viewports"]:
+            key = f"bytes_at_{viewport}px"
+            cells.append(f"{_kb(row[key]) + _delta(old.get(key), row[key]):>22}")
+        print(f"{page:<24} {_kb(row['original_bytes']):>12} " + " ".join(cells))
+        if budget_kb and max(row[f"bytes_at_{viewport}px"] for viewport in current["viewports"]) > budget_kb * 1024:
+            over.append(page)
+    for image, row in current["images"].items():
+        formats = ", ".join(
+            f"{fmt} {_kb(min(sizes.values()))}-{_kb(max(sizes.values()))}" for fmt, sizes in row["variants"].items()
+        )
+        print(f"  {image}: {_kb(row['original_bytes'])} -> {formats or 'no variants'}")
+    if over:
+        print(f"Over the {budget_kb:g} KB image budget: {', '.join(over)}")
+    return over
+
+
+def main(argv=None):
+    import static_assets
+
+    parser = argparse.ArgumentParser(description="Report the image weight of the static build.")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--dist", default=static_assets.STATIC_DIST_DIR)
+    parser.add_argument("--previous", help="an earlier image-report.json to compare with")
+    parser.add_argument("--budget-kb", type=float, help="fail when a page downloads more image data than this")
+    args = parser.parse_args(argv)
+    with open(os.path.join(args.dist, REPORT_NAME), encoding="utf-8") as handle:
+        current = json.load(handle)
+    previous = None
+    if args.previous:
+        with open(args.previous, encoding="utf-8") as handle:
+            previous = json.load(handle)
+    return 1 if print_report(current, previous, args.budget_kb) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Bulk import of job advertisements from CSV or NDJSON.
+
+Rows are checked with the same rules as POST /advertisements and written with one
+multi-row INSERT per batch of IMPORT_BATCH_SIZE rows, each batch in its own transaction.
+Rejected rows are listed in the report and the rest of the file is still imported.
+
+    python3 back/imports.py advertisements ads.csv
+    python3 back/imports.py advertisements ads.ndjson --company-id 3 --report report.json
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import pymysql
+from fastapi import HTTPException
+
+import matching
+import stats
+from db import db_cursor
+from validation import parse_contract_type, parse_date, parse_salary_range
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+FORMATS = ("csv", "ndjson")
+AD_COLUMNS = ("company_id", "title", "description", "location", "salary_min", "salary_max", "contract_type", "date_expiry")
+MAX_TEXT_LENGTH = 255
+
+
+class RowError(ValueError):
+    pass
+
+
+async def spool(chunks, max_bytes=IMPORT_MAX_BYTES):
+    """Copy an uploaded body to a temporary file so it can be parsed in a worker thread."""
+    upload = tempfile.TemporaryFile()
+    size = 0
+    try:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Import files are limited to {max_bytes} bytes")
+            upload.write(chunk)
+    except BaseException:
+        upload.close()
+        raise
+    upload.seek(0)
+    return upload
+
+
+def read_rows(stream, fmt):
+    """Yield (row number, record) pairs from a binary stream, one record at a time.
+
+    Rows are numbered from 1, not counting the CSV header or blank NDJSON lines. A line
+    that is not valid JSON is yielded as a RowError. Undecodable text and malformed CSV
+    raise UnicodeDecodeError / csv.Error, which AdImporter.run() reports.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        yield from enumerate(csv.DictReader(text), start=1)
+        return
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, RowError("Invalid JSON")
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _text(values, field, required=False):
+    value = values.get(field)
+    if value is None:
+        if required:
+            raise RowError(f"Missing {field}")
+        return None
+    value = str(value)
+    if len(value) > MAX_TEXT_LENGTH and field != "description":
+        raise RowError(f"{field} is longer than {MAX_TEXT_LENGTH} characters")
+    return value
+
+
+def validate_ad(record, company_id=None):
+    """Return the AD_COLUMNS values and the skills of one record, or raise RowError."""
+    if isinstance(record, RowError):
+        raise record
+    if not isinstance(record, dict):
+        raise RowError("Row must be an object")
+    values = {key.strip(): _clean(value) for key, value in record.items() if isinstance(key, str)}
+    row_company = values.get("company_id")
+    if row_company is not None:
+        try:
+            if isinstance(row_company, bool):
+                raise ValueError
+            row_company = int(row_company)
+        except (TypeError, ValueError):
+            raise RowError("Invalid company identifier")
+    if company_id is not None:
+        if row_company not in (None, company_id):
+            raise RowError("You cannot import advertisements for this company")
+        row_company = company_id
+    elif row_company is None:
+        raise RowError("Missing company_id")
+    try:
+        salary_min, salary_max = parse_salary_range(values.get("salary_min"), values.get("salary_max"))
+        contract_type = parse_contract_type(values.get("contract_type"))
+        date_expiry = parse_date(values.get("date_expiry"), "date_expiry")
+    except HTTPException as exc:
+        raise RowError(exc.detail)
+    ad = (
+        row_company,
+        _text(values, "title", required=True),
+        _text(values, "description", required=True),
+        _text(values, "location"),
+        salary_min,
+        salary_max,
+        contract_type,
+        date_expiry,
+    )
+    return ad, values.get("skills")
+
+
+def _unreadable(exc):
+    if isinstance(exc, UnicodeDecodeError):
+        # Text is decoded in blocks, so the bad byte may be a few rows further on.
+        return "File is not valid UTF-8 from about this row on: import stopped, save the file as UTF-8"
+    return f"Invalid CSV ({exc}): import stopped"
+
+
+class AdImporter:
+    """Validate and insert advertisements batch by batch on one connection.
+
+    `index_updates` collects the index.set_ad() arguments of every committed ad, for the
+    caller to apply once the import is over.
+    """
+
+    def __init__(self, conn, cursor, company_id=None, batch_size=IMPORT_BATCH_SIZE):
+        self.conn = conn
+        self.cursor = cursor
+        self.company_id = company_id
+        self.batch_size = batch_size
+        self.companies = {}
+        self.known_skills = None
+        self.rows = 0
+        self.inserted = 0
+        self.errors = []
+        self.index_updates = []
+
+    def run(self, records):
+        batch = []
+        records = iter(records)
+        number = 0
+        while True:
+            try:
+                number, record = next(records)
+            except StopIteration:
+                break
+            except (UnicodeDecodeError, csv.Error) as exc:
+                # The reader cannot go on; keep what was read so far and say where it stopped.
+                self.errors.append({"row": number + 1, "error": _unreadable(exc)})
+                break
+            self.rows += 1
+            try:
+                ad, skills = validate_ad(record, self.company_id)
+            except RowError as exc:
+                self.errors.append({"row": number, "error": str(exc)})
+                continue
+            batch.append((number, ad, skills))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+        return self.report()
+
+    def report(self):
+        errors = sorted(self.errors, key=lambda error: error["row"])
+        return {"rows": self.rows, "inserted": self.inserted, "failed": len(errors), "errors": errors}
+
+    def _existing_companies(self, batch):
+        unknown = sorted({ad[0] for _, ad, _ in batch} - self.companies.keys())
+        if unknown:
+            placeholders = ", ".join(["%s"] * len(unknown))
+            self.cursor.execute(f"SELECT company_id FROM companies WHERE company_id IN ({placeholders})", unknown)
+            found = {row["company_id"] for row in self.cursor.fetchall()}
+            self.companies.update((company_id, company_id in found) for company_id in unknown)
+        kept = []
+        for number, ad, skills in batch:
+            if self.companies[ad[0]]:
+                kept.append((number, ad, skills))
+            else:
+                self.errors.append({"row": number, "error": "Company not found"})
+        return kept
+
+    def _flush(self, batch):
+        batch = self._existing_companies(batch)
+        if not batch:
+            return
+        cursor = self.cursor
+        row_sql = "(" + ", ".join(["%s"] * len(AD_COLUMNS)) + ")"
+        try:
+            cursor.execute(
+                f"INSERT INTO advertisements ({', '.join(AD_COLUMNS)}) VALUES {', '.join([row_sql] * len(batch))}",
+                [value for _, ad, _ in batch for value in ad],
+            )
+            # A single multi-row INSERT gets a consecutive block of ids starting at lastrowid.
+            first_id = cursor.lastrowid
+            ads = [
+                (first_id + offset, f"{ad[1]} {ad[2]}", skills, ad[7])
+                for offset, (_, ad, skills) in enumerate(batch)
+            ]
+            for company_id, count in Counter(ad[0] for _, ad, _ in batch).items():
+                stats.ad_added(cursor, company_id, count)
+            if self.known_skills is None:
+                self.known_skills = matching.vocabulary(cursor)
+            updates = matching.sync_new_ads(cursor, ads, self.known_skills)
+            self.conn.commit()
+        except pymysql.MySQLError as exc:
+            self.conn.rollback()
+            self.known_skills = None
+            message = exc.args[-1] if exc.args else str(exc)
+            self.errors.extend({"row": number, "error": f"Batch rejected: {message}"} for number, _, _ in batch)
+            return
+        self.inserted += len(batch)
+        self.index_updates.extend(updates)
+
+
+def import_file(path, fmt=None, company_id=None):
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(path, "rb") as handle, db_cursor() as (conn, cursor):
+        return AdImporter(conn, cursor, company_id).run(read_rows(handle, fmt))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import job advertisements in bulk.")
+    parser.add_argument("kind", choices=["advertisements"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to ndjson for .ndjson/.jsonl files, csv otherwise")
+    parser.add_argument("--company-id", type=int, help="import every row into this company")
+    parser.add_argument("--report", help="write the full JSON report to this file")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report = import_file(args.path, args.format, args.company_id)
+    elapsed = time.perf_counter() - started
+    rate = report["rows"] / elapsed if elapsed else 0
+    print(f"{report['inserted']} advertisement(s) imported, {report['failed']} row(s) rejected "
+          f"in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    for error in report["errors"][:20]:
+        print(f"  row {error['row']}: {error['error']}")
+    if len(report["errors"]) > 20:
+        print(f"  ... {len(report['errors']) - 20} more")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
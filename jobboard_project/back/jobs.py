@@ -0,0 +1,257 @@
+"""Background jobs stored in the outbox table.
+
+Write paths call enqueue() with the cursor of their own transaction, so a job exists
+exactly when the change that triggered it is committed, and wake() once committed.
+Worker threads started with the API claim due jobs, run the registered handler outside
+any transaction and retry failures with exponential backoff.
+
+    python3 back/jobs.py status
+    python3 back/jobs.py work             # run workers without the API
+    python3 back/jobs.py retry 42         # make a failed job due again
+    python3 back/jobs.py purge --days 30  # delete finished jobs
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from db import db_cursor
+
+WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "5"))
+MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "6"))
+BACKOFF_SECONDS = float(os.getenv("JOBS_BACKOFF_SECONDS", "10"))
+MAX_BACKOFF_SECONDS = 3600
+# A claimed job becomes due again after this long, in case its worker died.
+LEASE_SECONDS = float(os.getenv("JOBS_LEASE_SECONDS", "300"))
+
+_handlers = {}
+
+
+def handler(kind):
+    """Register fn(**payload) as the handler of `kind` jobs."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(cursor, kind, **payload):
+    # Run after reading cursor.lastrowid: this statement resets it.
+    cursor.execute("INSERT INTO outbox (kind, payload) VALUES (%s, %s)", (kind, json.dumps(payload, default=str)))
+
+
+def enqueue_many(cursor, kind, payloads):
+    if payloads:
+        cursor.executemany(
+            "INSERT INTO outbox (kind, payload) VALUES (%s, %s)",
+            [(kind, json.dumps(payload, default=str)) for payload in payloads],
+        )
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _micros(seconds):
+    return int(seconds * 1_000_000)
+
+
+def claim(cursor):
+    cursor.execute("""
+        SELECT job_id, kind, payload, attempts
+        FROM outbox
+        WHERE status IN ('pending', 'running') AND run_after <= NOW(6)
+        ORDER BY run_after
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    """)
+    job = cursor.fetchone()
+    if job:
+        job["attempts"] += 1
+        cursor.execute("""
+            UPDATE outbox
+            SET status = 'running', attempts = %s, run_after = NOW(6) + INTERVAL %s MICROSECOND
+            WHERE job_id = %s
+        """, (job["attempts"], _micros(LEASE_SECONDS), job["job_id"]))
+    return job
+
+
+def _finish(job_id, error=None, retry_in=None):
+    with db_cursor() as (conn, cursor):
+        if error is None:
+            cursor.execute(
+                "UPDATE outbox SET status = 'done', finished_at = NOW(6), last_error = NULL WHERE job_id = %s",
+                (job_id,),
+            )
+        elif retry_in is not None:
+            cursor.execute("""
+                UPDATE outbox SET status = 'pending', run_after = NOW(6) + INTERVAL %s MICROSECOND, last_error = %s
+                WHERE job_id = %s
+            """, (_micros(retry_in), error, job_id))
+        else:
+            cursor.execute(
+                "UPDATE outbox SET status = 'failed', finished_at = NOW(6), last_error = %s WHERE job_id = %s",
+                (error, job_id),
+            )
+        conn.commit()
+
+
+def run_one():
+    """Claim and run one due job; return False when there was none."""
+    with db_cursor() as (conn, cursor):
+        job = claim(cursor)
+        conn.commit()
+    if not job:
+        return False
+    fn = _handlers.get(job["kind"])
+    try:
+        if job["attempts"] > MAX_ATTEMPTS:
+            raise RuntimeError("lease expired on the last attempt")
+        if fn is None:
+            raise LookupError(f"no handler for {job['kind']!r} jobs")
+        fn(**json.loads(job["payload"]))
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+        retry = job["attempts"] < MAX_ATTEMPTS and fn is not None
+        print(f"[Jobs] {job['kind']} #{job['job_id']} attempt {job['attempts']} failed: {error}")
+        _finish(job["job_id"], error, backoff(job["attempts"]) if retry else None)
+    else:
+        _finish(job["job_id"])
+    return True
+
+
+class WorkerPool:
+    def __init__(self, size=WORKERS, poll_seconds=POLL_SECONDS):
+        self.size = size
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads or self.size <= 0:
+            return
+        self._stop.clear()
+        for number in range(self.size):
+            thread = threading.Thread(target=self._loop, name=f"jobs-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    @property
+    def running(self):
+        return len(self._threads)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            # Cleared before looking, so a wake() during run_one() is not lost.
+            self._wake.clear()
+            try:
+                busy = run_one()
+            except Exception as exc:
+                print(f"[Jobs] worker error: {exc}")
+                busy = False
+            if not busy:
+                self._wake.wait(self.poll_seconds)
+
+
+workers = WorkerPool()
+
+
+def start():
+    workers.start()
+
+
+def stop():
+    workers.stop()
+
+
+def wake():
+    """Let an idle worker pick up jobs committed by this process without waiting for the next poll."""
+    workers.wake()
+
+
+def summary(cursor):
+    cursor.execute("""
+        SELECT status, COUNT(*) AS jobs, MIN(CASE WHEN status = 'pending' THEN run_after END) AS next_due
+        FROM outbox
+        WHERE status IN ('pending', 'running', 'failed')
+        GROUP BY status
+    """)
+    rows = {row["status"]: row for row in cursor.fetchall()}
+    return {
+        "jobs": {status: int(rows[status]["jobs"]) if status in rows else 0 for status in ("pending", "running", "failed")},
+        "next_due": rows["pending"]["next_due"] if "pending" in rows else None,
+        "workers": workers.running,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and run background jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="count unfinished jobs and list the latest failures")
+    work = commands.add_parser("work", help="run job workers in the foreground")
+    work.add_argument("--workers", type=int, default=max(WORKERS, 1))
+    retry = commands.add_parser("retry", help="make a failed job due again")
+    retry.add_argument("job_id", type=int)
+    purge = commands.add_parser("purge", help="delete jobs finished more than DAYS ago")
+    purge.add_argument("--days", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        with db_cursor() as (conn, cursor):
+            result = summary(cursor)
+            cursor.execute("""
+                SELECT job_id, kind, attempts, finished_at, last_error FROM outbox
+                WHERE status = 'failed' ORDER BY job_id DESC LIMIT 10
+            """)
+            failures = cursor.fetchall()
+        print(", ".join(f"{status}: {count}" for status, count in result["jobs"].items()))
+        for job in failures:
+            print(f"  #{job['job_id']} {job['kind']} failed after {job['attempts']} attempt(s): {job['last_error']}")
+    elif args.command == "work":
+        # Handlers register on the importable `jobs` module, not on this __main__ copy.
+        import notifications
+        pool = notifications.jobs.WorkerPool(args.workers)
+        pool.start()
+        print(f"[Jobs] {args.workers} worker(s) running, Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pool.stop()
+    elif args.command == "retry":
+        with db_cursor() as (conn, cursor):
+            cursor.execute("""
+                UPDATE outbox SET status = 'pending', attempts = 0, run_after = NOW(6), finished_at = NULL
+                WHERE job_id = %s AND status = 'failed'
+            """, (args.job_id,))
+            conn.commit()
+            print("Job queued again" if cursor.rowcount else "No failed job with that id")
+    elif args.command == "purge":
+        with db_cursor() as (conn, cursor):
+            cursor.execute(
+                "DELETE FROM outbox WHERE status = 'done' AND finished_at < NOW(6) - INTERVAL %s DAY",
+                (args.days,),
+            )
+            conn.commit()
+            print(f"{cursor.rowcount} finished job(s) deleted")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
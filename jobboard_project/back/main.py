@@ -1,26 +1,40 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks, Query
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from passlib.context import CryptContext
-from decimal import Decimal, InvalidOperation
-import pymysql
+from fastapi.responses import JSONResponse, PlainTextResponse
+from datetime import date
+from db import db_cursor, run_db, limit_threads, pool, PoolTimeout, IntegrityError, is_duplicate_entry
+from passwords import hash_password, verify_password
+from migrate import check_schema_version, SchemaVersionError
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, keyset_after, page
+from search import boolean_query, short_terms, word_pattern
+from conditional import conditional
+from exports import export_response
+from fastjson import dumps, json_response
+from validation import CONTRACT_TYPES, parse_decimal, parse_salary_range
+import accounts
+import auth
+import bulk
+import cache
+import compression
+import imports
+import jobs
+import matching
+import metrics
+import notifications  # registers the job handlers
+import static_assets
+import stats
 import uvicorn
+import hmac
 import os
 
 load_dotenv()
 app = FastAPI()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PWD")
-DB_NAME = os.getenv("DB_NAME")
-
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONT_DIR = os.path.join(BASE_DIR, "../front")
 
-app.mount("/front", StaticFiles(directory=FRONT_DIR), name="front")
+app.mount("/front", static_assets.front_app(FRONT_DIR), name="front")
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,79 +42,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Server-Timing"],
 )
+app.add_middleware(compression.CompressionMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": "Database is busy, please retry shortly."})
 
-def get_connection():
-    return pymysql.connect(
-        host="localhost",
-        user=DB_USER,
-        password=DB_PASSWORD,
-        database=DB_NAME,
-        cursorclass=pymysql.cursors.DictCursor
-    )
+@app.on_event("startup")
+def verify_schema_version():
+    if os.getenv("SKIP_SCHEMA_CHECK") == "1":
+        return
+    try:
+        version = check_schema_version()
+    except SchemaVersionError as exc:
+        raise RuntimeError(f"[Startup] {exc}") from exc
+    except Exception as exc:
+        print(f"[Startup] schema version check skipped: {exc}")
+        return
+    print(f"[Startup] database schema at version {version:03d}")
 
-def ensure_application_message_column(conn, cursor):
-    cursor.execute("SHOW COLUMNS FROM applications LIKE 'message'")
-    if not cursor.fetchone():
-        cursor.execute("ALTER TABLE applications ADD COLUMN message TEXT")
-        conn.commit()
+@app.on_event("startup")
+async def limit_db_threads():
+    limit_threads(reserved=jobs.WORKERS)
 
-def ensure_admin_role_enum(conn, cursor):
-    cursor.execute("SHOW COLUMNS FROM people LIKE 'role'")
-    column = cursor.fetchone()
-    if column:
-        column_type = column.get("Type", "")
-        if "admin" not in column_type.lower():
-            cursor.execute("ALTER TABLE people MODIFY role ENUM('Recruiter','Applicant','Admin')")
-            conn.commit()
+@app.on_event("startup")
+def start_job_workers():
+    jobs.start()
 
-def initialize_schema():
-    conn = None
-    cursor = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        ensure_admin_role_enum(conn, cursor)
-        ensure_application_message_column(conn, cursor)
-    except Exception as exc:
-        print(f"[Startup] schema initialization skipped: {exc}")
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-initialize_schema()
-
-def get_admin_id_from_request(request: Request) -> int:
-    admin_id_header = request.headers.get("X-Admin-Id")
-    if not admin_id_header:
-        raise HTTPException(status_code=401, detail="Admin credentials required")
-    try:
-        return int(admin_id_header)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid admin identifier")
-
-def require_admin(cursor, admin_id: int):
-    cursor.execute("SELECT role FROM people WHERE person_id = %s", (admin_id,))
-    admin = cursor.fetchone()
-    if not admin or admin.get("role") != "Admin":
-        raise HTTPException(status_code=403, detail="Admin privileges required")
-
-def parse_decimal(value, field_name):
-    if value in (None, "", " "):
-        return None
-    try:
-        decimal_value = Decimal(str(value))
-    except (InvalidOperation, ValueError, TypeError):
-        raise HTTPException(status_code=400, detail=f"Invalid value for {field_name}")
-    if decimal_value < 0 or decimal_value > Decimal("99999999.99"):
-        raise HTTPException(
-            status_code=400,
-            detail=f"{field_name.replace('_', ' ').capitalize()} must be between 0 and 99 999 999.99"
-        )
-    return decimal_value
+@app.on_event("shutdown")
+def stop_job_workers():
+    jobs.stop()
 
 @app.get("/")
 def read_root():
@@ -108,24 +82,204 @@ def read_root():
 
 # --------------------------- ADVERTISEMENTS ---------------------------
 
+AD_COLUMNS = {
+    "ad_id": "ad_id",
+    "company_id": "company_id",
+    "title": "title",
+    "description": "description",
+    "summary": "LEFT(description, 200) AS summary",
+    "location": "location",
+    "salary_min": "salary_min",
+    "salary_max": "salary_max",
+    "contract_type": "contract_type",
+    "date_posted": "date_posted",
+    "date_expiry": "date_expiry",
+}
+AD_DEFAULT_FIELDS = [name for name in AD_COLUMNS if name != "summary"]
+AD_KEY_FIELDS = ["date_posted", "ad_id"]
+
+def invalidate_ads(ad_id=None):
+    cache.invalidate("ads_version")
+    cache.invalidate("ads_list")
+    if ad_id is None:
+        cache.invalidate("ad_detail")
+    else:
+        cache.invalidate("ad_detail", ad_id)
+
+def ads_version(company_id=None):
+    """{total, max_id, last_modified} of the ads, or of one company's, shared by every worker.
+
+    The total comes from the dashboard counters and the maxima from indexes, and the row is
+    cached for CACHE_TTL like the pages it versions.
+    """
+    def load():
+        with db_cursor() as (conn, cursor):
+            if company_id is None:
+                counter, where, params = (
+                    "SELECT SUM(value) FROM stats_counters WHERE counter = 'advertisements'", "", ())
+            else:
+                counter, where, params = (
+                    "SELECT value FROM stats_counters WHERE counter = 'company.advertisements' AND scope_id = %s",
+                    "WHERE company_id = %s",
+                    (company_id, company_id),
+                )
+            cursor.execute(f"""
+                SELECT ({counter}) AS total, MAX(ad_id) AS max_id, UNIX_TIMESTAMP(MAX(updated_at)) AS last_modified
+                FROM advertisements {where}
+            """, params)
+            return cursor.fetchone()
+
+    return cache.cached("ads_version", company_id, load)
+
+def invalidate_companies(company_id=None):
+    cache.invalidate("companies_list")
+    if company_id is None:
+        cache.invalidate("company_detail")
+    else:
+        cache.invalidate("company_detail", company_id)
+
+def is_ad_text_update(updates):
+    return "title" in updates or "description" in updates
+
+def escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def parse_ad_fields(fields):
+    if not fields:
+        names = list(AD_DEFAULT_FIELDS)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in AD_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    for key in AD_KEY_FIELDS:
+        if key not in names:
+            names.append(key)
+    return ", ".join(AD_COLUMNS[name] for name in names)
+
+def select_ads_page(cursor, columns, limit, page_cursor, where=None, params=None):
+    clauses = list(where or [])
+    values = list(params or [])
+    if page_cursor:
+        clause, key_values = keyset_after(AD_KEY_FIELDS, decode_cursor(page_cursor, 2))
+        clauses.append(clause)
+        values.extend(key_values)
+    where_sql = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor.execute(
+        f"SELECT {columns} FROM advertisements{where_sql} ORDER BY date_posted DESC, ad_id DESC LIMIT %s",
+        values + [limit + 1],
+    )
+    return page(cursor.fetchall(), limit, lambda row: (row["date_posted"], row["ad_id"]))
+
+def select_ads_ranked(cursor, columns, limit, page_cursor, terms, where, params):
+    # Relevance scores shift as ads are written, so ranked pages use an offset cursor.
+    offset = decode_cursor(page_cursor, 1)[0] if page_cursor else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    clauses = ["MATCH(title, description) AGAINST (%s IN BOOLEAN MODE)"] + list(where)
+    # Title hits weigh more than hits in the description alone.
+    cursor.execute(
+        f"""
+        SELECT {columns},
+               2 * MATCH(title) AGAINST (%s IN BOOLEAN MODE)
+                 + MATCH(title, description) AGAINST (%s IN BOOLEAN MODE) AS relevance
+        FROM advertisements
+        WHERE {' AND '.join(clauses)}
+        ORDER BY relevance DESC, ad_id DESC
+        LIMIT %s OFFSET %s
+        """,
+        [terms, terms, terms] + list(params) + [limit + 1, offset],
+    )
+    return page(cursor.fetchall(), limit, lambda row: (offset + limit,))
+
 @app.get("/advertisements")
-def get_all_ads():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM advertisements")
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return rows
+def get_all_ads(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: str = Query(None, alias="cursor"),
+    fields: str = None,
+):
+    columns = parse_ad_fields(fields)
+    # Cleared by invalidate_ads(); otherwise a 304 or a cached page costs no database round trip.
+    version = ads_version()
+    not_modified = conditional(request, response, version)
+    if not_modified:
+        return not_modified
+
+    def load():
+        with db_cursor() as (conn, cursor):
+            return dumps(select_ads_page(cursor, columns, limit, page_cursor))
+
+    # Keyed on the version too, so a cached page never goes out under a newer ETag.
+    key = (version["total"], version["max_id"], version["last_modified"], columns, limit, page_cursor)
+    return json_response(cache.cached("ads_list", key, load), response)
+
+@app.get("/advertisements/search")
+def search_ads(
+    q: str = None,
+    location: str = None,
+    contract_type: str = None,
+    salary_min: str = None,
+    salary_max: str = None,
+    company_id: int = None,
+    include_expired: bool = False,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: str = Query(None, alias="cursor"),
+    fields: str = None,
+):
+    columns = parse_ad_fields(fields)
+    where = []
+    params = []
+    if location and location.strip():
+        where.append("location LIKE %s")
+        params.append(escape_like(location.strip()) + "%")
+    if contract_type:
+        if contract_type not in CONTRACT_TYPES:
+            raise HTTPException(status_code=400, detail="Invalid contract type")
+        where.append("contract_type = %s")
+        params.append(contract_type)
+    wanted_min = parse_decimal(salary_min, "salary_min")
+    wanted_max = parse_decimal(salary_max, "salary_max")
+    if wanted_min is not None and wanted_max is not None and wanted_min > wanted_max:
+        raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
+    # An ad matches when its salary range overlaps the requested one; a missing bound
+    # on the ad falls back to the other bound.
+    if wanted_min is not None:
+        where.append("(salary_max >= %s OR (salary_max IS NULL AND salary_min >= %s))")
+        params.extend([wanted_min, wanted_min])
+    if wanted_max is not None:
+        where.append("(salary_min <= %s OR (salary_min IS NULL AND salary_max <= %s))")
+        params.extend([wanted_max, wanted_max])
+    if company_id is not None:
+        where.append("company_id = %s")
+        params.append(company_id)
+    if not include_expired:
+        where.append("(date_expiry IS NULL OR date_expiry >= CURDATE())")
+    terms = boolean_query(q)
+    shorts = short_terms(q)
+    # Too short for the FULLTEXT index ('go', 'qa', 'c#'): matched as a skill or a whole title word.
+    for term in shorts:
+        where.append("""(ad_id IN (SELECT ad_sk.ad_id FROM ad_skills ad_sk JOIN skills s ON s.skill_id = ad_sk.skill_id
+                                     WHERE s.name = %s)
+                         OR title REGEXP %s)""")
+        params.extend([matching.normalize_skill(term), word_pattern(term)])
+    if q and q.strip() and not terms and not shorts:
+        # Only stopwords: nothing to search for, and the unfiltered list would not be a result.
+        return json_response({"items": [], "next_cursor": None})
+    with db_cursor() as (conn, cursor):
+        if terms:
+            return json_response(select_ads_ranked(cursor, columns, limit, page_cursor, terms, where, params))
+        return json_response(select_ads_page(cursor, columns, limit, page_cursor, where, params))
 
 @app.get("/advertisements/{ad_id}")
 def get_advertisement(ad_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM advertisements WHERE ad_id = %s", (ad_id,))
-    row = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    def load():
+        with db_cursor() as (conn, cursor):
+            cursor.execute("SELECT * FROM advertisements WHERE ad_id = %s", (ad_id,))
+            return cursor.fetchone()
+
+    row = cache.cached("ad_detail", ad_id, load)
     if not row:
         raise HTTPException(status_code=404, detail="Advertisement not found")
     return row
@@ -136,19 +290,19 @@ async def create_advertisement(request: Request):
     required = ["company_id", "title", "description"]
     if not all(k in data for k in required):
         raise HTTPException(status_code=400, detail="Missing required fields")
-    salary_min = parse_decimal(data.get("salary_min"), "salary_min")
-    salary_max = parse_decimal(data.get("salary_max"), "salary_max")
-    if salary_min is not None and salary_max is not None and salary_min > salary_max:
-        raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
-    conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        company_id = int(data["company_id"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid company identifier")
+    auth.ensure_company_access(await auth.authenticate(request), company_id)
+    salary_min, salary_max = parse_salary_range(data.get("salary_min"), data.get("salary_max"))
     query = """
         INSERT INTO advertisements 
         (company_id, title, description, location, salary_min, salary_max, contract_type, date_expiry)
         VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
     """
     values = (
-        data["company_id"],
+        company_id,
         data["title"],
         data["description"],
         data.get("location"),
@@ -157,13 +311,39 @@ async def create_advertisement(request: Request):
         data.get("contract_type"),
         data.get("date_expiry")
     )
-    cursor.execute(query, values)
-    conn.commit()
-    new_id = cursor.lastrowid
-    cursor.close()
-    conn.close()
+
+    def transaction(conn, cursor):
+        cursor.execute(query, values)
+        ad_id = cursor.lastrowid
+        stats.ad_added(cursor, company_id)
+        skills = matching.sync_ad(cursor, ad_id, data.get("skills"))
+        conn.commit()
+        return ad_id, skills
+
+    new_id, skills = await run_db(transaction)
+    matching.index.set_ad(*skills)
+    invalidate_ads()
     return {"message": "Advertisement created", "ad_id": new_id}
 
+@app.post("/advertisements/import")
+async def import_advertisements(request: Request, format: str = "csv"):
+    company_id = auth.managed_company(await auth.authenticate(request))
+    if format not in imports.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format, use one of: {', '.join(imports.FORMATS)}")
+    upload = await imports.spool(request.stream())
+
+    def transaction(conn, cursor):
+        with upload:
+            importer = imports.AdImporter(conn, cursor, company_id)
+            return importer.run(imports.read_rows(upload, format)), importer.index_updates
+
+    report, index_updates = await run_db(transaction)
+    for args in index_updates:
+        matching.index.set_ad(*args)
+    if report["inserted"]:
+        invalidate_ads()
+    return report
+
 # --------------------------- APPLICATIONS ---------------------------
 
 @app.post("/applications")
@@ -173,140 +353,178 @@ async def create_application(request: Request):
     for field in required_fields:
         if field not in data:
             raise HTTPException(status_code=400, detail=f"Missing field: {field}")
-    conn = get_connection()
-    cursor = conn.cursor()
-    ensure_application_message_column(conn, cursor)
-    applicant_id = data.get("person_id")
-    person = None
-    if applicant_id:
-        cursor.execute("SELECT person_id, role FROM people WHERE person_id = %s", (applicant_id,))
-        person = cursor.fetchone()
-        if not person:
-            conn.rollback()
-            cursor.close()
-            conn.close()
-            raise HTTPException(status_code=400, detail="Invalid applicant identifier")
-        if person.get("role") != "Applicant":
-            conn.rollback()
-            cursor.close()
-            conn.close()
-            raise HTTPException(status_code=400, detail="Only candidate accounts can apply")
-    else:
-        cursor.execute("SELECT person_id FROM people WHERE email = %s", (data["email"],))
-        person = cursor.fetchone()
-        if person:
-            applicant_id = person["person_id"]
+    # Sent again unchanged when the client retries, so a retry is not reported as a duplicate.
+    idempotency_key = request.headers.get("Idempotency-Key")
+    if idempotency_key is not None and not 0 < len(idempotency_key) <= 64:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key header")
+
+    def transaction(conn, cursor):
+        counters = stats.application_rows("Sent")
+        applicant_id = data.get("person_id")
+        if applicant_id:
+            applicant_clause = "AND p.role = 'Applicant'"
         else:
+            # Connections do not set CLIENT_FOUND_ROWS, so rowcount is 0 when the email exists.
             cursor.execute("""
                 INSERT INTO people (first_name, last_name, email, phone, role)
                 VALUES (%s, %s, %s, %s, 'Applicant')
+                ON DUPLICATE KEY UPDATE person_id = LAST_INSERT_ID(person_id)
             """, (data["name"].split()[0], data["name"].split()[-1], data["email"], data["phone"]))
-            conn.commit()
             applicant_id = cursor.lastrowid
-    cursor.execute("""
-        SELECT application_id FROM applications
-        WHERE ad_id = %s AND applicant_id = %s
-    """, (data["ad_id"], applicant_id))
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
-        raise HTTPException(status_code=400, detail="You have already applied to this advertisement.")
-    cursor.execute("SELECT ad_id FROM advertisements WHERE ad_id = %s", (data["ad_id"],))
-    ad = cursor.fetchone()
-    if not ad:
-        raise HTTPException(status_code=404, detail="Advertisement not found")
-    cursor.execute("""
-        INSERT INTO applications (ad_id, applicant_id, recruiter_id, status, message)
-        VALUES (%s, %s, NULL, 'Sent', %s)
-    """, (data["ad_id"], applicant_id, data.get("message")))
-    conn.commit()
-    cursor.close()
-    conn.close()
+            applicant_clause = ""
+            if cursor.rowcount == 1:
+                counters.append(("people", stats.GLOBAL, 1))
+        try:
+            # Checks the ad, the applicant and (through uq_app_ad_applicant) earlier applications at once.
+            cursor.execute(f"""
+                INSERT INTO applications (ad_id, applicant_id, recruiter_id, status, message, idempotency_key)
+                SELECT ad.ad_id, p.person_id, NULL, 'Sent', %s, %s
+                FROM advertisements ad
+                JOIN people p ON p.person_id = %s {applicant_clause}
+                WHERE ad.ad_id = %s
+            """, (data.get("message"), idempotency_key, applicant_id, data["ad_id"]))
+        except IntegrityError as exc:
+            if not is_duplicate_entry(exc):
+                raise
+            cursor.execute("""
+                SELECT idempotency_key FROM applications WHERE ad_id = %s AND applicant_id = %s
+            """, (data["ad_id"], applicant_id))
+            existing = cursor.fetchone()
+            if idempotency_key and existing and existing["idempotency_key"] == idempotency_key:
+                return False
+            raise HTTPException(status_code=400, detail="You have already applied to this advertisement.")
+        if not cursor.rowcount:
+            cursor.execute("SELECT role FROM people WHERE person_id = %s", (applicant_id,))
+            person = cursor.fetchone()
+            if not person:
+                raise HTTPException(status_code=400, detail="Invalid applicant identifier")
+            if applicant_clause and person["role"] != "Applicant":
+                raise HTTPException(status_code=400, detail="Only candidate accounts can apply")
+            raise HTTPException(status_code=404, detail="Advertisement not found")
+        application_id = cursor.lastrowid
+        stats.bump_many(cursor, counters)
+        jobs.enqueue(cursor, "application.submitted", application_id=application_id)
+        conn.commit()
+        return True
+
+    if await run_db(transaction):
+        jobs.wake()
     return {"message": "Application submitted successfully"}
 
 @app.get("/applications/applicant/{applicant_id}")
-def get_applications_by_applicant(applicant_id: int):
+def get_applications_by_applicant(applicant_id: int, request: Request, response: Response):
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.application_id, ad.title AS job_title, a.status, a.application_date, a.message
-            FROM applications a
-            JOIN advertisements ad ON a.ad_id = ad.ad_id
-            WHERE a.applicant_id = %s
-            ORDER BY a.application_date DESC
-        """, (applicant_id,))
-        rows = cursor.fetchall()
-        return rows
+        with db_cursor() as (conn, cursor):
+            # The listing shows the ad title, so ad edits count as modifications too.
+            cursor.execute("""
+                SELECT COUNT(*) AS total, MAX(a.application_id) AS max_id,
+                       UNIX_TIMESTAMP(GREATEST(MAX(a.updated_at), MAX(ad.updated_at))) AS last_modified
+                FROM applications a
+                JOIN advertisements ad ON a.ad_id = ad.ad_id
+                WHERE a.applicant_id = %s
+            """, (applicant_id,))
+            not_modified = conditional(request, response, cursor.fetchone())
+            if not_modified:
+                return not_modified
+            cursor.execute("""
+                SELECT a.application_id, ad.title AS job_title, a.status, a.application_date, a.message
+                FROM applications a
+                JOIN advertisements ad ON a.ad_id = ad.ad_id
+                WHERE a.applicant_id = %s
+                ORDER BY a.application_date DESC
+            """, (applicant_id,))
+            return json_response(cursor.fetchall(), response)
+    except PoolTimeout:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        conn.close()
 
 @app.delete("/applications/{app_id}")
 def delete_application(app_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM applications WHERE application_id = %s", (app_id,))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with db_cursor() as (conn, cursor):
+        cursor.execute("SELECT status FROM applications WHERE application_id = %s FOR UPDATE", (app_id,))
+        application = cursor.fetchone()
+        if application:
+            cursor.execute("DELETE FROM applications WHERE application_id = %s", (app_id,))
+            stats.application_removed(cursor, application["status"])
+        conn.commit()
     return {"message": "Application deleted successfully"}
 
 # --------------------------- ADMIN ---------------------------
 
 @app.get("/companies")
 def get_companies():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM companies")
-    companies = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    return companies
+    def load():
+        with db_cursor() as (conn, cursor):
+            cursor.execute("SELECT * FROM companies")
+            return dumps(cursor.fetchall())
+
+    return json_response(cache.cached("companies_list", None, load))
 
 @app.get("/admin/overview")
 async def admin_overview(request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        cursor.execute("SELECT COUNT(*) AS total_users FROM people")
-        total_users = cursor.fetchone()["total_users"]
-        cursor.execute("SELECT COUNT(*) AS total_companies FROM companies")
-        total_companies = cursor.fetchone()["total_companies"]
-        cursor.execute("SELECT COUNT(*) AS total_ads FROM advertisements")
-        total_ads = cursor.fetchone()["total_ads"]
-        cursor.execute("SELECT COUNT(*) AS total_applications FROM applications")
-        total_applications = cursor.fetchone()["total_applications"]
-        return {
-            "users": total_users,
-            "companies": total_companies,
-            "advertisements": total_ads,
-            "applications": total_applications
-        }
-    finally:
-        cursor.close()
-        conn.close()
+    await auth.require_admin(request)
+
+    def query(conn, cursor):
+        return stats.overview(cursor)
+
+    return await run_db(query)
+
+@app.get("/admin/overview/companies")
+async def admin_overview_companies(request: Request):
+    await auth.require_admin(request)
+
+    def query(conn, cursor):
+        return stats.company_ad_counts(cursor)
+
+    return await run_db(query)
+
+@app.get("/admin/db-pool")
+async def admin_db_pool(request: Request):
+    await auth.require_admin(request)
+    return pool.stats()
+
+@app.get("/admin/cache")
+async def admin_cache(request: Request):
+    await auth.require_admin(request)
+    return cache.stats()
+
+@app.get("/admin/jobs")
+async def admin_jobs(request: Request):
+    await auth.require_admin(request)
+
+    def query(conn, cursor):
+        return jobs.summary(cursor)
+
+    return await run_db(query)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(request: Request):
+    if metrics.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token, metrics.METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    gauges = {
+        f"db_pool_{name}": value
+        for name, value in pool.stats().items()
+        if name in ("open", "in_use", "idle")
+    }
+    gauges["jobs_workers"] = jobs.workers.running
+    return PlainTextResponse(metrics.render(gauges), media_type="text/plain; version=0.0.4")
 
 @app.get("/admin/users")
 async def admin_get_users(request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    await auth.require_admin(request)
+
+    def query(conn, cursor):
         cursor.execute("""
             SELECT person_id, first_name, last_name, email, phone, role, created_at, company_id
             FROM people
             ORDER BY created_at DESC
         """)
         return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+
+    return json_response(await run_db(query))
 
 @app.post("/admin/users")
 async def admin_create_user(request: Request):
@@ -319,49 +537,26 @@ async def admin_create_user(request: Request):
     if data["role"] not in {"Applicant", "Recruiter", "Admin"}:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        if data["role"] == "Admin":
-            ensure_admin_role_enum(conn, cursor)
-        cursor.execute("SELECT person_id FROM people WHERE email = %s", (data["email"],))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Email already registered")
-        hashed_password = pwd_context.hash(data.get("password") or "changeme123")
-        cursor.execute("""
-            INSERT INTO people (first_name, last_name, email, phone, role, password, company_id)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            data["first_name"],
-            data["last_name"],
-            data["email"],
-            data.get("phone"),
-            data["role"],
-            hashed_password,
-            data.get("company_id"),
-        ))
+    await auth.require_admin(request)
+    hashed_password = await hash_password(data.get("password") or "changeme123")
+
+    def transaction(conn, cursor):
+        new_user_id = accounts.insert_person(cursor, data, data["role"], hashed_password, data.get("company_id"))
         conn.commit()
-        new_user_id = cursor.lastrowid
         return {"message": "User created successfully", "person_id": new_user_id}
-    finally:
-        cursor.close()
-        conn.close()
+
+    return await run_db(transaction)
 
 @app.post("/admin/companies")
 async def admin_create_company_admin(request: Request):
-    admin_id = get_admin_id_from_request(request)
+    await auth.require_admin(request)
     data = await request.json()
     required_fields = ["name"]
     missing = [field for field in required_fields if not data.get(field)]
     if missing:
         raise HTTPException(status_code=400, detail=f"Missing company field(s): {', '.join(missing)}")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    def transaction(conn, cursor):
         cursor.execute("""
             INSERT INTO companies (name, industry, size, website, email, phone, address)
             VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -374,26 +569,25 @@ async def admin_create_company_admin(request: Request):
             data.get("phone"),
             data.get("address"),
         ))
-        conn.commit()
         company_id = cursor.lastrowid
+        stats.company_added(cursor)
+        conn.commit()
         return {"message": "Company created successfully", "company_id": company_id}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    invalidate_companies()
+    return result
 
 @app.put("/admin/companies/{company_id}")
 async def admin_update_company(company_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
+    await auth.require_admin(request)
     data = await request.json()
     allowed_fields = ["name", "industry", "size", "website", "email", "phone", "address"]
     updates = {field: data.get(field) for field in allowed_fields if field in data}
     if not updates:
         raise HTTPException(status_code=400, detail="No valid fields provided for update")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    def transaction(conn, cursor):
         cursor.execute("SELECT company_id FROM companies WHERE company_id = %s", (company_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Company not found")
@@ -403,9 +597,10 @@ async def admin_update_company(company_id: int, request: Request):
         cursor.execute(f"UPDATE companies SET {set_clause} WHERE company_id = %s", values)
         conn.commit()
         return {"message": "Company updated successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    invalidate_companies(company_id)
+    return result
 
 @app.put("/admin/users/{person_id}")
 async def admin_update_user(person_id: int, request: Request):
@@ -415,54 +610,85 @@ async def admin_update_user(person_id: int, request: Request):
     if not updates:
         raise HTTPException(status_code=400, detail="No valid fields provided for update")
 
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    admin_id = (await auth.require_admin(request)).person_id
+    if "password" in updates:
+        updates["password"] = await hash_password(updates["password"])
+
+    def transaction(conn, cursor):
         cursor.execute("SELECT * FROM people WHERE person_id = %s", (person_id,))
         existing = cursor.fetchone()
         if not existing:
             raise HTTPException(status_code=404, detail="User not found")
         if person_id == admin_id and updates.get("role") and updates["role"] != "Admin":
             raise HTTPException(status_code=400, detail="You cannot change your own role")
-        if updates.get("role") == "Admin":
-            ensure_admin_role_enum(conn, cursor)
         if "email" in updates:
             cursor.execute("SELECT person_id FROM people WHERE email = %s AND person_id <> %s", (updates["email"], person_id))
             if cursor.fetchone():
                 raise HTTPException(status_code=400, detail="Email already registered")
-        if "password" in updates:
-            updates["password"] = pwd_context.hash(updates["password"])
 
         set_clause = ", ".join(f"{field}=%s" for field in updates)
         values = list(updates.values())
         values.append(person_id)
         cursor.execute(f"UPDATE people SET {set_clause} WHERE person_id = %s", values)
+        if "password" in updates:
+            auth.revoke_sessions(cursor, person_id)
         conn.commit()
         return {"message": "User updated successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    auth.forget(person_id)
+    return result
 
 @app.delete("/admin/users/{person_id}")
 async def admin_delete_user(person_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    admin_id = (await auth.require_admin(request)).person_id
+
+    def transaction(conn, cursor):
         if person_id == admin_id:
             raise HTTPException(status_code=400, detail="You cannot delete your own admin account.")
         cursor.execute("SELECT person_id FROM people WHERE person_id = %s", (person_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="User not found")
+        matching.forget_candidate(cursor, person_id)
         cursor.execute("DELETE FROM people WHERE person_id = %s", (person_id,))
+        stats.person_removed(cursor)
         conn.commit()
         return {"message": "User deleted successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    auth.forget(person_id)
+    matching.index.remove_candidate(person_id)
+    return result
+
+@app.post("/admin/users/bulk-delete")
+async def admin_bulk_delete_users(request: Request):
+    admin_id = (await auth.require_admin(request)).person_id
+    ids = bulk.parse_ids(await request.json())
+
+    def transaction(conn, cursor):
+        result = bulk.delete_people(cursor, ids, admin_id)
+        conn.commit()
+        return result
+
+    result = await run_db(transaction)
+    for person_id in result.done:
+        auth.forget(person_id)
+        matching.index.remove_candidate(person_id)
+    return result.as_dict()
+
+@app.post("/admin/users/{person_id}/revoke-sessions")
+async def admin_revoke_sessions(person_id: int, request: Request):
+    await auth.require_admin(request)
+
+    def transaction(conn, cursor):
+        auth.revoke_sessions(cursor, person_id)
+        if not cursor.rowcount:
+            raise HTTPException(status_code=404, detail="User not found")
+        conn.commit()
+
+    await run_db(transaction)
+    auth.forget(person_id)
+    return {"message": "Sessions revoked"}
 
 @app.post("/admin/admins")
 async def admin_create_admin(request: Request):
@@ -472,41 +698,77 @@ async def admin_create_admin(request: Request):
         if field not in data or not data[field]:
             raise HTTPException(status_code=400, detail=f"Missing field: {field}")
 
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        ensure_admin_role_enum(conn, cursor)
-        cursor.execute("SELECT person_id FROM people WHERE email = %s", (data["email"],))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Email already registered")
-        hashed_password = pwd_context.hash(data["password"])
-        cursor.execute("""
-            INSERT INTO people (first_name, last_name, email, phone, role, password)
-            VALUES (%s, %s, %s, %s, 'Admin', %s)
-        """, (
-            data.get("first_name", "Admin"),
-            data.get("last_name", "User"),
-            data["email"],
-            data.get("phone"),
-            hashed_password,
-        ))
+    await auth.require_admin(request)
+    hashed_password = await hash_password(data["password"])
+
+    def transaction(conn, cursor):
+        admin = {"first_name": "Admin", "last_name": "User", **data}
+        new_admin_id = accounts.insert_person(cursor, admin, "Admin", hashed_password)
         conn.commit()
-        new_admin_id = cursor.lastrowid
         return {"message": "Admin account created successfully", "admin_id": new_admin_id}
-    finally:
-        cursor.close()
-        conn.close()
+
+    return await run_db(transaction)
+
+APPLICATION_KEY_FIELDS = ["a.application_date", "a.application_id"]
+
+def application_filters(status=None, company_id=None, ad_id=None, date_from=None, date_to=None):
+    where = []
+    params = []
+    if status:
+        if status not in stats.APPLICATION_STATUSES:
+            raise HTTPException(status_code=400, detail="Invalid status value")
+        where.append("a.status = %s")
+        params.append(status)
+    if company_id is not None:
+        where.append("ad.company_id = %s")
+        params.append(company_id)
+    if ad_id is not None:
+        where.append("a.ad_id = %s")
+        params.append(ad_id)
+    if date_from:
+        where.append("a.application_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("a.application_date < %s + INTERVAL 1 DAY")
+        params.append(date_to)
+    return where, params
+
+def count_applications(cursor, status=None, company_id=None, ad_id=None):
+    # Unfiltered and per-status totals are kept in stats_counters.
+    if company_id is None and ad_id is None:
+        overview = stats.overview(cursor)
+        return overview["applications_by_status"][status] if status else overview["applications"]
+    where, params = application_filters(status, company_id, ad_id)
+    cursor.execute(f"""
+        SELECT COUNT(*) AS total
+        FROM applications a
+        JOIN advertisements ad ON ad.ad_id = a.ad_id
+        WHERE {' AND '.join(where)}
+    """, params)
+    return cursor.fetchone()["total"]
 
 @app.get("/admin/applications")
-async def admin_get_applications(request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        cursor.execute("""
+async def admin_get_applications(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: str = Query(None, alias="cursor"),
+    status: str = None,
+    company_id: int = None,
+    ad_id: int = None,
+    with_total: bool = True,
+):
+    await auth.require_admin(request)
+    where, params = application_filters(status, company_id, ad_id)
+
+    def query(conn, cursor):
+        clauses = list(where)
+        values = list(params)
+        if page_cursor:
+            clause, key_values = keyset_after(APPLICATION_KEY_FIELDS, decode_cursor(page_cursor, 2))
+            clauses.append(clause)
+            values.extend(key_values)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor.execute(f"""
             SELECT 
                 a.application_id,
                 a.status,
@@ -523,105 +785,225 @@ async def admin_get_applications(request: Request):
             JOIN people p ON p.person_id = a.applicant_id
             JOIN advertisements ad ON ad.ad_id = a.ad_id
             JOIN companies c ON c.company_id = ad.company_id
-            ORDER BY a.application_date DESC
-        """)
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
+            {where_sql}
+            ORDER BY a.application_date DESC, a.application_id DESC
+            LIMIT %s
+        """, values + [limit + 1])
+        result = page(cursor.fetchall(), limit, lambda row: (row["application_date"], row["application_id"]))
+        if with_total:
+            result["total"] = count_applications(cursor, status, company_id, ad_id)
+        return result
+
+    return json_response(await run_db(query))
+
+@app.get("/admin/exports/applications")
+async def admin_export_applications(
+    request: Request,
+    format: str = "ndjson",
+    status: str = None,
+    company_id: int = None,
+    ad_id: int = None,
+    date_from: date = None,
+    date_to: date = None,
+):
+    await auth.require_admin(request)
+    where, params = application_filters(status, company_id, ad_id, date_from, date_to)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    sql = f"""
+        SELECT
+            a.application_id,
+            a.status,
+            a.application_date,
+            a.message,
+            p.person_id,
+            p.first_name,
+            p.last_name,
+            p.email,
+            p.phone,
+            ad.ad_id,
+            ad.title,
+            c.company_id,
+            c.name AS company_name
+        FROM applications a
+        JOIN people p ON p.person_id = a.applicant_id
+        JOIN advertisements ad ON ad.ad_id = a.ad_id
+        JOIN companies c ON c.company_id = ad.company_id
+        {where_sql}
+        ORDER BY a.application_date DESC, a.application_id DESC
+    """
+    return await export_response(sql, params, format, "applications")
+
+@app.get("/admin/exports/users")
+async def admin_export_users(
+    request: Request,
+    format: str = "ndjson",
+    role: str = None,
+    company_id: int = None,
+    date_from: date = None,
+    date_to: date = None,
+):
+    await auth.require_admin(request)
+    where = []
+    params = []
+    if role:
+        if role not in {"Applicant", "Recruiter", "Admin"}:
+            raise HTTPException(status_code=400, detail="Invalid role")
+        where.append("role = %s")
+        params.append(role)
+    if company_id is not None:
+        where.append("company_id = %s")
+        params.append(company_id)
+    if date_from:
+        where.append("created_at >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("created_at < %s + INTERVAL 1 DAY")
+        params.append(date_to)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+    sql = f"""
+        SELECT person_id, first_name, last_name, email, phone, role, company_id, created_at
+        FROM people
+        {where_sql}
+        ORDER BY person_id
+    """
+    return await export_response(sql, params, format, "users")
 
 @app.delete("/admin/applications/{application_id}")
 async def admin_delete_application(application_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        cursor.execute("SELECT application_id FROM applications WHERE application_id = %s", (application_id,))
-        if not cursor.fetchone():
+    await auth.require_admin(request)
+
+    def transaction(conn, cursor):
+        cursor.execute("SELECT status FROM applications WHERE application_id = %s FOR UPDATE", (application_id,))
+        application = cursor.fetchone()
+        if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         cursor.execute("DELETE FROM applications WHERE application_id = %s", (application_id,))
+        stats.application_removed(cursor, application["status"])
         conn.commit()
         return {"message": "Application deleted successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    return await run_db(transaction)
 
 @app.patch("/admin/applications/{application_id}")
 async def admin_update_application(application_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
+    await auth.require_admin(request)
     data = await request.json()
     status = data.get("status")
-    allowed_statuses = {"Sent", "In review", "Interview", "Rejected", "Hired"}
-    if status not in allowed_statuses:
+    if status not in stats.APPLICATION_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status value")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        cursor.execute("SELECT application_id FROM applications WHERE application_id = %s", (application_id,))
-        if not cursor.fetchone():
+    def transaction(conn, cursor):
+        cursor.execute("SELECT status FROM applications WHERE application_id = %s FOR UPDATE", (application_id,))
+        application = cursor.fetchone()
+        if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         cursor.execute("UPDATE applications SET status = %s WHERE application_id = %s", (status, application_id))
+        stats.application_status_changed(cursor, application["status"], status)
+        if application["status"] != status:
+            jobs.enqueue(cursor, "application.status_changed", application_id=application_id, status=status)
         conn.commit()
         return {"message": "Application updated successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    jobs.wake()
+    return result
+
+@app.post("/admin/applications/bulk-status")
+async def admin_bulk_update_applications(request: Request):
+    await auth.require_admin(request)
+    data = await request.json()
+    ids = bulk.parse_ids(data)
+    status = data.get("status")
+    if status not in stats.APPLICATION_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status value")
+
+    def transaction(conn, cursor):
+        result = bulk.update_application_statuses(cursor, ids, status)
+        conn.commit()
+        return result.as_dict()
+
+    result = await run_db(transaction)
+    jobs.wake()
+    return result
+
+@app.post("/admin/applications/bulk-delete")
+async def admin_bulk_delete_applications(request: Request):
+    await auth.require_admin(request)
+    ids = bulk.parse_ids(await request.json())
+
+    def transaction(conn, cursor):
+        result = bulk.delete_applications(cursor, ids)
+        conn.commit()
+        return result.as_dict()
+
+    return await run_db(transaction)
 
 @app.delete("/admin/companies/{company_id}")
 async def admin_delete_company(company_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    await auth.require_admin(request)
+
+    def transaction(conn, cursor):
         cursor.execute("SELECT company_id FROM companies WHERE company_id = %s", (company_id,))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Company not found")
         cursor.execute("DELETE FROM companies WHERE company_id = %s", (company_id,))
+        stats.company_removed(cursor, company_id)
         conn.commit()
         return {"message": "Company deleted successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    invalidate_companies(company_id)
+    return result
 
 @app.delete("/admin/advertisements/{ad_id}")
 async def admin_delete_advertisement(ad_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        cursor.execute("SELECT ad_id FROM advertisements WHERE ad_id = %s", (ad_id,))
-        if not cursor.fetchone():
+    await auth.require_admin(request)
+
+    def transaction(conn, cursor):
+        cursor.execute("SELECT company_id FROM advertisements WHERE ad_id = %s FOR UPDATE", (ad_id,))
+        ad = cursor.fetchone()
+        if not ad:
             raise HTTPException(status_code=404, detail="Advertisement not found")
+        matching.forget_ad(cursor, ad_id)
         cursor.execute("DELETE FROM advertisements WHERE ad_id = %s", (ad_id,))
+        stats.ad_removed(cursor, ad["company_id"])
         conn.commit()
         return {"message": "Advertisement deleted successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+
+    result = await run_db(transaction)
+    matching.index.remove_ad(ad_id)
+    invalidate_ads(ad_id)
+    return result
+
+@app.post("/admin/advertisements/bulk-delete")
+async def admin_bulk_delete_advertisements(request: Request):
+    await auth.require_admin(request)
+    ids = bulk.parse_ids(await request.json())
+
+    def transaction(conn, cursor):
+        result = bulk.delete_advertisements(cursor, ids)
+        conn.commit()
+        return result
+
+    result = await run_db(transaction)
+    for ad_id in result.done:
+        matching.index.remove_ad(ad_id)
+    if result.done:
+        invalidate_ads()
+    return result.as_dict()
 
 @app.post("/admin/advertisements")
 async def admin_create_advertisement(request: Request):
-    admin_id = get_admin_id_from_request(request)
+    await auth.require_admin(request)
     data = await request.json()
     required = ["company_id", "title", "description"]
     missing = [field for field in required if not data.get(field)]
     if missing:
         raise HTTPException(status_code=400, detail=f"Missing advertisement field(s): {', '.join(missing)}")
 
-    salary_min = parse_decimal(data.get("salary_min"), "salary_min")
-    salary_max = parse_decimal(data.get("salary_max"), "salary_max")
-    if salary_min is not None and salary_max is not None and salary_min > salary_max:
-        raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
+    salary_min, salary_max = parse_salary_range(data.get("salary_min"), data.get("salary_max"))
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
+    def transaction(conn, cursor):
         cursor.execute("SELECT company_id FROM companies WHERE company_id = %s", (data["company_id"],))
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Company not found")
@@ -638,20 +1020,24 @@ async def admin_create_advertisement(request: Request):
             data.get("contract_type"),
             data.get("date_expiry"),
         ))
-        conn.commit()
         ad_id = cursor.lastrowid
-        return {"message": "Advertisement created successfully", "ad_id": ad_id}
-    finally:
-        cursor.close()
-        conn.close()
+        stats.ad_added(cursor, data["company_id"])
+        skills = matching.sync_ad(cursor, ad_id, data.get("skills"))
+        conn.commit()
+        return ad_id, skills
+
+    ad_id, skills = await run_db(transaction)
+    matching.index.set_ad(*skills)
+    invalidate_ads()
+    return {"message": "Advertisement created successfully", "ad_id": ad_id}
 
 @app.put("/admin/advertisements/{ad_id}")
 async def admin_update_advertisement(ad_id: int, request: Request):
-    admin_id = get_admin_id_from_request(request)
+    await auth.require_admin(request)
     data = await request.json()
     allowed_fields = ["title", "description", "location", "salary_min", "salary_max", "contract_type", "date_expiry", "company_id"]
     updates = {field: data.get(field) for field in allowed_fields if field in data}
-    if not updates:
+    if not updates and "skills" not in data:
         raise HTTPException(status_code=400, detail="No valid fields provided for update")
 
     if "salary_min" in updates:
@@ -662,26 +1048,30 @@ async def admin_update_advertisement(ad_id: int, request: Request):
         if updates["salary_min"] > updates["salary_max"]:
             raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        require_admin(cursor, admin_id)
-        cursor.execute("SELECT ad_id FROM advertisements WHERE ad_id = %s", (ad_id,))
-        if not cursor.fetchone():
+    def transaction(conn, cursor):
+        cursor.execute("SELECT company_id FROM advertisements WHERE ad_id = %s FOR UPDATE", (ad_id,))
+        existing = cursor.fetchone()
+        if not existing:
             raise HTTPException(status_code=404, detail="Advertisement not found")
         if "company_id" in updates:
             cursor.execute("SELECT company_id FROM companies WHERE company_id = %s", (updates["company_id"],))
             if not cursor.fetchone():
                 raise HTTPException(status_code=404, detail="Company not found")
-        set_clause = ", ".join(f"{field}=%s" for field in updates)
-        values = list(updates.values())
-        values.append(ad_id)
-        cursor.execute(f"UPDATE advertisements SET {set_clause} WHERE ad_id = %s", values)
+        if updates:
+            set_clause = ", ".join(f"{field}=%s" for field in updates)
+            values = list(updates.values())
+            values.append(ad_id)
+            cursor.execute(f"UPDATE advertisements SET {set_clause} WHERE ad_id = %s", values)
+        if "company_id" in updates:
+            stats.ad_moved(cursor, existing["company_id"], int(updates["company_id"]))
+        skills = matching.sync_ad(cursor, ad_id, data.get("skills"), extract=is_ad_text_update(updates))
         conn.commit()
-        return {"message": "Advertisement updated successfully"}
-    finally:
-        cursor.close()
-        conn.close()
+        return skills
+
+    skills = await run_db(transaction)
+    matching.index.set_ad(*skills)
+    invalidate_ads(ad_id)
+    return {"message": "Advertisement updated successfully"}
 
 # --------------------------- AUTH ---------------------------
 
@@ -693,38 +1083,45 @@ async def register(request: Request):
         if f not in data:
             raise HTTPException(status_code=400, detail=f"Missing field: {f}")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT person_id FROM people WHERE email = %s", (data["email"],))
-    existing = cursor.fetchone()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    hashed_password = pwd_context.hash(data["password"])
-
-    cursor.execute("""
-        INSERT INTO people (first_name, last_name, email, phone, role, password)
-        VALUES (%s, %s, %s, %s, 'Applicant', %s)
-    """, (data["first_name"], data["last_name"], data["email"], data.get("phone"), hashed_password))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    hashed_password = await hash_password(data["password"])
+
+    def transaction(conn, cursor):
+        person_id = accounts.insert_person(cursor, data, "Applicant", hashed_password)
+        jobs.enqueue(cursor, "account.created", person_id=person_id)
+        conn.commit()
+
+    await run_db(transaction)
+    jobs.wake()
     return {"message": "Account created successfully"}
 
+async def upgrade_password_hash(person_id, password, previous_password):
+    try:
+        new_hash = await hash_password(password)
+    except HTTPException:
+        return
+
+    def transaction(conn, cursor):
+        cursor.execute(
+            "UPDATE people SET password = %s WHERE person_id = %s AND password = %s",
+            (new_hash, person_id, previous_password),
+        )
+        conn.commit()
+
+    await run_db(transaction)
+
 @app.post("/login")
-async def login(request: Request):
+async def login(request: Request, background_tasks: BackgroundTasks):
     data = await request.json()
     required = ["email", "password"]
     for f in required:
         if f not in data:
             raise HTTPException(status_code=400, detail=f"Missing field: {f}")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM people WHERE email = %s", (data["email"],))
-    user = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    def query(conn, cursor):
+        cursor.execute("SELECT * FROM people WHERE email = %s", (data["email"],))
+        return cursor.fetchone()
+
+    user = await run_db(query)
 
     if not user:
         raise HTTPException(status_code=404, detail="No account found for this email.")
@@ -736,16 +1133,35 @@ async def login(request: Request):
     if isinstance(stored_password, bytes):
         stored_password = stored_password.decode()
 
-    if isinstance(stored_password, str) and (stored_password.startswith("$2b$") or stored_password.startswith("$2a$")):
-        valid_password = pwd_context.verify(data["password"], stored_password)
-    else:
-        valid_password = stored_password == data["password"]
+    valid_password, needs_rehash = await verify_password(data["password"], stored_password)
 
     if not valid_password:
         raise HTTPException(status_code=401, detail="Incorrect password.")
 
+    if needs_rehash:
+        background_tasks.add_task(upgrade_password_hash, user["person_id"], data["password"], stored_password)
+
     user.pop("password", None)
-    return {"message": "Login successful", "user": user}
+    user.pop("tokens_valid_after", None)
+    return {
+        "message": "Login successful",
+        "user": user,
+        "token": auth.issue_token(user["person_id"], user["role"]),
+        "token_type": "bearer",
+        "expires_in": auth.TOKEN_TTL,
+    }
+
+@app.post("/logout")
+async def logout(request: Request):
+    principal = await auth.authenticate(request)
+
+    def transaction(conn, cursor):
+        auth.revoke_sessions(cursor, principal.person_id)
+        conn.commit()
+
+    await run_db(transaction)
+    auth.forget(principal.person_id)
+    return {"message": "Logged out"}
 
 @app.post("/companies")
 async def create_company(request: Request):
@@ -772,82 +1188,49 @@ async def create_company(request: Request):
             detail=f"Missing recruiter field(s): {', '.join(missing_recruiter)}"
         )
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT person_id FROM people WHERE email = %s", (recruiter["email"],))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await hash_password(recruiter["password"])
 
-        cursor.execute("""
-            INSERT INTO companies (name, industry, size, website, email, phone, address)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            company.get("name"),
-            company.get("industry"),
-            company.get("size"),
-            company.get("website"),
-            company.get("email"),
-            company.get("phone"),
-            company.get("address"),
-        ))
-        company_id = cursor.lastrowid
-
-        hashed_password = pwd_context.hash(recruiter["password"])
-        cursor.execute("""
-            INSERT INTO people (company_id, first_name, last_name, email, phone, role, password)
-            VALUES (%s, %s, %s, %s, %s, 'Recruiter', %s)
-        """, (
-            company_id,
-            recruiter.get("first_name"),
-            recruiter.get("last_name"),
-            recruiter.get("email"),
-            recruiter.get("phone"),
-            hashed_password,
-        ))
-        recruiter_id = cursor.lastrowid
-
-        cursor.execute("""
-            SELECT person_id, company_id, first_name, last_name, email, phone, role
-            FROM people
-            WHERE person_id = %s
-        """, (recruiter_id,))
-        recruiter_record = cursor.fetchone()
+    def transaction(conn, cursor):
+        try:
+            company_id, recruiter_record = accounts.create_company(cursor, company, recruiter, hashed_password)
+            recruiter_id = recruiter_record["person_id"]
+            jobs.enqueue(cursor, "company.created", company_id=company_id, recruiter_id=recruiter_id)
+            conn.commit()
+        except HTTPException as exc:
+            conn.rollback()
+            raise exc
+        except Exception as exc:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(exc))
+        return company_id, recruiter_id, recruiter_record
 
-        conn.commit()
-    except HTTPException as exc:
-        conn.rollback()
-        raise exc
-    except Exception as exc:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        cursor.close()
-        conn.close()
+    company_id, recruiter_id, recruiter_record = await run_db(transaction)
+    invalidate_companies()
+    jobs.wake()
 
     return {
         "message": "Company account created successfully",
         "company_id": company_id,
         "recruiter_id": recruiter_id,
         "recruiter": recruiter_record,
+        "token": auth.issue_token(recruiter_id, "Recruiter"),
     }
 
 @app.get("/companies/{company_id}")
 def get_company(company_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT * FROM companies WHERE company_id = %s", (company_id,))
-        company = cursor.fetchone()
-        if not company:
-            raise HTTPException(status_code=404, detail="Company not found")
-        return company
-    finally:
-        cursor.close()
-        conn.close()
+    def load():
+        with db_cursor() as (conn, cursor):
+            cursor.execute("SELECT * FROM companies WHERE company_id = %s", (company_id,))
+            return cursor.fetchone()
+
+    company = cache.cached("company_detail", company_id, load)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return company
 
 @app.put("/companies/{company_id}")
 async def update_company(company_id: int, request: Request):
+    auth.ensure_company_access(await auth.authenticate(request), company_id)
     data = await request.json()
     allowed_fields = ["name", "industry", "size", "website", "email", "phone", "address"]
     updates = {field: data.get(field) for field in allowed_fields if field in data}
@@ -858,51 +1241,105 @@ async def update_company(company_id: int, request: Request):
     values = list(updates.values())
     values.append(company_id)
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT company_id FROM companies WHERE company_id = %s", (company_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Company not found")
-        cursor.execute(f"UPDATE companies SET {set_clause} WHERE company_id = %s", values)
-        conn.commit()
-    except HTTPException as exc:
-        conn.rollback()
-        raise exc
-    except Exception as exc:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        cursor.close()
-        conn.close()
+    def transaction(conn, cursor):
+        try:
+            cursor.execute("SELECT company_id FROM companies WHERE company_id = %s", (company_id,))
+            if not cursor.fetchone():
+                raise HTTPException(status_code=404, detail="Company not found")
+            cursor.execute(f"UPDATE companies SET {set_clause} WHERE company_id = %s", values)
+            conn.commit()
+        except HTTPException as exc:
+            conn.rollback()
+            raise exc
+        except Exception as exc:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(exc))
+
+    await run_db(transaction)
+    invalidate_companies(company_id)
 
     return {"message": "Company updated successfully"}
 
 @app.get("/companies/{company_id}/advertisements")
-def get_company_advertisements(company_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+def get_company_advertisements(company_id: int, request: Request, response: Response):
+    not_modified = conditional(request, response, ads_version(company_id))
+    if not_modified:
+        return not_modified
+    with db_cursor() as (conn, cursor):
         cursor.execute("""
             SELECT ad_id, title, description, location, salary_min, salary_max, contract_type, date_posted, date_expiry
             FROM advertisements
             WHERE company_id = %s
             ORDER BY date_posted DESC
         """, (company_id,))
-        rows = cursor.fetchall()
-        return rows
-    finally:
-        cursor.close()
-        conn.close()
+        return json_response(cursor.fetchall(), response)
+
+@app.get("/companies/{company_id}/dashboard")
+async def get_company_dashboard(company_id: int, request: Request):
+    auth.ensure_company_access(await auth.authenticate(request), company_id)
+
+    def query(conn, cursor):
+        cursor.execute("SELECT * FROM companies WHERE company_id = %s", (company_id,))
+        company = cursor.fetchone()
+        if not company:
+            raise HTTPException(status_code=404, detail="Company not found")
+        cursor.execute("""
+            SELECT
+                ad.ad_id, ad.title, ad.description, ad.location, ad.salary_min, ad.salary_max,
+                ad.contract_type, ad.date_posted, ad.date_expiry,
+                a.status,
+                COUNT(a.application_id) AS applications,
+                MAX(a.application_date) AS last_application_date
+            FROM advertisements ad
+            LEFT JOIN applications a ON a.ad_id = ad.ad_id
+            WHERE ad.company_id = %s
+            GROUP BY ad.ad_id, a.status
+            ORDER BY ad.date_posted DESC, ad.ad_id DESC
+        """, (company_id,))
+        return company, cursor.fetchall()
+
+    company, rows = await run_db(query)
+    ads = {}
+    totals = dict.fromkeys(stats.APPLICATION_STATUSES, 0)
+    for row in rows:
+        status = row.pop("status")
+        count = row.pop("applications")
+        last_application_date = row.pop("last_application_date")
+        ad = ads.get(row["ad_id"])
+        if ad is None:
+            ad = ads[row["ad_id"]] = row
+            ad["applications"] = {
+                "total": 0,
+                "by_status": dict.fromkeys(stats.APPLICATION_STATUSES, 0),
+                "last_application_date": None,
+            }
+        if not count:
+            continue
+        summary = ad["applications"]
+        summary["total"] += count
+        summary["by_status"][status] = summary["by_status"].get(status, 0) + count
+        totals[status] = totals.get(status, 0) + count
+        if summary["last_application_date"] is None or last_application_date > summary["last_application_date"]:
+            summary["last_application_date"] = last_application_date
+    return json_response({
+        "company": company,
+        "advertisements": list(ads.values()),
+        "totals": {
+            "advertisements": len(ads),
+            "applications": sum(totals.values()),
+            "applications_by_status": totals,
+        },
+    })
 
 @app.put("/advertisements/{ad_id}")
 async def update_advertisement(ad_id: int, request: Request):
+    principal = await auth.authenticate(request)
     data = await request.json()
     allowed_fields = [
         "title", "description", "location", "salary_min", "salary_max", "contract_type", "date_expiry"
     ]
     updates = {field: data.get(field) for field in allowed_fields if field in data}
-    if not updates:
+    if not updates and "skills" not in data:
         raise HTTPException(status_code=400, detail="No valid fields provided for update")
 
     if "salary_min" in updates:
@@ -914,50 +1351,110 @@ async def update_advertisement(ad_id: int, request: Request):
     values = list(updates.values())
     values.append(ad_id)
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT ad_id, salary_min, salary_max FROM advertisements WHERE ad_id = %s", (ad_id,))
-        existing = cursor.fetchone()
-        if not existing:
-            raise HTTPException(status_code=404, detail="Advertisement not found")
-        current_min = updates.get("salary_min", existing.get("salary_min"))
-        current_max = updates.get("salary_max", existing.get("salary_max"))
-        if current_min is not None and current_max is not None and current_min > current_max:
-            raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
-        cursor.execute(f"UPDATE advertisements SET {set_clause} WHERE ad_id = %s", values)
-        conn.commit()
-    except HTTPException as exc:
-        conn.rollback()
-        raise exc
-    finally:
-        cursor.close()
-        conn.close()
+    def transaction(conn, cursor):
+        try:
+            cursor.execute("SELECT ad_id, company_id, salary_min, salary_max FROM advertisements WHERE ad_id = %s", (ad_id,))
+            existing = cursor.fetchone()
+            if not existing:
+                raise HTTPException(status_code=404, detail="Advertisement not found")
+            auth.ensure_company_access(principal, existing["company_id"])
+            current_min = updates.get("salary_min", existing.get("salary_min"))
+            current_max = updates.get("salary_max", existing.get("salary_max"))
+            if current_min is not None and current_max is not None and current_min > current_max:
+                raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
+            if updates:
+                cursor.execute(f"UPDATE advertisements SET {set_clause} WHERE ad_id = %s", values)
+            skills = matching.sync_ad(cursor, ad_id, data.get("skills"), extract=is_ad_text_update(updates))
+            conn.commit()
+        except HTTPException as exc:
+            conn.rollback()
+            raise exc
+        return skills
+
+    skills = await run_db(transaction)
+    matching.index.set_ad(*skills)
+    invalidate_ads(ad_id)
 
     return {"message": "Advertisement updated successfully"}
 
 @app.delete("/advertisements/{ad_id}")
-def delete_advertisement(ad_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT ad_id FROM advertisements WHERE ad_id = %s", (ad_id,))
-        if not cursor.fetchone():
+async def delete_advertisement(ad_id: int, request: Request):
+    principal = await auth.authenticate(request)
+
+    def transaction(conn, cursor):
+        cursor.execute("SELECT company_id FROM advertisements WHERE ad_id = %s FOR UPDATE", (ad_id,))
+        ad = cursor.fetchone()
+        if not ad:
             raise HTTPException(status_code=404, detail="Advertisement not found")
+        auth.ensure_company_access(principal, ad["company_id"])
+        matching.forget_ad(cursor, ad_id)
         cursor.execute("DELETE FROM advertisements WHERE ad_id = %s", (ad_id,))
+        stats.ad_removed(cursor, ad["company_id"])
         conn.commit()
-    finally:
-        cursor.close()
-        conn.close()
+
+    await run_db(transaction)
+    matching.index.remove_ad(ad_id)
+    invalidate_ads(ad_id)
 
     return {"message": "Advertisement deleted successfully"}
 
+@app.post("/advertisements/bulk-delete")
+async def bulk_delete_advertisements(request: Request):
+    company_id = auth.managed_company(await auth.authenticate(request))
+    ids = bulk.parse_ids(await request.json())
+
+    def transaction(conn, cursor):
+        result = bulk.delete_advertisements(cursor, ids, company_id)
+        conn.commit()
+        return result
+
+    result = await run_db(transaction)
+    for ad_id in result.done:
+        matching.index.remove_ad(ad_id)
+    if result.done:
+        invalidate_ads()
+    return result.as_dict()
+
+@app.post("/applications/bulk-status")
+async def bulk_update_applications(request: Request):
+    company_id = auth.managed_company(await auth.authenticate(request))
+    data = await request.json()
+    ids = bulk.parse_ids(data)
+    status = data.get("status")
+    if status not in stats.APPLICATION_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status value")
+
+    def transaction(conn, cursor):
+        result = bulk.update_application_statuses(cursor, ids, status, company_id)
+        conn.commit()
+        return result.as_dict()
+
+    result = await run_db(transaction)
+    jobs.wake()
+    return result
+
 @app.get("/advertisements/{ad_id}/candidates")
-def get_advertisement_candidates(ad_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
+async def get_advertisement_candidates(
+    ad_id: int,
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    page_cursor: str = Query(None, alias="cursor"),
+):
+    principal = await auth.authenticate(request)
+
+    def query(conn, cursor):
+        cursor.execute("SELECT company_id FROM advertisements WHERE ad_id = %s", (ad_id,))
+        ad = cursor.fetchone()
+        if not ad:
+            raise HTTPException(status_code=404, detail="Advertisement not found")
+        auth.ensure_company_access(principal, ad["company_id"])
+        where = ["a.ad_id = %s"]
+        params = [ad_id]
+        if page_cursor:
+            clause, key_values = keyset_after(APPLICATION_KEY_FIELDS, decode_cursor(page_cursor, 2))
+            where.append(clause)
+            params.extend(key_values)
+        cursor.execute(f"""
             SELECT 
                 a.application_id,
                 a.status,
@@ -977,14 +1474,13 @@ def get_advertisement_candidates(ad_id: int):
             FROM applications a
             JOIN people p ON a.applicant_id = p.person_id
             LEFT JOIN candidate_profiles cp ON cp.person_id = p.person_id
-            WHERE a.ad_id = %s
-            ORDER BY a.application_date DESC
-        """, (ad_id,))
-        rows = cursor.fetchall()
-        return rows
-    finally:
-        cursor.close()
-        conn.close()
+            WHERE {' AND '.join(where)}
+            ORDER BY a.application_date DESC, a.application_id DESC
+            LIMIT %s
+        """, params + [limit + 1])
+        return page(cursor.fetchall(), limit, lambda row: (row["application_date"], row["application_id"]))
+
+    return json_response(await run_db(query))
 
 
 @app.post("/candidates")
@@ -996,88 +1492,115 @@ async def create_candidate(request: Request):
         missing_fields = ", ".join(missing)
         raise HTTPException(status_code=400, detail=f"Missing required field(s): {missing_fields}")
 
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT person_id FROM people WHERE email = %s", (data["email"],))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Email already registered")
+    hashed_password = await hash_password(data["password"])
 
-        hashed_password = pwd_context.hash(data["password"])
-        cursor.execute("""
-            INSERT INTO people (first_name, last_name, email, phone, role, password)
-            VALUES (%s, %s, %s, %s, 'Applicant', %s)
-        """, (
-            data["first_name"],
-            data["last_name"],
-            data["email"],
-            data.get("phone"),
-            hashed_password,
-        ))
-        person_id = cursor.lastrowid
-
-        def to_int(value):
-            try:
-                return int(value) if value not in (None, "") else None
-            except (TypeError, ValueError):
-                return None
+    def transaction(conn, cursor):
+        try:
+            person_id = accounts.create_candidate(cursor, data, hashed_password)
+            skills = matching.sync_candidate(cursor, person_id, data.get("skills"))
+            jobs.enqueue(cursor, "account.created", person_id=person_id)
+            conn.commit()
+        except HTTPException as exc:
+            conn.rollback()
+            raise exc
+        except Exception as exc:
+            conn.rollback()
+            raise HTTPException(status_code=500, detail=str(exc))
+        return person_id, skills
 
-        cursor.execute("""
-            INSERT INTO candidate_profiles (person_id, location, experience, education, years_experience, skills, about)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            person_id,
-            data.get("location"),
-            data.get("experience"),
-            data.get("education"),
-            to_int(data.get("years_experience")),
-            data.get("skills"),
-            data.get("about"),
-        ))
-        conn.commit()
-    except HTTPException as exc:
-        conn.rollback()
-        raise exc
-    except Exception as exc:
-        conn.rollback()
-        raise HTTPException(status_code=500, detail=str(exc))
-    finally:
-        cursor.close()
-        conn.close()
+    person_id, skills = await run_db(transaction)
+    matching.index.set_candidate(*skills)
+    jobs.wake()
 
     return {"message": "Candidate created successfully", "person_id": person_id}
 
 @app.get("/candidates/{person_id}")
 async def get_candidate(person_id: int):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM people WHERE person_id = %s", (person_id,))
-    person = cursor.fetchone()
-    cursor.execute("SELECT * FROM candidate_profiles WHERE person_id = %s", (person_id,))
-    profile = cursor.fetchone()
-    cursor.close()
-    conn.close()
+    def query(conn, cursor):
+        cursor.execute("SELECT * FROM people WHERE person_id = %s", (person_id,))
+        person = cursor.fetchone()
+        cursor.execute("SELECT * FROM candidate_profiles WHERE person_id = %s", (person_id,))
+        profile = cursor.fetchone()
+        return person, profile
+
+    person, profile = await run_db(query)
     return {"candidate": person, "profile": profile or None}
 
 @app.put("/candidates/{person_id}")
 async def update_candidate(person_id: int, request: Request):
     data = await request.json()
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE people
-        SET first_name=%s, last_name=%s, email=%s, phone=%s
-        WHERE person_id=%s
-    """, (data.get("first_name"), data.get("last_name"), data.get("email"), data.get("phone"), person_id))
-    cursor.execute("""
-        UPDATE candidate_profiles
-        SET location=%s, education=%s, experience=%s, years_experience=%s, skills=%s, about=%s
-        WHERE person_id=%s
-    """, (data.get("location"), data.get("education"), data.get("experience"), data.get("years_experience"), data.get("skills"), data.get("about"), person_id))
-    conn.commit()
-    cursor.close()
-    conn.close()
+
+    def transaction(conn, cursor):
+        cursor.execute("""
+            UPDATE people
+            SET first_name=%s, last_name=%s, email=%s, phone=%s
+            WHERE person_id=%s
+        """, (data.get("first_name"), data.get("last_name"), data.get("email"), data.get("phone"), person_id))
+        cursor.execute("""
+            UPDATE candidate_profiles
+            SET location=%s, education=%s, experience=%s, years_experience=%s, skills=%s, about=%s
+            WHERE person_id=%s
+        """, (data.get("location"), data.get("education"), data.get("experience"), data.get("years_experience"), data.get("skills"), data.get("about"), person_id))
+        skills = matching.sync_candidate(cursor, person_id, data.get("skills"))
+        conn.commit()
+        return skills
+
+    matching.index.set_candidate(*await run_db(transaction))
     return {"message": "Profile updated successfully"}
 
+# --------------------------- MATCHING ---------------------------
+
+@app.get("/candidates/{person_id}/recommended-ads")
+async def get_recommended_ads(person_id: int, limit: int = Query(10, ge=1, le=50)):
+    def query(conn, cursor):
+        matching.index.ensure_loaded(cursor)
+        ranked = matching.index.recommend_ads(person_id, limit)
+        if not ranked:
+            return []
+        ids = [ad_id for _, ad_id, _ in ranked]
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"""
+            SELECT ad_id, company_id, title, location, contract_type, salary_min, salary_max, date_posted, date_expiry
+            FROM advertisements WHERE ad_id IN ({placeholders})
+        """, ids)
+        ads = {row["ad_id"]: row for row in cursor.fetchall()}
+        return [
+            dict(ads[ad_id], score=round(score, 4), matched_skills=matched)
+            for score, ad_id, matched in ranked if ad_id in ads
+        ]
+
+    return await run_db(query)
+
+@app.get("/advertisements/{ad_id}/recommended-candidates")
+async def get_recommended_candidates(ad_id: int, request: Request, limit: int = Query(10, ge=1, le=50)):
+    principal = await auth.authenticate(request)
+
+    def query(conn, cursor):
+        cursor.execute("SELECT company_id FROM advertisements WHERE ad_id = %s", (ad_id,))
+        ad = cursor.fetchone()
+        if not ad:
+            raise HTTPException(status_code=404, detail="Advertisement not found")
+        auth.ensure_company_access(principal, ad["company_id"])
+        matching.index.ensure_loaded(cursor)
+        ranked = matching.index.recommend_candidates(ad_id, limit)
+        if not ranked:
+            return []
+        ids = [person_id for _, person_id, _ in ranked]
+        placeholders = ", ".join(["%s"] * len(ids))
+        cursor.execute(f"""
+            SELECT p.person_id, p.first_name, p.last_name, p.email, p.phone,
+                   cp.location, cp.years_experience, cp.skills
+            FROM people p
+            LEFT JOIN candidate_profiles cp ON cp.person_id = p.person_id
+            WHERE p.person_id IN ({placeholders})
+        """, ids)
+        people = {row["person_id"]: row for row in cursor.fetchall()}
+        return [
+            dict(people[person_id], score=round(score, 4), matched_skills=matched)
+            for score, person_id, matched in ranked if person_id in people
+        ]
+
+    return await run_db(query)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
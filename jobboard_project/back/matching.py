@@ -0,0 +1,392 @@
+"""Candidate / job matching over the skills, ad_skills and people_skills tables.
+
+Skills are normalized (accent-folded, lower-cased, common aliases merged) and stored in
+the join tables by the write paths. An in-memory inverted index answers recommendations
+without touching those tables. Existing profiles and ads are imported with:
+
+    python3 back/matching.py backfill
+"""
+import argparse
+import heapq
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+from db import db_cursor
+from search import fold
+
+REFRESH_SECONDS = float(os.getenv("MATCHING_REFRESH_SECONDS", "300"))
+MAX_SKILL_LENGTH = 100
+MAX_NGRAM = 3
+
+ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "nodejs",
+    "node.js": "nodejs",
+    "vue.js": "vue",
+    "vuejs": "vue",
+    "react.js": "react",
+    "reactjs": "react",
+    "postgres": "postgresql",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "ci/cd": "ci cd",
+}
+
+_SPLIT_RE = re.compile(r"[,;|\n•]+|\s+(?:and|et)\s+")
+_WORD_RE = re.compile(r"[\w+#.]+")
+
+
+def normalize_skill(raw):
+    name = " ".join(fold(str(raw)).strip(" .-_*").split())
+    name = ALIASES.get(name, name)
+    return name[:MAX_SKILL_LENGTH] or None
+
+
+def parse_skills(value):
+    """Skill names from a list or a free-text field such as 'Python, FastAPI et SQL'."""
+    if value is None:
+        return []
+    parts = value if isinstance(value, (list, tuple)) else _SPLIT_RE.split(fold(str(value)))
+    names = []
+    for part in parts:
+        name = normalize_skill(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def extract_skills(text, vocabulary):
+    """Known skill names mentioned in free text, matching phrases of up to MAX_NGRAM words."""
+    words = [word.strip(".") for word in _WORD_RE.findall(fold(text or ""))]
+    words = [word for word in words if word]
+    found = []
+    for size in range(1, MAX_NGRAM + 1):
+        for start in range(len(words) - size + 1):
+            name = ALIASES.get(" ".join(words[start:start + size]), " ".join(words[start:start + size]))
+            if name in vocabulary and name not in found:
+                found.append(name)
+    return found
+
+
+# --------------------------- storage ---------------------------
+
+def _ensure_skills(cursor, names):
+    if not names:
+        return {}
+    cursor.executemany("INSERT IGNORE INTO skills (name) VALUES (%s)", [(name,) for name in names])
+    placeholders = ", ".join(["%s"] * len(names))
+    cursor.execute(f"SELECT skill_id, name FROM skills WHERE name IN ({placeholders})", names)
+    return {row["skill_id"]: normalize_skill(row["name"]) for row in cursor.fetchall()}
+
+
+def _replace_skills(cursor, table, owner_column, owner_id, names):
+    skills = _ensure_skills(cursor, names)
+    cursor.execute(f"DELETE FROM {table} WHERE {owner_column} = %s", (owner_id,))
+    if skills:
+        cursor.executemany(
+            f"INSERT INTO {table} ({owner_column}, skill_id) VALUES (%s, %s)",
+            [(owner_id, skill_id) for skill_id in skills],
+        )
+    return skills
+
+
+def _current_skills(cursor, table, owner_column, owner_id):
+    cursor.execute(f"""
+        SELECT s.skill_id, s.name FROM {table} t JOIN skills s ON s.skill_id = t.skill_id
+        WHERE t.{owner_column} = %s
+    """, (owner_id,))
+    return {row["skill_id"]: row["name"] for row in cursor.fetchall()}
+
+
+def vocabulary(cursor):
+    cursor.execute("SELECT name FROM skills")
+    return {normalize_skill(row["name"]) for row in cursor.fetchall()}
+
+
+def sync_candidate(cursor, person_id, skills):
+    """Store the parsed skills of a profile; apply the result with index.set_candidate() once committed."""
+    return person_id, _replace_skills(cursor, "people_skills", "person_id", person_id, parse_skills(skills))
+
+
+def sync_ad(cursor, ad_id, skills=None, extract=True):
+    """Refresh ad_skills from an explicit list, or from the ad text when `extract` is set.
+
+    Returns the arguments for index.set_ad(), to apply once the transaction is committed.
+    """
+    cursor.execute("SELECT title, description, date_expiry FROM advertisements WHERE ad_id = %s", (ad_id,))
+    ad = cursor.fetchone()
+    if skills is not None:
+        names = parse_skills(skills)
+    elif extract:
+        names = extract_skills(f"{ad['title']} {ad['description']}", vocabulary(cursor))
+    else:
+        return ad_id, _current_skills(cursor, "ad_skills", "ad_id", ad_id), ad["date_expiry"]
+    return ad_id, _replace_skills(cursor, "ad_skills", "ad_id", ad_id, names), ad["date_expiry"]
+
+
+def sync_new_ads(cursor, ads, known_skills):
+    """Store the skills of freshly inserted ads with a few set-based statements.
+
+    `ads` holds (ad_id, text, skills, date_expiry) tuples; skills are parsed from `skills`
+    when given, otherwise extracted from `text` using the `known_skills` vocabulary, which
+    is extended with the names stored here.
+    Returns the index.set_ad() arguments of every ad, to apply once committed.
+    """
+    names_by_ad = {
+        ad_id: parse_skills(skills) if skills is not None else extract_skills(text, known_skills)
+        for ad_id, text, skills, _ in ads
+    }
+    names = sorted({name for ad_names in names_by_ad.values() for name in ad_names})
+    skill_ids = {name: skill_id for skill_id, name in _ensure_skills(cursor, names).items()}
+    rows = [
+        (ad_id, skill_ids[name])
+        for ad_id, ad_names in names_by_ad.items() for name in ad_names if name in skill_ids
+    ]
+    if rows:
+        cursor.executemany("INSERT IGNORE INTO ad_skills (ad_id, skill_id) VALUES (%s, %s)", rows)
+    known_skills.update(names)
+    return [
+        (ad_id, {skill_ids[name]: name for name in names_by_ad[ad_id] if name in skill_ids}, date_expiry)
+        for ad_id, _, _, date_expiry in ads
+    ]
+
+
+def _forget(cursor, table, owner_column, owner_ids):
+    if owner_ids:
+        placeholders = ", ".join(["%s"] * len(owner_ids))
+        cursor.execute(f"DELETE FROM {table} WHERE {owner_column} IN ({placeholders})", owner_ids)
+
+
+def forget_ad(cursor, *ad_ids):
+    _forget(cursor, "ad_skills", "ad_id", ad_ids)
+
+
+def forget_candidate(cursor, *person_ids):
+    _forget(cursor, "people_skills", "person_id", person_ids)
+
+
+# --------------------------- index ---------------------------
+
+def _accumulate(postings):
+    """Sum, for every id, the weights of the (weight, ids) posting lists it appears in."""
+    totals = defaultdict(float)
+    for weight, ids in postings:
+        for key in ids:
+            totals[key] += weight
+    return totals
+
+
+class MatchIndex:
+    """Sparse skill sets of ads and candidates with an inverted index on each side.
+
+    A pair is scored by the IDF-weighted share of the ad's skills that the candidate has,
+    so rare skills weigh more than ubiquitous ones and scores stay within [0, 1].
+    """
+
+    def __init__(self, refresh_seconds=REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        # Updates applied while a reload is reading the database, replayed on top of it.
+        self._journal = None
+        self._reset()
+
+    def _reset(self):
+        self.skill_names = {}
+        self.ads = {}
+        self.candidates = {}
+        self.ads_by_skill = defaultdict(set)
+        self.candidates_by_skill = defaultdict(set)
+
+    def _fresh(self):
+        with self._lock:
+            return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    def ensure_loaded(self, cursor):
+        """(Re)build from the database when stale; only the very first build makes callers wait."""
+        if self._fresh():
+            return
+        if not self._load_lock.acquire(blocking=self._loaded_at is None):
+            return
+        try:
+            if self._fresh():
+                return
+            with self._lock:
+                self._journal = []
+            self._load(cursor)
+        finally:
+            with self._lock:
+                self._journal = None
+            self._load_lock.release()
+
+    def _load(self, cursor):
+        cursor.execute("SELECT skill_id, name FROM skills")
+        names = {row["skill_id"]: normalize_skill(row["name"]) for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT a.ad_id, a.date_expiry, s.skill_id
+            FROM advertisements a JOIN ad_skills s ON s.ad_id = a.ad_id
+        """)
+        ads = defaultdict(dict)
+        expiry = {}
+        for row in cursor.fetchall():
+            ads[row["ad_id"]][row["skill_id"]] = names.get(row["skill_id"])
+            expiry[row["ad_id"]] = row["date_expiry"]
+        cursor.execute("SELECT person_id, skill_id FROM people_skills")
+        candidates = defaultdict(dict)
+        for row in cursor.fetchall():
+            candidates[row["person_id"]][row["skill_id"]] = names.get(row["skill_id"])
+        with self._lock:
+            journal = self._journal or []
+            self._reset()
+            for ad_id, skills in ads.items():
+                self._set_ad(ad_id, skills, expiry[ad_id])
+            for person_id, skills in candidates.items():
+                self._set_candidate(person_id, skills)
+            for method, args in journal:
+                method(*args)
+            self._loaded_at = time.monotonic()
+
+    def _record(self, method, args):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((method, args))
+            method(*args)
+
+    def _set_ad(self, ad_id, skills, date_expiry):
+        self._remove_ad(ad_id)
+        if skills:
+            self.skill_names.update(skills)
+            self.ads[ad_id] = (frozenset(skills), date_expiry)
+            for skill_id in skills:
+                self.ads_by_skill[skill_id].add(ad_id)
+
+    def _remove_ad(self, ad_id):
+        skills, _ = self.ads.pop(ad_id, (frozenset(), None))
+        for skill_id in skills:
+            self.ads_by_skill[skill_id].discard(ad_id)
+
+    def _set_candidate(self, person_id, skills):
+        self._remove_candidate(person_id)
+        if skills:
+            self.skill_names.update(skills)
+            self.candidates[person_id] = frozenset(skills)
+            for skill_id in skills:
+                self.candidates_by_skill[skill_id].add(person_id)
+
+    def _remove_candidate(self, person_id):
+        for skill_id in self.candidates.pop(person_id, frozenset()):
+            self.candidates_by_skill[skill_id].discard(person_id)
+
+    def set_ad(self, ad_id, skills, date_expiry=None):
+        self._record(self._set_ad, (ad_id, skills, date_expiry))
+
+    def remove_ad(self, ad_id):
+        self._record(self._remove_ad, (ad_id,))
+
+    def set_candidate(self, person_id, skills):
+        self._record(self._set_candidate, (person_id, skills))
+
+    def remove_candidate(self, person_id):
+        self._record(self._remove_candidate, (person_id,))
+
+    def _weights(self, skill_ids):
+        """IDF weight of each skill, computed once per query; call with the lock held."""
+        total = len(self.ads) + len(self.candidates)
+        return {
+            skill_id: math.log((1 + total) / (1 + len(self.ads_by_skill.get(skill_id, ()))
+                                              + len(self.candidates_by_skill.get(skill_id, ())))) + 1
+            for skill_id in skill_ids
+        }
+
+    def _matched(self, shared):
+        return sorted(self.skill_names.get(skill_id) or "" for skill_id in shared)
+
+    # Queries copy the posting lists they need under the lock and score without it, so
+    # writers are not held up. Entries of self.ads / self.candidates are immutable and
+    # replaced whole, so reading them afterwards sees either the old or the new skills.
+
+    def recommend_ads(self, person_id, limit, today=None):
+        today = today or date.today()
+        with self._lock:
+            skills = self.candidates.get(person_id, frozenset())
+            weights = self._weights(self.skill_names)
+            postings = [(weights[skill_id], tuple(self.ads_by_skill.get(skill_id, ()))) for skill_id in skills]
+        scored = []
+        for ad_id, shared_weight in _accumulate(postings).items():
+            entry = self.ads.get(ad_id)
+            if entry is None:
+                continue
+            ad_skills, date_expiry = entry
+            if date_expiry is not None and date_expiry < today:
+                continue
+            ad_weight = sum(weights.get(skill_id, 1.0) for skill_id in ad_skills)
+            scored.append((shared_weight / ad_weight, ad_id))
+        return [
+            (score, ad_id, self._matched(skills & self.ads.get(ad_id, (frozenset(), None))[0]))
+            for score, ad_id in heapq.nlargest(limit, scored)
+        ]
+
+    def recommend_candidates(self, ad_id, limit):
+        with self._lock:
+            ad_skills, _ = self.ads.get(ad_id, (frozenset(), None))
+            weights = self._weights(ad_skills)
+            postings = [(weights[skill_id], tuple(self.candidates_by_skill.get(skill_id, ()))) for skill_id in ad_skills]
+        # The same for every candidate, so scores are compared before dividing by it.
+        ad_weight = sum(weights.values())
+        top = heapq.nlargest(limit, ((weight, person_id) for person_id, weight in _accumulate(postings).items()))
+        return [
+            (shared_weight / ad_weight, person_id, self._matched(self.candidates.get(person_id, frozenset()) & ad_skills))
+            for shared_weight, person_id in top
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "skills": len(self.skill_names),
+                "ads": len(self.ads),
+                "candidates": len(self.candidates),
+                "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None,
+            }
+
+
+index = MatchIndex()
+
+
+def backfill():
+    """Parse every candidate profile into people_skills, then extract skills for ads that have none."""
+    with db_cursor() as (conn, cursor):
+        cursor.execute("SELECT person_id, skills FROM candidate_profiles")
+        profiles = cursor.fetchall()
+        for profile in profiles:
+            sync_candidate(cursor, profile["person_id"], profile["skills"])
+        conn.commit()
+        cursor.execute("""
+            SELECT ad_id FROM advertisements a
+            WHERE NOT EXISTS (SELECT 1 FROM ad_skills s WHERE s.ad_id = a.ad_id)
+        """)
+        ad_ids = [row["ad_id"] for row in cursor.fetchall()]
+        for ad_id in ad_ids:
+            sync_ad(cursor, ad_id)
+        conn.commit()
+    return len(profiles), len(ad_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the skills used for candidate / job matching.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.parse_args(argv)
+    profiles, ads = backfill()
+    print(f"{profiles} candidate profile(s) and {ads} advertisement(s) processed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
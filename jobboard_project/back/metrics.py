@@ -0,0 +1,245 @@
+"""Request latency and size, per-request database usage and slow queries, in Prometheus text format.
+
+MetricsMiddleware times every request under its route template and opens a RequestStats
+that the database cursor (db.Cursor) adds each statement to, including statements run
+through run_db() on the executor threads. Statements slower than SLOW_QUERY_MS are logged
+with the types of their parameters, never their values.
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SERVER_TIMING = os.getenv("SERVER_TIMING") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "[unmatched]"
+MAX_LOGGED_SQL = 300
+
+_request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "rows", "db_seconds", "_lock")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, rows, seconds):
+        with self._lock:
+            self.queries += 1
+            self.rows += rows
+            self.db_seconds += seconds
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f"{name}_bucket{_labels(labels, le=bound)} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {self.sum:.6f}"
+        yield f"{name}_count{_labels(labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.request_queries = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.request_rows = defaultdict(int)
+        self.request_db_seconds = defaultdict(float)
+        self.response_bytes = defaultdict(int)
+        self.query_duration = Histogram(QUERY_BUCKETS)
+        self.slow_queries = 0
+
+    def record_request(self, method, route, status, seconds, stats, body_bytes):
+        with self._lock:
+            self.requests[(method, route, str(status))] += 1
+            self.latency[(method, route)].observe(seconds)
+            self.request_queries[(method, route)].observe(stats.queries)
+            self.request_rows[(method, route)] += stats.rows
+            self.request_db_seconds[(method, route)] += stats.db_seconds
+            self.response_bytes[(method, route)] += body_bytes
+
+    def record_query(self, seconds, slow):
+        with self._lock:
+            self.query_duration.observe(seconds)
+            if slow:
+                self.slow_queries += 1
+
+    def render(self, gauges=None):
+        with self._lock:
+            lines = [
+                "# HELP http_requests_total Requests by method, route template and status.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{_labels({'method': method, 'route': route, 'status': status})} {count}")
+            lines += [
+                "# HELP http_request_duration_seconds Time from receiving a request to the end of its response.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self.latency.items()):
+                lines.extend(histogram.lines("http_request_duration_seconds", {"method": method, "route": route}))
+            lines += [
+                "# HELP http_request_db_queries SQL statements run per request.",
+                "# TYPE http_request_db_queries histogram",
+            ]
+            for (method, route), histogram in sorted(self.request_queries.items()):
+                lines.extend(histogram.lines("http_request_db_queries", {"method": method, "route": route}))
+            lines += [
+                "# HELP http_request_db_rows_total Rows returned or changed by the SQL statements of requests.",
+                "# TYPE http_request_db_rows_total counter",
+            ]
+            for (method, route), rows in sorted(self.request_rows.items()):
+                lines.append(f"http_request_db_rows_total{_labels({'method': method, 'route': route})} {rows}")
+            lines += [
+                "# HELP http_request_db_seconds_total Time spent in SQL statements by requests.",
+                "# TYPE http_request_db_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self.request_db_seconds.items()):
+                lines.append(f"http_request_db_seconds_total{_labels({'method': method, 'route': route})} {seconds:.6f}")
+            lines += [
+                "# HELP http_response_body_bytes_total Response body bytes sent, after compression.",
+                "# TYPE http_response_body_bytes_total counter",
+            ]
+            for (method, route), size in sorted(self.response_bytes.items()):
+                lines.append(f"http_response_body_bytes_total{_labels({'method': method, 'route': route})} {size}")
+            lines += [
+                "# HELP db_query_duration_seconds Duration of every SQL statement, including background jobs.",
+                "# TYPE db_query_duration_seconds histogram",
+            ]
+            lines.extend(self.query_duration.lines("db_query_duration_seconds", {}))
+            lines += [
+                f"# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms).",
+                "# TYPE db_slow_queries_total counter",
+                f"db_slow_queries_total {self.slow_queries}",
+                "# HELP process_cpu_seconds_total User and system CPU time of the API process.",
+                "# TYPE process_cpu_seconds_total counter",
+                f"process_cpu_seconds_total {time.process_time():.6f}",
+            ]
+        for name, value in (gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+registry = Registry()
+
+
+def param_shape(args):
+    """Describe query parameters by type, e.g. "(int, str, [12 x int])", without their values."""
+    if args is None:
+        return "none"
+    if isinstance(args, dict):
+        return "{" + ", ".join(f"{key}: {param_shape(value)}" for key, value in args.items()) + "}"
+    if isinstance(args, (list, tuple)):
+        types = [param_shape(value) for value in args]
+        if len(types) > 5 and len(set(types)) == 1:
+            return f"[{len(types)} x {types[0]}]"
+        inner = ", ".join(types)
+        return f"({inner})" if isinstance(args, tuple) else f"[{inner}]"
+    return type(args).__name__
+
+
+def record_query(sql, args, seconds, rows):
+    slow = seconds * 1000 >= SLOW_QUERY_MS
+    registry.record_query(seconds, slow)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.add(rows, seconds)
+    if slow:
+        text = re.sub(r"\s+", " ", sql if isinstance(sql, str) else sql.decode(errors="replace")).strip()
+        if len(text) > MAX_LOGGED_SQL:
+            text = text[:MAX_LOGGED_SQL] + "..."
+        print(f"[Slow query] {seconds * 1000:.1f} ms, {rows} row(s), params {param_shape(args)}: {text}")
+
+
+def _route(scope, root_path):
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (e.g. /front static files) extend root_path instead of setting a route.
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path):] + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        body_bytes = 0
+
+        async def send_with_timing(message):
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    elapsed = (time.perf_counter() - started) * 1000
+                    value = (f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries, {stats.rows} rows", '
+                             f"app;dur={elapsed:.1f}")
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", value.encode()),
+                        (b"timing-allow-origin", b"*"),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            registry.record_request(
+                scope["method"], _route(scope, root_path), status, time.perf_counter() - started, stats, body_bytes
+            )
+
+
+def render(gauges=None):
+    return registry.render(gauges)
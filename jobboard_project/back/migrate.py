@@ -0,0 +1,192 @@
+"""Versioned schema migrations.
+
+Migrations live in back/migrations as NNN_name.sql or NNN_name.py and are applied in
+version order, each one recorded in the schema_migrations table. A .sql file holds
+statements terminated by ';' at the end of a line; a .py file defines upgrade(conn, cursor).
+
+    python3 back/migrate.py status
+    python3 back/migrate.py up
+    python3 back/migrate.py baseline 004   # record 001-004 as applied without running them
+"""
+import argparse
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+
+import pymysql
+
+from db import db_cursor
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+_FILENAME_RE = re.compile(r"^(\d+)_([\w-]+)\.(sql|py)$")
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version int NOT NULL,
+        name varchar(255) NOT NULL,
+        checksum char(64) NOT NULL,
+        applied_at timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (version)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci
+"""
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    @property
+    def checksum(self):
+        with open(self.path, "rb") as handle:
+            return hashlib.sha256(handle.read()).hexdigest()
+
+    def apply(self, conn, cursor):
+        if self.path.endswith(".py"):
+            spec = importlib.util.spec_from_file_location(f"migration_{self.version:03d}", self.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            module.upgrade(conn, cursor)
+        else:
+            for statement in split_statements(open(self.path, encoding="utf-8").read()):
+                cursor.execute(statement)
+        conn.commit()
+
+
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    statements = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def discover(directory=MIGRATIONS_DIR):
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise SchemaVersionError(f"Duplicate migration version {version:03d}: {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def latest_version(migrations=None):
+    migrations = discover() if migrations is None else migrations
+    return migrations[-1].version if migrations else 0
+
+
+def applied_versions(cursor):
+    cursor.execute(CREATE_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in cursor.fetchall()}
+
+
+def record(cursor, migration):
+    cursor.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum),
+    )
+
+
+def upgrade(target=None):
+    migrations = discover()
+    applied = []
+    with db_cursor() as (conn, cursor):
+        done = applied_versions(cursor)
+        conn.commit()
+        for migration in migrations:
+            if migration.version in done or (target is not None and migration.version > target):
+                continue
+            print(f"Applying {migration.version:03d}_{migration.name}")
+            # MySQL commits DDL implicitly, so a failed migration may be partially applied
+            # and has to be fixed by hand before running `up` again.
+            migration.apply(conn, cursor)
+            record(cursor, migration)
+            conn.commit()
+            applied.append(migration)
+    return applied
+
+
+def baseline(version):
+    migrations = discover()
+    with db_cursor() as (conn, cursor):
+        done = applied_versions(cursor)
+        for migration in migrations:
+            if migration.version <= version and migration.version not in done:
+                record(cursor, migration)
+                print(f"Marked {migration.version:03d}_{migration.name} as applied")
+        conn.commit()
+
+
+def current_version(cursor):
+    try:
+        cursor.execute("SELECT MAX(version) AS version FROM schema_migrations")
+    except pymysql.err.ProgrammingError:
+        return None
+    return cursor.fetchone()["version"] or 0
+
+
+def check_schema_version():
+    """Raise SchemaVersionError unless the database is at the latest migration on disk."""
+    expected = latest_version()
+    with db_cursor() as (conn, cursor):
+        current = current_version(cursor)
+    if current is None:
+        raise SchemaVersionError("schema_migrations table not found, run `python3 back/migrate.py up`")
+    if current != expected:
+        raise SchemaVersionError(
+            f"database schema is at version {current:03d}, code expects {expected:03d}; "
+            "run `python3 back/migrate.py up`"
+        )
+    return current
+
+
+def status():
+    migrations = discover()
+    with db_cursor() as (conn, cursor):
+        done = applied_versions(cursor)
+        conn.commit()
+        cursor.execute("SELECT version, checksum, applied_at FROM schema_migrations")
+        recorded = {row["version"]: row for row in cursor.fetchall()}
+    for migration in migrations:
+        row = recorded.get(migration.version)
+        if migration.version not in done:
+            state = "pending"
+        elif row["checksum"] != migration.checksum:
+            state = f"applied {row['applied_at']} (file changed since)"
+        else:
+            state = f"applied {row['applied_at']}"
+        print(f"{migration.version:03d}_{migration.name:<45} {state}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply versioned database migrations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list migrations and whether they are applied")
+    up = commands.add_parser("up", help="apply pending migrations")
+    up.add_argument("--to", type=int, help="stop after this version")
+    mark = commands.add_parser("baseline", help="record migrations up to VERSION as applied without running them")
+    mark.add_argument("version", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        status()
+    elif args.command == "up":
+        applied = upgrade(args.to)
+        print(f"{len(applied)} migration(s) applied" if applied else "Database is up to date")
+    elif args.command == "baseline":
+        baseline(args.version)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
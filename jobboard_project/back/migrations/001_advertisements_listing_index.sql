@@ -0,0 +1,6 @@
+-- Keyset pagination of GET /advertisements walks (date_posted, ad_id) in descending order.
+UPDATE advertisements SET date_posted = CURRENT_TIMESTAMP WHERE date_posted IS NULL;
+
+ALTER TABLE advertisements
+    MODIFY date_posted timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD KEY idx_ads_date_posted (date_posted, ad_id);
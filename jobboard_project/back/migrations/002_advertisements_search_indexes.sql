@@ -0,0 +1,8 @@
+-- Filters of GET /advertisements/search; each index ends with the (date_posted, ad_id)
+-- sort key so equality filters can walk the newest-first order without a filesort.
+ALTER TABLE advertisements
+    ADD KEY idx_ads_contract_posted (contract_type, date_posted, ad_id),
+    ADD KEY idx_ads_company_posted (company_id, date_posted, ad_id),
+    ADD KEY idx_ads_location_posted (location, date_posted, ad_id),
+    ADD KEY idx_ads_salary (salary_min, salary_max),
+    ADD KEY idx_ads_expiry (date_expiry);
@@ -0,0 +1,5 @@
+-- Keyword search of GET /advertisements/search?q=. InnoDB builds one FULLTEXT index per statement.
+-- The utf8mb4_0900_ai_ci collation makes matching case- and accent-insensitive.
+ALTER TABLE advertisements ADD FULLTEXT KEY ft_ads_title (title);
+
+ALTER TABLE advertisements ADD FULLTEXT KEY ft_ads_title_description (title, description);
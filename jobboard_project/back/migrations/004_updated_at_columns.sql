@@ -0,0 +1,9 @@
+-- Modification timestamps used to build ETag / Last-Modified validators on listing endpoints.
+ALTER TABLE advertisements
+    ADD COLUMN updated_at timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_ads_updated_at (updated_at),
+    ADD KEY idx_ads_company_updated (company_id, updated_at);
+
+ALTER TABLE applications
+    ADD COLUMN updated_at timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD KEY idx_app_applicant_updated (applicant_id, updated_at);
@@ -0,0 +1,12 @@
+# Databases created before the current schema dump lack the Admin role and applications.message.
+# These checks used to run on every request; they now run once here.
+
+
+def upgrade(conn, cursor):
+    cursor.execute("SHOW COLUMNS FROM people LIKE 'role'")
+    column = cursor.fetchone()
+    if column and "admin" not in column.get("Type", "").lower():
+        cursor.execute("ALTER TABLE people MODIFY role ENUM('Recruiter','Applicant','Admin')")
+    cursor.execute("SHOW COLUMNS FROM applications LIKE 'message'")
+    if not cursor.fetchone():
+        cursor.execute("ALTER TABLE applications ADD COLUMN message TEXT")
@@ -0,0 +1,20 @@
+-- Counters behind GET /admin/overview, maintained by the API in the same transaction as each write.
+CREATE TABLE stats_counters (
+    counter varchar(64) NOT NULL,
+    scope_id int NOT NULL DEFAULT 0,
+    value bigint NOT NULL DEFAULT 0,
+    PRIMARY KEY (counter, scope_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT INTO stats_counters (counter, scope_id, value)
+SELECT 'people', 0, COUNT(*) FROM people
+UNION ALL SELECT 'companies', 0, COUNT(*) FROM companies
+UNION ALL SELECT 'advertisements', 0, COUNT(*) FROM advertisements
+UNION ALL SELECT 'applications', 0, COUNT(*) FROM applications;
+
+INSERT INTO stats_counters (counter, scope_id, value)
+SELECT CONCAT('applications.', status), 0, COUNT(*) FROM applications
+WHERE status IS NOT NULL GROUP BY status;
+
+INSERT INTO stats_counters (counter, scope_id, value)
+SELECT 'company.advertisements', company_id, COUNT(*) FROM advertisements GROUP BY company_id;
@@ -0,0 +1,2 @@
+-- Session tokens issued before this instant are rejected (logout, password change, admin revocation).
+ALTER TABLE people ADD COLUMN tokens_valid_after timestamp(6) NULL DEFAULT NULL;
@@ -0,0 +1,12 @@
+-- Keyset pagination of GET /admin/applications walks (application_date, application_id) in
+-- descending order, over all applications or narrowed to one status or one ad.
+UPDATE applications SET application_date = CURRENT_TIMESTAMP WHERE application_date IS NULL;
+
+ALTER TABLE applications
+    MODIFY application_date timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ADD KEY idx_app_date (application_date, application_id),
+    ADD KEY idx_app_status_date (status, application_date, application_id),
+    ADD KEY idx_app_ad_date (ad_id, application_date, application_id);
+
+-- idx_app_ad_date starts with ad_id and now backs the fk_app_ad foreign key.
+ALTER TABLE applications DROP KEY ad_id;
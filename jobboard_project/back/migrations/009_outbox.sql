@@ -0,0 +1,15 @@
+-- Background jobs (back/jobs.py), written in the same transaction as the change that triggers them.
+-- run_after is when a pending job is due, or when the lease of a running job expires.
+CREATE TABLE outbox (
+    job_id bigint NOT NULL AUTO_INCREMENT,
+    kind varchar(64) NOT NULL,
+    payload json NOT NULL,
+    status enum('pending','running','done','failed') NOT NULL DEFAULT 'pending',
+    attempts int NOT NULL DEFAULT 0,
+    run_after timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    last_error text,
+    created_at timestamp(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    finished_at timestamp(6) NULL DEFAULT NULL,
+    PRIMARY KEY (job_id),
+    KEY idx_outbox_due (status, run_after)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,23 @@
+# One application per candidate and ad, enforced by the database instead of a SELECT before
+# the insert, plus the Idempotency-Key of the request that created each application.
+# Existing duplicates are removed first: the row last updated (by a recruiter) is kept,
+# the earliest one on ties. The dashboard counters are recounted afterwards.
+import stats
+
+
+def upgrade(conn, cursor):
+    cursor.execute("""
+        DELETE a FROM applications a
+        JOIN applications b ON b.ad_id = a.ad_id AND b.applicant_id = a.applicant_id
+            AND (b.updated_at > a.updated_at
+                 OR (b.updated_at = a.updated_at AND b.application_id < a.application_id))
+    """)
+    if cursor.rowcount:
+        print(f"[Migration 010] removed {cursor.rowcount} duplicate application(s)")
+    cursor.execute("""
+        ALTER TABLE applications
+            ADD COLUMN idempotency_key varchar(64) NULL DEFAULT NULL,
+            ADD UNIQUE KEY uq_app_ad_applicant (ad_id, applicant_id)
+    """)
+    for statement in stats.REFRESH_STATEMENTS:
+        cursor.execute(statement)
@@ -0,0 +1,228 @@
+"""Notification e-mails, sent by background jobs (see jobs.py).
+
+Messages go to the SMTP server in SMTP_HOST; without one they are only logged. For
+local testing, a stand-in SMTP server saves every message it receives as a .eml file:
+
+    python3 back/notifications.py sink          # listens on 127.0.0.1:1025
+    SMTP_HOST=127.0.0.1 SMTP_PORT=1025 python3 back/main.py
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import time
+from email.message import EmailMessage
+
+from dotenv import load_dotenv
+
+import jobs
+from db import db_cursor
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "25"))
+SMTP_USER = os.getenv("SMTP_USER")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS") == "1"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+MAIL_FROM = os.getenv("MAIL_FROM", "Jobboard <no-reply@jobboard.local>")
+MAIL_SINK_DIR = os.getenv("MAIL_SINK_DIR", "mail_sink")
+
+
+def send_email(to, subject, body):
+    if not to:
+        return
+    message = EmailMessage()
+    message["From"] = MAIL_FROM
+    message["To"] = to
+    message["Subject"] = subject
+    message.set_content(body)
+    if not SMTP_HOST:
+        print(f"[Mail] SMTP_HOST not set, not sending to {to}: {subject}")
+        return
+    with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT) as smtp:
+        if SMTP_STARTTLS:
+            smtp.starttls()
+        if SMTP_USER:
+            smtp.login(SMTP_USER, SMTP_PASSWORD or "")
+        smtp.send_message(message)
+
+
+def _fetch(sql, params):
+    with db_cursor() as (conn, cursor):
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _application(application_id):
+    rows = _fetch("""
+        SELECT a.application_id, a.status, ad.ad_id, ad.title, c.company_id, c.name AS company_name,
+               c.email AS company_email, p.first_name, p.last_name, p.email
+        FROM applications a
+        JOIN advertisements ad ON ad.ad_id = a.ad_id
+        JOIN companies c ON c.company_id = ad.company_id
+        JOIN people p ON p.person_id = a.applicant_id
+        WHERE a.application_id = %s
+    """, (application_id,))
+    return rows[0] if rows else None
+
+
+@jobs.handler("account.created")
+def account_created(person_id):
+    rows = _fetch("SELECT first_name, email FROM people WHERE person_id = %s", (person_id,))
+    if not rows:
+        return
+    person = rows[0]
+    send_email(
+        person["email"],
+        "Welcome to Jobboard",
+        f"Hello {person['first_name']},\n\nYour account is ready. You can now apply to job offers.\n",
+    )
+
+
+@jobs.handler("company.created")
+def company_created(company_id, recruiter_id):
+    rows = _fetch("""
+        SELECT p.first_name, p.email, c.name
+        FROM people p JOIN companies c ON c.company_id = p.company_id
+        WHERE p.person_id = %s AND c.company_id = %s
+    """, (recruiter_id, company_id))
+    if not rows:
+        return
+    recruiter = rows[0]
+    send_email(
+        recruiter["email"],
+        f"{recruiter['name']} is now on Jobboard",
+        f"Hello {recruiter['first_name']},\n\nYour company account is ready. You can now post job offers.\n",
+    )
+
+
+@jobs.handler("application.submitted")
+def application_submitted(application_id):
+    application = _application(application_id)
+    if not application:
+        return
+    send_email(
+        application["email"],
+        f"Application sent: {application['title']}",
+        f"Hello {application['first_name']},\n\n"
+        f"Your application to \"{application['title']}\" at {application['company_name']} has been sent.\n",
+    )
+    recruiters = _fetch(
+        "SELECT email FROM people WHERE company_id = %s AND role = 'Recruiter' AND email IS NOT NULL",
+        (application["company_id"],),
+    )
+    recipients = {row["email"] for row in recruiters} or {application["company_email"]}
+    for email in sorted(filter(None, recipients)):
+        send_email(
+            email,
+            f"New application: {application['title']}",
+            f"{application['first_name']} {application['last_name']} applied to \"{application['title']}\".\n",
+        )
+
+
+@jobs.handler("application.status_changed")
+def application_status_changed(application_id, status):
+    application = _application(application_id)
+    # Skip notices that a later change has already superseded.
+    if not application or application["status"] != status:
+        return
+    send_email(
+        application["email"],
+        f"Your application to {application['title']}: {status}",
+        f"Hello {application['first_name']},\n\n"
+        f"The status of your application to \"{application['title']}\" at {application['company_name']} "
+        f"is now: {status}.\n",
+    )
+
+
+# --------------------------- local SMTP stand-in ---------------------------
+
+class MailSink:
+    """Just enough SMTP to accept messages from smtplib and store them as .eml files."""
+
+    def __init__(self, directory=MAIL_SINK_DIR):
+        self.directory = directory
+        self.received = 0
+
+    def _store(self, data):
+        os.makedirs(self.directory, exist_ok=True)
+        self.received += 1
+        path = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.received:04d}.eml")
+        with open(path, "wb") as handle:
+            handle.write(data)
+        return path
+
+    async def handle(self, reader, writer):
+        def reply(line):
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 jobboard mail sink")
+        sender, recipients = None, []
+        while True:
+            await writer.drain()
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                reply("250 jobboard")
+            elif verb == "MAIL":
+                sender = command.partition(":")[2].strip()
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.partition(":")[2].strip())
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                lines = []
+                while True:
+                    data = await reader.readline()
+                    if not data or data.rstrip(b"\r\n") == b".":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                path = self._store(b"".join(lines))
+                print(f"[Sink] {sender} -> {', '.join(recipients)}: {path}")
+                sender, recipients = None, []
+                reply("250 OK")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                reply("250 OK")
+            elif verb == "NOOP":
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 Command not implemented")
+        writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"[Sink] listening on {host}:{port}, saving messages to {os.path.abspath(self.directory)}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Notification e-mail tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sink = commands.add_parser("sink", help="run a local SMTP server that saves messages as .eml files")
+    sink.add_argument("--host", default="127.0.0.1")
+    sink.add_argument("--port", type=int, default=1025)
+    sink.add_argument("--dir", default=MAIL_SINK_DIR)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(MailSink(args.dir).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
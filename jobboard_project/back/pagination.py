@@ -0,0 +1,61 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _to_json(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _from_json(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(*values):
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Decode an opaque cursor into its `size` key values, or raise a 400."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = [_from_json(value) for value in json.loads(base64.urlsafe_b64decode(padded))]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def keyset_after(columns, values):
+    """WHERE fragment selecting rows strictly after `values` for an ORDER BY columns DESC."""
+    first, second = columns
+    return f"({first} < %s OR ({first} = %s AND {second} < %s))", [values[0], values[0], values[1]]
+
+
+def page(rows, limit, key):
+    """Trim a LIMIT limit+1 result to `limit` rows and build the next cursor from the last one."""
+    has_more = len(rows) > limit
+    items = rows[:limit]
+    next_cursor = encode_cursor(*key(items[-1])) if has_more and items else None
+    return {"items": items, "next_cursor": next_cursor}
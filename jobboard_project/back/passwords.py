@@ -0,0 +1,75 @@
+import asyncio
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+load_dotenv()
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+# min_rounds makes hashes created with a lower cost factor report needs_update().
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL while hashing, so a thread pool gives real parallelism.
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+
+
+def is_bcrypt_hash(value):
+    return isinstance(value, str) and value.startswith(("$2b$", "$2a$", "$2y$"))
+
+
+def _verify(password, stored_password):
+    if is_bcrypt_hash(stored_password):
+        valid = pwd_context.verify(password, stored_password)
+        return valid, valid and pwd_context.needs_update(stored_password)
+    # Legacy accounts created before hashing was introduced store the password as-is.
+    valid = hmac.compare_digest(stored_password.encode(), password.encode())
+    return valid, valid
+
+
+async def _submit(fn, *args):
+    global _pending
+    if _pending >= HASH_WORKERS + HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Authentication service is busy, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password):
+    return await _submit(pwd_context.hash, password)
+
+
+async def verify_password(password, stored_password):
+    """Return (valid, needs_rehash) for a stored bcrypt hash or legacy plaintext password."""
+    if isinstance(stored_password, bytes):
+        stored_password = stored_password.decode()
+    return await _submit(_verify, password, stored_password)
+
+
+def stats():
+    return {
+        "workers": HASH_WORKERS,
+        "max_pending": HASH_MAX_PENDING,
+        "pending": _pending,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
@@ -0,0 +1,77 @@
+import re
+import unicodedata
+
+# Tokens shorter than InnoDB's default innodb_ft_min_token_size are not indexed.
+MIN_TOKEN_LENGTH = 3
+
+STOPWORDS = {
+    # English
+    "and", "are", "for", "from", "the", "with", "you", "your", "our", "this", "that", "job", "jobs",
+    "into", "who", "will", "all", "any", "can", "has", "have", "not", "but", "was", "were", "its",
+    # French (already accent-folded)
+    "les", "des", "une", "pour", "avec", "dans", "sur", "par", "est", "qui", "que", "aux", "del",
+    "vous", "nous", "son", "ses", "leur", "leurs", "plus", "sans", "sous", "entre", "chez", "poste",
+    "offre", "offres", "emploi",
+    # Short words, only looked at by short_terms()
+    "a", "an", "at", "in", "is", "it", "of", "on", "or", "to", "au", "de", "du", "en", "et", "la", "le",
+    "un", "d", "l", "y",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Words as typed, keeping the symbols of names such as 'c#' or 'c++'.
+_WORD_RE = re.compile(r"[\w+#]+", re.UNICODE)
+
+
+def fold(text):
+    """Lower-case and strip accents so 'Ingénieur' and 'ingenieur' produce the same token."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _stem(token):
+    # Plural forms in both languages: 'developers' / 'développeurs' / 'travaux'.
+    if len(token) > 4 and token[-1] in "sx":
+        return token[:-1]
+    return token
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN_RE.findall(fold(text or "")):
+        token = token.strip("_")
+        if len(token) < MIN_TOKEN_LENGTH or token in STOPWORDS:
+            continue
+        stem = _stem(token)
+        if stem not in tokens:
+            tokens.append(stem)
+    return tokens
+
+
+def boolean_query(text):
+    """Build a MATCH ... AGAINST (... IN BOOLEAN MODE) expression, or None when nothing is searchable.
+
+    Every term is prefix-matched, which also covers plural and feminine forms of the stem.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return " ".join(f"{token}*" for token in tokens)
+
+
+def short_terms(text):
+    """Terms the FULLTEXT index cannot find: shorter than MIN_TOKEN_LENGTH ('go', 'qa', 'ux')
+    or made with symbols ('c#', 'c++'). Stopwords are left out.
+    """
+    terms = []
+    for word in _WORD_RE.findall(fold(text or "")):
+        word = word.strip("_")
+        if not word or word in STOPWORDS:
+            continue
+        if (len(word) < MIN_TOKEN_LENGTH or not word.replace("_", "").isalnum()) and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def word_pattern(term):
+    """REGEXP matching `term` as a whole word, e.g. 'go' in 'Go developer' but not in 'Google'."""
+    return "(^|[^[:alnum:]_+#])" + re.escape(term) + "([^[:alnum:]_+#]|$)"
@@ -0,0 +1,302 @@
+"""Fingerprinted, precompressed build of front/ and the static file app that serves it.
+
+`build` copies front/ to STATIC_DIST_DIR:
+- every asset is renamed after a hash of its content (style.3f9c1a2b7e.css)
+- CSS url() and HTML src/href references are rewritten to the hashed names
+- text files get .gz (and .br when the brotli package is installed) siblings
+- PNG/JPEG images get resized AVIF/WebP variants and <img> tags become <picture> (images.py)
+- manifest.json maps source paths to hashed ones
+
+HTML pages keep their names and load asset-manifest.<hash>.js, which exposes the same
+mapping to scripts that load assets at runtime (see assetUrl in front/js/spa.js).
+
+    python3 back/static_assets.py build
+
+When the build exists, /front serves it: hashed files are cached for a year as immutable,
+pages are revalidated on every load, a precompressed variant is picked from
+Accept-Encoding, and Range requests get the uncompressed file.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+import stat
+import sys
+import time
+
+from dotenv import load_dotenv
+
+import compression
+import images
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRONT_DIR = os.path.normpath(os.path.join(BASE_DIR, "../front"))
+STATIC_DIST_DIR = os.getenv("STATIC_DIST_DIR", os.path.normpath(os.path.join(BASE_DIR, "../front_dist")))
+# 0 serves front/ as-is even when a build exists, e.g. while editing the pages.
+STATIC_USE_DIST = os.getenv("STATIC_USE_DIST", "1") != "0"
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_SCRIPT = "asset-manifest.js"
+HASH_LENGTH = 10
+COMPRESSIBLE = {".html", ".css", ".js", ".svg", ".json", ".txt", ".xml", ".map"}
+# A variant is only kept when it saves at least this fraction of the original size.
+MIN_SAVING = 0.1
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_HTML_REF_RE = re.compile(r"""(\s(?:src|href)=)(["'])([^"']+)\2""")
+
+
+def _is_source_file(name):
+    # Editor and sync leftovers such as "logo.png~RF1234.TMP".
+    return not (name.startswith(".") or "~" in name or name.upper().endswith(".TMP"))
+
+
+def _source_files(source):
+    for root, dirs, files in os.walk(source):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if _is_source_file(name):
+                yield os.path.relpath(os.path.join(root, name), source).replace(os.sep, "/")
+
+
+def _hashed_name(path, content):
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest}{ext}"
+
+
+def _resolve(ref, from_path):
+    """Source-relative path of a reference found in `from_path`, or None for external ones."""
+    if re.match(r"^[a-z][a-z0-9+.-]*:|^//|^#", ref, re.IGNORECASE):
+        return None
+    ref = ref.split("#", 1)[0].split("?", 1)[0]
+    if not ref:
+        return None
+    if ref.startswith("/"):
+        return ref.lstrip("/")
+    return os.path.normpath(os.path.join(os.path.dirname(from_path), ref)).replace(os.sep, "/")
+
+
+def _relative(target, from_path):
+    return os.path.relpath(target, os.path.dirname(from_path) or ".").replace(os.sep, "/")
+
+
+def _rewrite_css(text, path, assets):
+    def replace(match):
+        target = _resolve(match.group(2), path)
+        if target not in assets:
+            return match.group(0)
+        return f"url({match.group(1)}{_relative(assets[target], path)}{match.group(1)})"
+
+    return _CSS_URL_RE.sub(replace, text)
+
+
+def _rewrite_html(text, path, assets, manifest_script):
+    def replace(match):
+        target = _resolve(match.group(3), path)
+        if target not in assets:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}{_relative(assets[target], path)}{match.group(2)}"
+
+    text = _HTML_REF_RE.sub(replace, text)
+    tag = f'<script defer src="{_relative(manifest_script, path)}"></script>'
+    # Deferred scripts run in document order, so placing it first makes it available to all of them.
+    return re.sub(r"(\s*)(<script\b)", lambda m: f"{m.group(1)}{tag}{m.group(1)}{m.group(2)}", text, count=1)
+
+
+def _compress(path):
+    with open(path, "rb") as handle:
+        content = handle.read()
+    written = []
+    variants = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", lambda data: brotli.compress(data, quality=11)))
+    for suffix, compress in variants:
+        packed = compress(content)
+        if len(packed) <= len(content) * (1 - MIN_SAVING):
+            with open(path + suffix, "wb") as handle:
+                handle.write(packed)
+            written.append(suffix)
+    return written
+
+
+def build(source=FRONT_DIR, dist=STATIC_DIST_DIR):
+    """Write the fingerprinted copy of `source` to `dist` and return the manifest."""
+    files = list(_source_files(source))
+    pages = [path for path in files if path.endswith(".html")]
+    # Plain assets first, then CSS (which may reference them); pages last.
+    ordered = sorted((path for path in files if path not in pages), key=lambda path: path.endswith(".css"))
+    staging = dist + ".tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    def write(path, content):
+        target = os.path.join(staging, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as handle:
+            handle.write(content)
+        return target
+
+    assets = {}
+    responsive = {}
+    for path in ordered:
+        with open(os.path.join(source, path), "rb") as handle:
+            content = handle.read()
+        if path.endswith(".css"):
+            content = _rewrite_css(content.decode("utf-8"), path, assets).encode("utf-8")
+        assets[path] = _hashed_name(path, content)
+        write(assets[path], content)
+        entry = images.build_variants(path, content, write, _hashed_name)
+        if entry:
+            responsive[path] = entry
+
+    script = f"window.ASSET_MANIFEST = {json.dumps(assets, sort_keys=True)};\n".encode("utf-8")
+    manifest_script = _hashed_name(MANIFEST_SCRIPT, script)
+    write(manifest_script, script)
+    page_images = {}
+    for path in pages:
+        with open(os.path.join(source, path), encoding="utf-8") as handle:
+            text = handle.read()
+        text, page_images[path] = images.rewrite_images(text, path, responsive, _resolve, _relative)
+        write(path, _rewrite_html(text, path, assets, manifest_script).encode("utf-8"))
+
+    manifest = {
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "manifest_script": manifest_script,
+        "pages": pages,
+        "assets": assets,
+        "images": responsive,
+    }
+    write(MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    write(images.REPORT_NAME, json.dumps(images.report(manifest, page_images), indent=2).encode("utf-8"))
+    for path in [*assets.values(), manifest_script, *pages, MANIFEST_NAME]:
+        if os.path.splitext(path)[1] in COMPRESSIBLE:
+            _compress(os.path.join(staging, path))
+
+    shutil.rmtree(dist, ignore_errors=True)
+    os.replace(staging, dist)
+    return manifest
+
+
+def load_manifest(dist=STATIC_DIST_DIR):
+    try:
+        with open(os.path.join(dist, MANIFEST_NAME), encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def _static_files_class():
+    # Imported lazily so `build` runs without the web stack installed.
+    from starlette.datastructures import Headers
+    from starlette.responses import FileResponse
+    from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+    class PrecompressedStaticFiles(StaticFiles):
+        """StaticFiles over a build directory: precompressed variants and immutable caching."""
+
+        def __init__(self, *, directory, manifest, **kwargs):
+            super().__init__(directory=directory, **kwargs)
+            self.immutable = set(manifest["assets"].values()) | {manifest["manifest_script"]}
+            for entry in manifest.get("images", {}).values():
+                self.immutable.update(file["path"] for variant in entry["variants"].values() for file in variant["files"])
+
+        def file_response(self, full_path, stat_result, scope, status_code=200):
+            request_headers = Headers(scope=scope)
+            relative = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+            media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+            headers = {"Cache-Control": IMMUTABLE if relative in self.immutable else REVALIDATE}
+            path = full_path
+            if os.path.splitext(full_path)[1] in COMPRESSIBLE:
+                headers["Vary"] = "Accept-Encoding"
+                # Ranges are always served from the uncompressed file.
+                if "range" not in request_headers:
+                    accepted = compression.accepted_encodings(request_headers.get("accept-encoding", ""))
+                    for name, suffix in (("br", ".br"), ("gzip", ".gz")):
+                        if name not in accepted:
+                            continue
+                        try:
+                            variant = os.stat(full_path + suffix)
+                        except OSError:
+                            continue
+                        if stat.S_ISREG(variant.st_mode):
+                            path, stat_result = full_path + suffix, variant
+                            headers["Content-Encoding"] = name
+                            break
+            response = FileResponse(
+                path,
+                status_code=status_code,
+                headers=headers,
+                media_type=media_type,
+                stat_result=stat_result,
+            )
+            # The ETag comes from the file actually sent, so each variant has its own.
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+    return PrecompressedStaticFiles
+
+
+def front_app(source=FRONT_DIR, dist=STATIC_DIST_DIR):
+    """The ASGI app mounted on /front: the build when there is one, front/ otherwise."""
+    manifest = load_manifest(dist) if STATIC_USE_DIST else None
+    if manifest is None:
+        from starlette.staticfiles import StaticFiles
+        print("[Static] serving front/ unbuilt; run `python3 back/static_assets.py build` for hashed, compressed assets")
+        return StaticFiles(directory=source)
+    print(f"[Static] serving the build in {dist} ({len(manifest['assets'])} assets, built {manifest['built_at']})")
+    return _static_files_class()(directory=dist, manifest=manifest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the fingerprinted, precompressed copy of front/.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--source", default=FRONT_DIR)
+    parser.add_argument("--dist", default=STATIC_DIST_DIR)
+    args = parser.parse_args(argv)
+    previous_report = None
+    try:
+        with open(os.path.join(args.dist, images.REPORT_NAME), encoding="utf-8") as handle:
+            previous_report = json.load(handle)
+    except FileNotFoundError:
+        pass
+    started = time.perf_counter()
+    manifest = build(args.source, args.dist)
+    raw = packed = 0
+    for path in manifest["assets"].values():
+        full_path = os.path.join(args.dist, path)
+        size = os.path.getsize(full_path)
+        raw += size
+        packed += min([size] + [os.path.getsize(full_path + s) for s in (".br", ".gz") if os.path.exists(full_path + s)])
+    print(f"{len(manifest['assets'])} assets and {len(manifest['pages'])} pages written to {args.dist} "
+          f"in {time.perf_counter() - started:.2f}s; {raw / 1024:.0f} KiB, {packed / 1024:.0f} KiB compressed")
+    if brotli is None:
+        print("brotli is not installed: only gzip variants were written (pip install brotli)")
+    formats = [fmt for fmt, _, _ in images.available_formats()]
+    if images.Image is None:
+        print("Pillow is not installed: images were copied without responsive variants (pip install pillow)")
+    else:
+        missing = [fmt for fmt, _, _ in images.FORMATS if fmt not in formats]
+        if missing:
+            print(f"This Pillow build cannot write {', '.join(missing)}: those variants were skipped")
+        with open(os.path.join(args.dist, images.REPORT_NAME), encoding="utf-8") as handle:
+            images.print_report(json.load(handle), previous_report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
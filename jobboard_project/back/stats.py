@@ -0,0 +1,191 @@
+"""Row counters for the admin dashboard, kept in the stats_counters table.
+
+Write paths call the helpers below with the cursor of their own transaction, so a
+counter changes exactly when the row it counts is committed. Anything written
+outside the API (imports, manual SQL) is caught up with:
+
+    python3 back/stats.py refresh
+    python3 back/stats.py show
+"""
+import argparse
+import os
+import random
+import sys
+
+from dotenv import load_dotenv
+
+from db import db_cursor
+
+load_dotenv()
+
+# Global counters are spread over scope_id 0..STATS_SLOTS-1 so concurrent writers rarely
+# wait on the same row lock, and read back as the sum of their slots. company.advertisements
+# is kept per company_id.
+GLOBAL = 0
+STATS_SLOTS = max(1, int(os.getenv("STATS_SLOTS", "8")))
+APPLICATION_STATUSES = ("Sent", "In review", "Interview", "Rejected", "Hired")
+GLOBAL_COUNTERS = ["people", "companies", "advertisements", "applications"] + [
+    f"applications.{status}" for status in APPLICATION_STATUSES
+]
+
+REFRESH_STATEMENTS = [
+    "DELETE FROM stats_counters",
+    """
+    INSERT INTO stats_counters (counter, scope_id, value)
+    SELECT 'people', 0, COUNT(*) FROM people
+    UNION ALL SELECT 'companies', 0, COUNT(*) FROM companies
+    UNION ALL SELECT 'advertisements', 0, COUNT(*) FROM advertisements
+    UNION ALL SELECT 'applications', 0, COUNT(*) FROM applications
+    """,
+    """
+    INSERT INTO stats_counters (counter, scope_id, value)
+    SELECT CONCAT('applications.', status), 0, COUNT(*) FROM applications
+    WHERE status IS NOT NULL GROUP BY status
+    """,
+    """
+    INSERT INTO stats_counters (counter, scope_id, value)
+    SELECT 'company.advertisements', company_id, COUNT(*) FROM advertisements GROUP BY company_id
+    """,
+]
+
+
+def bump(cursor, counter, delta=1, scope_id=GLOBAL):
+    bump_many(cursor, [(counter, scope_id, delta)])
+
+
+def bump_many(cursor, rows):
+    """Apply (counter, scope_id, delta) rows in one upsert; scope_id GLOBAL picks a random slot."""
+    # Run after reading cursor.lastrowid: this statement resets it.
+    slot = random.randrange(STATS_SLOTS)
+    rows = sorted((counter, slot if scope_id == GLOBAL else scope_id, delta) for counter, scope_id, delta in rows)
+    cursor.execute(
+        f"""
+        INSERT INTO stats_counters (counter, scope_id, value)
+        VALUES {", ".join(["(%s, %s, %s)"] * len(rows))}
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+        """,
+        [value for row in rows for value in row],
+    )
+
+
+def person_added(cursor, count=1):
+    bump(cursor, "people", count)
+
+
+def person_removed(cursor, count=1):
+    bump(cursor, "people", -count)
+
+
+def company_added(cursor):
+    bump(cursor, "companies")
+
+
+def company_removed(cursor, company_id):
+    bump(cursor, "companies", -1)
+    cursor.execute(
+        "DELETE FROM stats_counters WHERE counter = 'company.advertisements' AND scope_id = %s",
+        (company_id,),
+    )
+
+
+def ad_added(cursor, company_id, count=1):
+    bump_many(cursor, [
+        ("advertisements", GLOBAL, count),
+        ("company.advertisements", company_id, count),
+    ])
+
+
+def ad_removed(cursor, company_id, count=1):
+    ad_added(cursor, company_id, -count)
+
+
+def ad_moved(cursor, old_company_id, new_company_id):
+    if old_company_id != new_company_id:
+        bump_many(cursor, [
+            ("company.advertisements", old_company_id, -1),
+            ("company.advertisements", new_company_id, 1),
+        ])
+
+
+def application_rows(status="Sent", count=1):
+    """bump_many() rows for `count` applications added with `status`, to merge with other bumps."""
+    return [("applications", GLOBAL, count), (f"applications.{status}", GLOBAL, count)]
+
+
+def application_added(cursor, status="Sent", count=1):
+    bump_many(cursor, application_rows(status, count))
+
+
+def application_removed(cursor, status, count=1):
+    application_added(cursor, status, -count)
+
+
+def application_status_changed(cursor, old_status, new_status, count=1):
+    if old_status != new_status:
+        bump_many(cursor, [
+            (f"applications.{old_status}", GLOBAL, -count),
+            (f"applications.{new_status}", GLOBAL, count),
+        ])
+
+
+def overview(cursor):
+    """Global counters and applications per status, summed over their slots by primary-key range."""
+    cursor.execute(
+        f"""
+        SELECT counter, SUM(value) AS value FROM stats_counters
+        WHERE counter IN ({", ".join(["%s"] * len(GLOBAL_COUNTERS))})
+        GROUP BY counter
+        """,
+        GLOBAL_COUNTERS,
+    )
+    values = {row["counter"]: int(row["value"]) for row in cursor.fetchall()}
+    return {
+        "users": values.get("people", 0),
+        "companies": values.get("companies", 0),
+        "advertisements": values.get("advertisements", 0),
+        "applications": values.get("applications", 0),
+        "applications_by_status": {
+            status: values.get(f"applications.{status}", 0) for status in APPLICATION_STATUSES
+        },
+    }
+
+
+def company_ad_counts(cursor):
+    cursor.execute("""
+        SELECT c.company_id, c.name, COALESCE(s.value, 0) AS advertisements
+        FROM companies c
+        LEFT JOIN stats_counters s
+            ON s.counter = 'company.advertisements' AND s.scope_id = c.company_id
+        ORDER BY advertisements DESC, c.company_id
+    """)
+    rows = cursor.fetchall()
+    for row in rows:
+        row["advertisements"] = int(row["advertisements"])
+    return rows
+
+
+def refresh():
+    """Recount everything from the base tables in one transaction."""
+    with db_cursor() as (conn, cursor):
+        for statement in REFRESH_STATEMENTS:
+            cursor.execute(statement)
+        conn.commit()
+        return overview(cursor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the admin dashboard counters.")
+    parser.add_argument("command", choices=["refresh", "show"])
+    args = parser.parse_args(argv)
+    if args.command == "refresh":
+        result = refresh()
+    else:
+        with db_cursor() as (conn, cursor):
+            result = overview(cursor)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from fastapi import HTTPException
+
+CONTRACT_TYPES = {"CDI", "CDD", "Stage", "Freelance", "Alternance"}
+MAX_SALARY = Decimal("99999999.99")
+
+
+def parse_decimal(value, field_name):
+    if value in (None, "", " "):
+        return None
+    try:
+        decimal_value = Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail=f"Invalid value for {field_name}")
+    if decimal_value < 0 or decimal_value > MAX_SALARY:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{field_name.replace('_', ' ').capitalize()} must be between 0 and 99 999 999.99"
+        )
+    return decimal_value
+
+
+def parse_salary_range(salary_min, salary_max):
+    salary_min = parse_decimal(salary_min, "salary_min")
+    salary_max = parse_decimal(salary_max, "salary_max")
+    if salary_min is not None and salary_max is not None and salary_min > salary_max:
+        raise HTTPException(status_code=400, detail="salary_min cannot be greater than salary_max")
+    return salary_min, salary_max
+
+
+def parse_contract_type(value):
+    if value in (None, ""):
+        return None
+    if value not in CONTRACT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid contract type")
+    return value
+
+
+def parse_date(value, field_name):
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(str(value).strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field_name} must be a YYYY-MM-DD date")
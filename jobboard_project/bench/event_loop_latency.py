@@ -0,0 +1,92 @@
+"""Measure how concurrent slow DB-bound requests affect the latency of unrelated requests.
+
+While `N` workers hammer a DB-bound endpoint, a probe repeatedly calls a route that does
+no database work (`/` by default). If async handlers block the event loop, the probe's
+p99 grows with N; with the executor-backed data layer it should stay flat.
+
+    python bench/event_loop_latency.py --slow-path /admin/users --header "Authorization: Bearer $TOKEN"
+
+Run it against a running API (python3 back/main.py). Larger tables make the effect
+easier to see.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def slow_worker(client, path, stop, counter):
+    while not stop.is_set():
+        try:
+            await client.get(path)
+            counter[0] += 1
+        except httpx.HTTPError:
+            counter[1] += 1
+
+
+async def run_level(client, args, concurrency):
+    stop = asyncio.Event()
+    counter = [0, 0]
+    workers = [asyncio.create_task(slow_worker(client, args.slow_path, stop, counter)) for _ in range(concurrency)]
+    await asyncio.sleep(args.warmup)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(args.probes):
+        t0 = time.perf_counter()
+        await client.get(args.probe_path)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*workers)
+    return {
+        "concurrency": concurrency,
+        "probe_p50_ms": round(statistics.median(latencies), 2),
+        "probe_p99_ms": round(percentile(latencies, 99), 2),
+        "probe_max_ms": round(max(latencies), 2),
+        "slow_requests_per_s": round(counter[0] / elapsed, 1),
+        "slow_errors": counter[1],
+    }
+
+
+async def main(args):
+    headers = {}
+    for header in args.header:
+        name, _, value = header.partition(":")
+        headers[name.strip()] = value.strip()
+    limits = httpx.Limits(max_connections=max(args.levels) + 8)
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=60) as client:
+        results = []
+        for level in args.levels:
+            result = await run_level(client, args, level)
+            results.append(result)
+            print(
+                f"concurrency={level:>4}  probe p50={result['probe_p50_ms']:>8.2f} ms  "
+                f"p99={result['probe_p99_ms']:>8.2f} ms  slow req/s={result['slow_requests_per_s']:>8.1f}"
+            )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump({"slow_path": args.slow_path, "probe_path": args.probe_path, "results": results}, handle, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--slow-path", default="/candidates/7")
+    parser.add_argument("--probe-path", default="/")
+    parser.add_argument("--header", action="append", default=[], help="extra header, e.g. 'Authorization: Bearer <token>'")
+    parser.add_argument("--levels", type=lambda raw: [int(x) for x in raw.split(",")], default=[0, 8, 32, 64])
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--json", help="write results to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,398 @@
+"""Scripted load scenarios against a running API, reported per endpoint.
+
+Virtual users loop over weighted scenarios for --duration seconds. Every request is timed
+under its route template. The report, with throughput, error counts and p50/p95/p99 per
+endpoint, is written as JSON tagged with the current commit. When the API's /metrics
+endpoint is reachable (set METRICS_TOKEN if it is protected), the report also has the
+server CPU time and response bytes per request over the measured window. Compare two
+runs with `compare`. Users, ads and companies are picked from the manifest written by
+bench/seed.py.
+
+    python3 bench/load.py run --mix browse=60,apply=10,recruiter=15,admin=5,login=10 --users 32 --duration 60
+    python3 bench/load.py compare bench/results/before.json bench/results/after.json
+
+Scenarios:
+    browse     list ads and follow the next page, open an ad, run a search
+    apply      a candidate applies to a popular or random ad
+    recruiter  recruiter dashboard, then the first page of candidates of one ad
+    admin      admin applications list (next page, status filter) and counters
+    login      POST /login with a random candidate (bcrypt bound)
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from event_loop_latency import percentile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MIX = "browse=60,apply=10,recruiter=15,admin=5,login=10"
+STATUS_FILTERS = ["Sent", "In review", "Interview"]
+
+
+class Recorder:
+    def __init__(self):
+        self.active = False
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.client_errors = defaultdict(int)
+        self.iterations = defaultdict(int)
+
+    def add(self, name, status, elapsed_ms):
+        if not self.active:
+            return
+        self.latencies[name].append(elapsed_ms)
+        if status is None or status >= 500:
+            self.errors[name] += 1
+        elif status >= 400:
+            self.client_errors[name] += 1
+
+    def summary(self, duration):
+        endpoints = {}
+        for name in sorted(self.latencies):
+            endpoints[name] = _stats(self.latencies[name], self.errors[name], self.client_errors[name], duration)
+        everything = [value for values in self.latencies.values() for value in values]
+        return {
+            "endpoints": endpoints,
+            "total": _stats(everything, sum(self.errors.values()), sum(self.client_errors.values()), duration),
+            "scenarios": dict(sorted(self.iterations.items())),
+        }
+
+
+def _stats(latencies, errors, client_errors, duration):
+    if not latencies:
+        return {"requests": 0, "errors": errors, "client_errors": client_errors, "rps": 0.0}
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "client_errors": client_errors,
+        "rps": round(len(latencies) / duration, 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+class Session:
+    """One virtual user: an HTTP client shared by all users, its own RNG and login."""
+
+    def __init__(self, client, recorder, manifest, rng, admin_token, recruiter):
+        self.client = client
+        self.recorder = recorder
+        self.manifest = manifest
+        self.rng = rng
+        self.admin_token = admin_token
+        self.recruiter = recruiter
+
+    async def request(self, name, method, path, token=None, headers=None, **kwargs):
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.add(name, None, (time.perf_counter() - started) * 1000)
+            return None
+        self.recorder.add(name, response.status_code, (time.perf_counter() - started) * 1000)
+        return response
+
+    def pick(self, key):
+        low, high = self.manifest[key]
+        return self.rng.randint(low, high)
+
+    def recent_ad(self):
+        # Most traffic goes to the newest ads, which have the highest ids.
+        low, high = self.manifest["ads"]
+        return max(low, high - int(self.rng.expovariate(1 / max(1, (high - low) / 50))))
+
+
+def _json(response):
+    if response is None or response.status_code != 200:
+        return None
+    return response.json()
+
+
+async def browse(session):
+    body = _json(await session.request("GET /advertisements", "GET", "/advertisements", params={"limit": 20}))
+    if body and body.get("next_cursor"):
+        await session.request("GET /advertisements?cursor", "GET", "/advertisements",
+                              params={"limit": 20, "cursor": body["next_cursor"]})
+    ad_id = body["items"][session.rng.randrange(len(body["items"]))]["ad_id"] if body and body.get("items") else session.recent_ad()
+    await session.request("GET /advertisements/{ad_id}", "GET", f"/advertisements/{ad_id}")
+    await session.request("GET /advertisements/search", "GET", "/advertisements/search",
+                          params={"q": session.rng.choice(session.manifest["search_terms"])})
+
+
+async def apply(session):
+    candidate_id = session.pick("candidates")
+    email = session.manifest["candidate_email"].format(id=candidate_id)
+    await session.request("POST /applications", "POST", "/applications", json={
+        "ad_id": session.recent_ad() if session.rng.random() < 0.8 else session.pick("ads"),
+        "person_id": candidate_id,
+        "name": "Bench Candidate",
+        "email": email,
+        "phone": "0600000000",
+        "message": "Application sent by bench/load.py",
+    }, headers={"Idempotency-Key": f"bench-{session.rng.getrandbits(64):016x}"})
+
+
+async def recruiter(session):
+    recruiter_id, company_id, token = session.recruiter
+    body = _json(await session.request("GET /companies/{company_id}/dashboard", "GET",
+                                       f"/companies/{company_id}/dashboard", token=token))
+    ads = body.get("advertisements") if body else None
+    if ads:
+        ad_id = session.rng.choice(ads)["ad_id"]
+        await session.request("GET /advertisements/{ad_id}/candidates", "GET", f"/advertisements/{ad_id}/candidates",
+                              token=token, params={"limit": 20})
+
+
+async def admin(session):
+    token = session.admin_token
+    body = _json(await session.request("GET /admin/applications", "GET", "/admin/applications",
+                                       token=token, params={"limit": 50}))
+    if body and body.get("next_cursor"):
+        await session.request("GET /admin/applications?cursor", "GET", "/admin/applications", token=token,
+                              params={"limit": 50, "cursor": body["next_cursor"], "with_total": "false"})
+    await session.request("GET /admin/applications?status", "GET", "/admin/applications", token=token,
+                          params={"limit": 50, "status": session.rng.choice(STATUS_FILTERS)})
+    await session.request("GET /admin/overview", "GET", "/admin/overview", token=token)
+
+
+async def login(session):
+    candidate_id = session.pick("candidates")
+    await session.request("POST /login", "POST", "/login", json={
+        "email": session.manifest["candidate_email"].format(id=candidate_id),
+        "password": session.manifest["password"],
+    })
+
+
+SCENARIOS = {"browse": browse, "apply": apply, "recruiter": recruiter, "admin": admin, "login": login}
+
+
+def parse_mix(raw):
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def _login(client, email, password):
+    response = await client.post("/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        raise SystemExit(f"Could not log in as {email}: {response.status_code} {response.text}")
+    return response.json()["token"]
+
+
+async def virtual_user(session, mix, stop, think):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while not stop.is_set():
+        name = session.rng.choices(names, weights)[0]
+        await SCENARIOS[name](session)
+        if session.recorder.active:
+            session.recorder.iterations[name] += 1
+        if think:
+            await asyncio.sleep(session.rng.expovariate(1 / think))
+
+
+async def server_counters(client):
+    """CPU seconds and response body bytes of the API process so far, or None without /metrics."""
+    token = os.getenv("METRICS_TOKEN")
+    try:
+        response = await client.get("/metrics", headers={"Authorization": f"Bearer {token}"} if token else None)
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    counters = {"cpu_seconds": 0.0, "response_bytes": 0}
+    for line in response.text.splitlines():
+        if line.startswith("process_cpu_seconds_total "):
+            counters["cpu_seconds"] = float(line.split()[-1])
+        elif line.startswith("http_response_body_bytes_total{") and 'route="/metrics"' not in line:
+            counters["response_bytes"] += int(line.split()[-1])
+    return counters
+
+
+def server_usage(before, after, requests):
+    if before is None or after is None or not requests:
+        return None
+    cpu = after["cpu_seconds"] - before["cpu_seconds"]
+    return {
+        "cpu_s": round(cpu, 3),
+        "cpu_ms_per_request": round(cpu * 1000 / requests, 3),
+        "response_bytes_per_request": round((after["response_bytes"] - before["response_bytes"]) / requests),
+    }
+
+
+async def run(args):
+    with open(args.manifest, encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users + 8)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        admin_token = None
+        recruiters = []
+        if "admin" in args.mix:
+            admin_token = await _login(client, manifest["admin"]["email"], manifest["password"])
+        if "recruiter" in args.mix:
+            pairs = list(manifest["recruiter_companies"].items())[:min(args.users, 50)]
+            for recruiter_id, company_id in pairs:
+                email = manifest["recruiter_email"].format(id=recruiter_id)
+                recruiters.append((int(recruiter_id), company_id, await _login(client, email, manifest["password"])))
+
+        stop = asyncio.Event()
+        sessions = [
+            Session(client, recorder, manifest, random.Random(args.seed * 1000 + number), admin_token,
+                    recruiters[number % len(recruiters)] if recruiters else None)
+            for number in range(args.users)
+        ]
+        tasks = [asyncio.create_task(virtual_user(session, args.mix, stop, args.think / 1000)) for session in sessions]
+        if args.warmup:
+            print(f"Warming up for {args.warmup:g}s")
+            await asyncio.sleep(args.warmup)
+        counters_before = await server_counters(client)
+        recorder.active = True
+        started = time.perf_counter()
+        started_at = datetime.now(timezone.utc)
+        print(f"Running {args.users} user(s) for {args.duration:g}s, mix {args.mix}")
+        await asyncio.sleep(args.duration)
+        recorder.active = False
+        duration = time.perf_counter() - started
+        counters_after = await server_counters(client)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    report = {
+        "meta": {
+            **git_info(),
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "duration_s": round(duration, 2),
+            "users": args.users,
+            "mix": args.mix,
+            "think_ms": args.think,
+            "base_url": args.base_url,
+            "dataset": {"scale": manifest.get("scale"), "seed": manifest.get("seed"), "counts": manifest.get("counts")},
+        },
+        **recorder.summary(duration),
+    }
+    report["server"] = server_usage(counters_before, counters_after, report["total"]["requests"])
+    print_report(report)
+    path = args.out or os.path.join(BENCH_DIR, "results", f"{started_at:%Y%m%d-%H%M%S}-{report['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Report written to {path}")
+    return 1 if report["total"]["errors"] else 0
+
+
+def git_info():
+    def git(*command):
+        try:
+            return subprocess.run(["git", *command], cwd=BENCH_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def print_report(report):
+    print(f"{'endpoint':<42} {'req':>7} {'err':>5} {'4xx':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        if not row["requests"]:
+            continue
+        print(f"{name:<42} {row['requests']:>7} {row['errors']:>5} {row['client_errors']:>5} {row['rps']:>8.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
+    server = report.get("server")
+    if server:
+        print(f"server: {server['cpu_ms_per_request']:.2f} ms CPU and {server['response_bytes_per_request']:,} "
+              f"bytes per request ({server['cpu_s']:.1f} s CPU)")
+
+
+def _change(before, after):
+    if not before:
+        return "    n/a"
+    return f"{(after - before) / before * 100:+6.1f}%"
+
+
+def compare(args):
+    with open(args.before, encoding="utf-8") as handle:
+        before = json.load(handle)
+    with open(args.after, encoding="utf-8") as handle:
+        after = json.load(handle)
+    print(f"before: {before['meta'].get('commit')} at {before['meta'].get('started_at')}")
+    print(f"after:  {after['meta'].get('commit')} at {after['meta'].get('started_at')}")
+    if before["meta"].get("dataset") != after["meta"].get("dataset") or before["meta"].get("mix") != after["meta"].get("mix"):
+        print("warning: the two runs used a different dataset or scenario mix")
+    print(f"{'endpoint':<42} {'req/s':>16} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16}")
+    regressions = []
+    names = sorted(set(before["endpoints"]) | set(after["endpoints"]))
+    for name, old, new in [(name, before["endpoints"].get(name), after["endpoints"].get(name)) for name in names] + [
+        ("TOTAL", before["total"], after["total"])
+    ]:
+        if not old or not new or not old["requests"] or not new["requests"]:
+            print(f"{name:<42} only in {'after' if new else 'before'}")
+            continue
+        cells = [f"{new['rps']:>8.1f} {_change(old['rps'], new['rps'])}"]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            cells.append(f"{new[key]:>8.1f} {_change(old[key], new[key])}")
+        print(f"{name:<42} " + " ".join(cells))
+        if old["p95_ms"] and (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > args.threshold:
+            regressions.append(name)
+    old_server, new_server = before.get("server"), after.get("server")
+    if old_server and new_server:
+        for key, label in (("cpu_ms_per_request", "server CPU ms/request"),
+                           ("response_bytes_per_request", "response bytes/request")):
+            print(f"{label:<42} {new_server[key]:>8g} {_change(old_server[key], new_server[key])}")
+    if regressions:
+        print(f"p95 regressed by more than {args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run a load test and write a JSON report")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--manifest", default=os.path.join(BENCH_DIR, "seed.json"))
+    run_parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                            help=f"scenario=weight list (default {DEFAULT_MIX})")
+    run_parser.add_argument("--users", type=int, default=32, help="concurrent virtual users")
+    run_parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the run")
+    run_parser.add_argument("--think", type=float, default=0, help="mean pause between scenarios, in ms")
+    run_parser.add_argument("--timeout", type=float, default=30)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--out", help="report path (default bench/results/<time>-<commit>.json)")
+    compare_parser = commands.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--threshold", type=float, default=10, help="p95 regression in %% that fails")
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return asyncio.run(run(args))
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
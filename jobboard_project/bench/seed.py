@@ -0,0 +1,277 @@
+"""Fill a local MySQL database with a large, reproducible job board dataset.
+
+At --scale 1 it writes 100k companies, 150k recruiters, 2M candidates (half of them with
+a profile), 300k ads and about 3M applications. Applications favour recent ads and a long
+tail of popular ones, as on a real board. The same --seed always produces the same rows.
+Every seeded account uses the password given by --password. The ids and logins that
+bench/load.py needs are written to the --manifest file.
+
+Point back/.env at a dedicated database (schema and migrations applied), then:
+
+    python3 bench/seed.py --scale 0.01      # ~30k applications, a few seconds
+    python3 bench/seed.py                   # full size, several minutes
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "back"))
+
+from db import connect  # noqa: E402
+from passwords import pwd_context  # noqa: E402
+import stats  # noqa: E402
+
+BATCH_SIZE = 5000
+EMAIL_DOMAIN = "bench.jobboard.local"
+ADMIN_EMAIL = f"admin@{EMAIL_DOMAIN}"
+
+COUNTS = {
+    "companies": 100_000,
+    "recruiters": 150_000,
+    "candidates": 2_000_000,
+    "ads": 300_000,
+    "applications": 3_000_000,
+}
+PROFILE_RATIO = 0.5
+
+CITIES = ["Paris", "Lyon", "Marseille", "Toulouse", "Lille", "Bordeaux", "Nantes", "Rennes", "Strasbourg",
+          "Montpellier", "Nice", "Rouen", "Grenoble", "Remote", "Paris / Remote", "Lyon / Remote"]
+INDUSTRIES = ["Technology", "Data Analytics", "Marketing", "Design", "Software Services", "IT Support",
+              "Finance", "Healthcare", "Retail", "Logistics", "Energy", "Education"]
+SIZES = ["Startup", "PME", "Grande entreprise"]
+CONTRACTS = [("CDI", 55), ("CDD", 20), ("Stage", 10), ("Freelance", 8), ("Alternance", 7)]
+STATUSES = [("Sent", 50), ("In review", 25), ("Interview", 12), ("Rejected", 10), ("Hired", 3)]
+TITLES = ["Backend Engineer", "Frontend Developer", "Full Stack Developer", "Data Engineer", "Data Analyst",
+          "DevOps Engineer", "Product Manager", "UX/UI Designer", "Marketing Assistant", "Sales Representative",
+          "IT Support Technician", "QA Engineer", "Mobile Developer", "Project Manager", "Accountant"]
+LEVELS = ["Junior", "", "", "Senior", "Lead"]
+SKILLS = ["python", "fastapi", "django", "javascript", "typescript", "react", "vue", "nodejs", "java", "spring",
+          "go", "rust", "php", "sql", "mysql", "postgresql", "docker", "kubernetes", "aws", "azure", "git",
+          "ci cd", "figma", "seo", "excel", "power bi", "tableau", "machine learning", "pandas", "linux",
+          "agile", "scrum", "communication", "english", "salesforce", "photoshop", "c#", "c++", "kotlin", "swift"]
+FIRST_NAMES = ["Alice", "Louis", "Emma", "Hugo", "Chloé", "Lucas", "Léa", "Nathan", "Manon", "Jules", "Inès",
+               "Gabriel", "Sarah", "Arthur", "Camille", "Adam", "Lina", "Paul", "Jade", "Noah", "Walid", "Yasmine"]
+LAST_NAMES = ["Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+              "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier"]
+WORDS = ("you will design build maintain and improve services for our clients with a small team of engineers "
+         "product designers and analysts in a fast growing company that values quality ownership and learning").split()
+
+
+def weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+class Seeder:
+    def __init__(self, conn, scale, seed, password):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.rng = random.Random(seed)
+        self.counts = {name: max(1, int(count * scale)) for name, count in COUNTS.items()}
+        self.password_hash = pwd_context.hash(password)
+        self.now = datetime.now().replace(microsecond=0)
+
+    def next_id(self, table, column):
+        self.cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 AS next_id FROM {table}")
+        return self.cursor.fetchone()["next_id"]
+
+    def insert(self, table, columns, rows):
+        """Insert an iterable of row tuples in BATCH_SIZE multi-row statements."""
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        started = time.perf_counter()
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                self.cursor.executemany(sql, batch)
+                self.conn.commit()
+                total += len(batch)
+                batch = []
+        if batch:
+            self.cursor.executemany(sql, batch)
+            self.conn.commit()
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        print(f"  {table:<20} {total:>10} rows in {elapsed:7.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+        return total
+
+    def past(self, max_days):
+        return self.now - timedelta(seconds=self.rng.randrange(max_days * 86400))
+
+    def run(self):
+        rng = self.rng
+        counts = self.counts
+        cursor = self.cursor
+        cursor.execute("SELECT 1 FROM people WHERE email = %s", (ADMIN_EMAIL,))
+        if cursor.fetchone():
+            raise SystemExit(f"This database is already seeded ({ADMIN_EMAIL} exists); seed a fresh one.")
+        cursor.execute("SET SESSION foreign_key_checks = 0, SESSION unique_checks = 0")
+
+        first_company = self.next_id("companies", "company_id")
+        company_ids = range(first_company, first_company + counts["companies"])
+        self.insert("companies", ("company_id", "name", "industry", "size", "website", "email", "phone", "address", "created_at"), (
+            (company_id, f"Company {company_id}", rng.choice(INDUSTRIES), rng.choice(SIZES),
+             f"https://company{company_id}.example", f"jobs@company{company_id}.example",
+             f"+33 1 {company_id % 100:02d} 00 00 00", f"{rng.randint(1, 200)} rue de la Paix, {rng.choice(CITIES)}",
+             self.past(1500))
+            for company_id in company_ids
+        ))
+
+        first_person = self.next_id("people", "person_id")
+        admin_id = first_person
+        recruiter_ids = range(admin_id + 1, admin_id + 1 + counts["recruiters"])
+        candidate_ids = range(recruiter_ids.stop, recruiter_ids.stop + counts["candidates"])
+        # Every company gets one recruiter, the rest go to random companies.
+        recruiter_company = {
+            recruiter_id: company_ids[index] if index < len(company_ids) else rng.choice(company_ids)
+            for index, recruiter_id in enumerate(recruiter_ids)
+        }
+
+        def people():
+            yield (admin_id, None, "Bench", "Admin", ADMIN_EMAIL, None, "Admin", self.password_hash, self.past(1500))
+            for recruiter_id in recruiter_ids:
+                yield (recruiter_id, recruiter_company[recruiter_id], rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                       f"recruiter{recruiter_id}@{EMAIL_DOMAIN}", None, "Recruiter", self.password_hash, self.past(1500))
+            for candidate_id in candidate_ids:
+                yield (candidate_id, None, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                       f"candidate{candidate_id}@{EMAIL_DOMAIN}", f"06{candidate_id % 10 ** 8:08d}", "Applicant",
+                       self.password_hash, self.past(1000))
+
+        self.insert("people", ("person_id", "company_id", "first_name", "last_name", "email", "phone", "role",
+                               "password", "created_at"), people())
+
+        skill_names = self.ensure_skills()
+        skill_ids = sorted(skill_names)
+        profile_ids = [candidate_id for candidate_id in candidate_ids if rng.random() < PROFILE_RATIO]
+        profile_skills = {candidate_id: rng.sample(skill_ids, rng.randint(2, 6)) for candidate_id in profile_ids}
+        self.insert("candidate_profiles", ("person_id", "location", "education", "years_experience", "skills", "about"), (
+            (candidate_id, rng.choice(CITIES), rng.choice(["Bac+2", "Bachelor's Degree", "Master's Degree"]),
+             rng.randint(0, 20), ", ".join(skill_names[skill_id] for skill_id in profile_skills[candidate_id]), "")
+            for candidate_id in profile_ids
+        ))
+        self.insert("people_skills", ("person_id", "skill_id"), (
+            (candidate_id, skill_id) for candidate_id in profile_ids for skill_id in profile_skills[candidate_id]
+        ))
+        del profile_skills
+
+        first_ad = self.next_id("advertisements", "ad_id")
+        ad_ids = range(first_ad, first_ad + counts["ads"])
+        # Posting dates are skewed towards the last few weeks.
+        ad_posted = [self.now - timedelta(days=min(365, rng.expovariate(1 / 45)), seconds=rng.randrange(86400))
+                     for _ in ad_ids]
+        # A few large companies post a lot, most post one or two ads: weight ~ 1 / rank.
+        ad_company = rng.choices(company_ids, cum_weights=list(accumulate(1 / (rank + 10) for rank in range(len(company_ids)))),
+                                 k=len(ad_ids))
+        ad_skill_sets = [rng.sample(skill_ids, rng.randint(3, 6)) for _ in ad_ids]
+
+        def ads():
+            for offset, ad_id in enumerate(ad_ids):
+                title = f"{rng.choice(LEVELS)} {rng.choice(TITLES)}".strip()
+                salary_min = rng.randrange(22000, 70000, 1000) if rng.random() < 0.8 else None
+                salary_max = salary_min + rng.randrange(3000, 25000, 1000) if salary_min else None
+                skills = ", ".join(skill_names[skill_id] for skill_id in ad_skill_sets[offset])
+                posted = ad_posted[offset]
+                yield (ad_id, ad_company[offset], title, f"{sentence(rng, 30)} Skills: {skills}.", rng.choice(CITIES),
+                       salary_min, salary_max, weighted(rng, CONTRACTS), posted,
+                       (posted + timedelta(days=rng.randint(30, 120))).date())
+
+        self.insert("advertisements", ("ad_id", "company_id", "title", "description", "location", "salary_min",
+                                       "salary_max", "contract_type", "date_posted", "date_expiry"), ads())
+        self.insert("ad_skills", ("ad_id", "skill_id"), (
+            (ad_id, skill_id) for offset, ad_id in enumerate(ad_ids) for skill_id in ad_skill_sets[offset]
+        ))
+        del ad_skill_sets
+
+        # Popular ads draw most applications: weight ~ 1 / rank, shuffled over the ads.
+        ad_weights = [1 / (rank + 10) for rank in range(len(ad_ids))]
+        rng.shuffle(ad_weights)
+        cumulative = list(accumulate(ad_weights))
+        del ad_weights
+        company_recruiter = {}
+        for recruiter_id, company_id in recruiter_company.items():
+            company_recruiter.setdefault(company_id, recruiter_id)
+        # 70% of candidates apply, 1 + an exponential number of times, which averages out to
+        # about applications / candidates per candidate.
+        extra = max(counts["applications"] / len(candidate_ids) / 0.7 - 0.5, 0.1)
+
+        def applications():
+            remaining = counts["applications"]
+            for candidate_id in candidate_ids:
+                if remaining <= 0:
+                    return
+                if rng.random() >= 0.7:
+                    continue
+                wanted = min(remaining, 1 + int(rng.expovariate(1 / extra)))
+                offsets = set(rng.choices(range(len(ad_ids)), cum_weights=cumulative, k=wanted))
+                remaining -= len(offsets)
+                for offset in offsets:
+                    status = weighted(rng, STATUSES)
+                    applied = min(self.now, ad_posted[offset] + timedelta(seconds=rng.randrange(30 * 86400)))
+                    recruiter_id = company_recruiter.get(ad_company[offset]) if status != "Sent" else None
+                    yield (ad_ids[offset], candidate_id, recruiter_id, applied, status,
+                           sentence(rng, 12) if rng.random() < 0.6 else None)
+
+        applications_count = self.insert("applications", ("ad_id", "applicant_id", "recruiter_id", "application_date",
+                                                          "status", "message"), applications())
+
+        cursor.execute("SET SESSION foreign_key_checks = 1, SESSION unique_checks = 1")
+        started = time.perf_counter()
+        stats.refresh()
+        print(f"  stats_counters refreshed in {time.perf_counter() - started:.1f}s")
+        return {
+            "created_at": self.now.isoformat(),
+            "counts": dict(counts, applications=applications_count, profiles=len(profile_ids)),
+            "admin": {"person_id": admin_id, "email": ADMIN_EMAIL},
+            "companies": [company_ids.start, company_ids.stop - 1],
+            "recruiters": [recruiter_ids.start, recruiter_ids.stop - 1],
+            "candidates": [candidate_ids.start, candidate_ids.stop - 1],
+            "ads": [ad_ids.start, ad_ids.stop - 1],
+            "recruiter_email": f"recruiter{{id}}@{EMAIL_DOMAIN}",
+            "candidate_email": f"candidate{{id}}@{EMAIL_DOMAIN}",
+            "recruiter_companies": {str(recruiter_id): recruiter_company[recruiter_id]
+                                    for recruiter_id in list(recruiter_ids)[:1000]},
+            "search_terms": sorted({title.split()[0] for title in TITLES} | set(SKILLS[:10])),
+        }
+
+    def ensure_skills(self):
+        self.cursor.executemany("INSERT IGNORE INTO skills (name) VALUES (%s)", [(name,) for name in SKILLS])
+        self.conn.commit()
+        placeholders = ", ".join(["%s"] * len(SKILLS))
+        self.cursor.execute(f"SELECT skill_id, name FROM skills WHERE name IN ({placeholders})", SKILLS)
+        return {row["skill_id"]: row["name"] for row in self.cursor.fetchall()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="fraction of the full-size dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="benchpass")
+    parser.add_argument("--manifest", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed.json"))
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        started = time.perf_counter()
+        print(f"Seeding at scale {args.scale:g} (seed {args.seed})")
+        manifest = Seeder(conn, args.scale, args.seed, args.password).run()
+        manifest.update(scale=args.scale, seed=args.seed, password=args.password)
+    finally:
+        conn.close()
+    with open(args.manifest, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    print(f"Done in {time.perf_counter() - started:.1f}s, manifest written to {args.manifest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""CPU cost of encoding a listing page: FastAPI's default path against fastjson.
+
+"before" is what a route returning plain rows costs: jsonable_encoder, then JSONResponse.
+"after" is FastJSONResponse (orjson when installed). Each is timed in process CPU time
+per response, for pages of synthetic rows shaped like /advertisements and
+/admin/applications, along with the cost and size of gzip/brotli compression of the body.
+
+    python3 bench/serialization.py --rows 20,100,500 --repeat 200
+
+No database or server is needed. For CPU per request under real traffic, compare two
+`bench/load.py run` reports: they include the server CPU time per request.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "back"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import compression  # noqa: E402
+import fastjson  # noqa: E402
+
+STATUSES = ["Sent", "In review", "Interview", "Rejected", "Accepted"]
+
+
+def ad_row(rng, ad_id):
+    posted = datetime(2024, 1, 1) + timedelta(minutes=rng.randrange(900_000))
+    salary_min = Decimal(rng.randrange(25_000, 70_000, 500))
+    return {
+        "ad_id": ad_id,
+        "company_id": rng.randrange(1, 100_000),
+        "title": f"Développeur backend Python {ad_id}",
+        "description": "Vous rejoignez une équipe produit de huit personnes. " * 4,
+        "location": rng.choice(["Paris", "Lyon", "Nantes", "Lille", "Bordeaux"]),
+        "salary_min": salary_min,
+        "salary_max": salary_min + Decimal("10000.50"),
+        "contract_type": rng.choice(["CDI", "CDD", "Freelance"]),
+        "date_posted": posted,
+        "date_expiry": (posted + timedelta(days=60)).date(),
+    }
+
+
+def application_row(rng, application_id):
+    return {
+        "application_id": application_id,
+        "status": rng.choice(STATUSES),
+        "application_date": datetime(2024, 1, 1) + timedelta(seconds=rng.randrange(30_000_000)),
+        "message": "Bonjour, votre annonce correspond à mon parcours." if rng.random() < 0.6 else None,
+        "first_name": "Camille",
+        "last_name": f"Martin{application_id % 997}",
+        "email": f"candidate{application_id}@example.com",
+        "phone": "06 12 34 56 78",
+        "ad_id": rng.randrange(1, 300_000),
+        "title": f"Chargé de recrutement {application_id % 311}",
+        "company_name": f"Entreprise {application_id % 5003}",
+    }
+
+
+SHAPES = {"advertisements": ad_row, "applications": application_row}
+
+
+def make_page(shape, rows, seed):
+    rng = random.Random(seed)
+    factory = SHAPES[shape]
+    return {"items": [factory(rng, 1000 + number) for number in range(rows)], "next_cursor": "eyJrIjpbMV19"}
+
+
+def cpu_ms(function, repeat):
+    function()
+    started = time.process_time()
+    for _ in range(repeat):
+        function()
+    return (time.process_time() - started) * 1000 / repeat
+
+
+def measure(shape, rows, repeat, seed):
+    content = make_page(shape, rows, seed)
+    before_body = JSONResponse(jsonable_encoder(content)).body
+    after_body = fastjson.FastJSONResponse(content).body
+    if json.loads(before_body) != json.loads(after_body):
+        raise SystemExit(f"{shape}: fastjson output differs from jsonable_encoder")
+    result = {
+        "shape": shape,
+        "rows": rows,
+        "before_ms": cpu_ms(lambda: JSONResponse(jsonable_encoder(content)), repeat),
+        "after_ms": cpu_ms(lambda: fastjson.FastJSONResponse(content), repeat),
+        "identity_bytes": len(after_body),
+    }
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for encoding in encodings:
+        result[f"{encoding}_ms"] = cpu_ms(lambda: compression.compress(after_body, encoding), repeat)
+        result[f"{encoding}_bytes"] = len(compression.compress(after_body, encoding))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="20,100,500", help="comma-separated page sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="responses encoded per measurement")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+    results = [
+        measure(shape, int(rows), args.repeat, args.seed)
+        for shape in SHAPES for rows in args.rows.split(",")
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"encoder: {'orjson' if fastjson.orjson is not None else 'json (pip install orjson for the fast path)'}; "
+          f"compression: gzip level {compression.COMPRESS_GZIP_LEVEL}"
+          + (f", brotli quality {compression.COMPRESS_BROTLI_QUALITY}" if compression.brotli is not None else ""))
+    print(f"{'page':<20} {'before ms':>10} {'after ms':>10} {'speedup':>8} {'bytes':>9} {'gzip':>16} {'br':>16}")
+    for row in results:
+        cells = []
+        for encoding in ("gzip", "br"):
+            if f"{encoding}_bytes" in row:
+                cells.append(f"{row[f'{encoding}_bytes']:>7,} {row[f'{encoding}_ms']:>5.2f}ms")
+            else:
+                cells.append(f"{'-':>16}")
+        print(f"{row['shape'] + ' x' + str(row['rows']):<20} {row['before_ms']:>10.3f} {row['after_ms']:>10.3f} "
+              f"{row['before_ms'] / row['after_ms']:>7.1f}x {row['identity_bytes']:>9,} " + " ".join(f"{cell:>16}" for cell in cells))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,7 +10,8 @@ document.addEventListener("DOMContentLoaded", () => {
   };
 
   const user = readUser();
-  if (!user || user.role !== "Admin") {
+  const token = localStorage.getItem("token");
+  if (!user || user.role !== "Admin" || !token) {
     window.location.href = "login.html";
     return;
   }
@@ -32,6 +33,11 @@ document.addEventListener("DOMContentLoaded", () => {
       if (res.status === 204) return null;
       return res.json();
     }
+    if (res.status === 401) {
+      localStorage.removeItem("token");
+      localStorage.removeItem("user");
+      window.location.href = "login.html";
+    }
     let detail = "Request failed.";
     try {
       const data = await res.json();
@@ -44,7 +50,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
   const adminFetch = (path, options = {}) => {
     const headers = {
-      "X-Admin-Id": String(adminId),
+      Authorization: `Bearer ${token}`,
       ...(options.headers || {}),
     };
     return fetch(`${apiBase}${path}`, {
@@ -55,6 +61,44 @@ document.addEventListener("DOMContentLoaded", () => {
 
   const adminFetchJSON = (path) => adminFetch(path);
 
+  const selectedIds = (container, selector) =>
+    Array.from(container?.querySelectorAll(`${selector}:checked`) || []).map((box) => Number(box.value));
+
+  // Bulk endpoints answer per id; report the ones that could not be processed.
+  const runBulk = async (path, payload) => {
+    const summary = await adminFetch(path, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload),
+    });
+    const failures = (summary?.results || []).filter((result) => !result.ok);
+    if (failures.length) {
+      alert(
+        `${summary.succeeded} done, ${summary.failed} failed:\n` +
+          failures.map((result) => `#${result.id}: ${result.error}`).join("\n")
+      );
+    }
+    return summary;
+  };
+
+  const downloadExport = async (path, filename) => {
+    const res = await fetch(`${apiBase}${path}`, {
+      headers: { Authorization: `Bearer ${token}` },
+    });
+    if (!res.ok) {
+      await handleResponse(res);
+      return;
+    }
+    const url = URL.createObjectURL(await res.blob());
+    const link = document.createElement("a");
+    link.href = url;
+    link.download = filename;
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+    URL.revokeObjectURL(url);
+  };
+
   const overviewUsersEl = document.getElementById("overview-users");
   const overviewCompaniesEl = document.getElementById("overview-companies");
   const overviewAdsEl = document.getElementById("overview-ads");
@@ -63,6 +107,8 @@ document.addEventListener("DOMContentLoaded", () => {
   const companiesContainer = document.getElementById("admin-companies");
   const adsContainer = document.getElementById("admin-ads");
   const applicationsContainer = document.getElementById("admin-applications");
+  const applicationsStatusFilter = document.getElementById("admin-applications-status");
+  const applicationsTotalEl = document.getElementById("admin-applications-total");
   const adminCreateForm = document.getElementById("admin-create-form");
   const adminCreateStatus = document.getElementById("admin-create-status");
   const userCreateForm = document.getElementById("admin-user-create-form");
@@ -77,10 +123,14 @@ document.addEventListener("DOMContentLoaded", () => {
   const adsWrapper = document.getElementById("admin-ads");
 
   const STATUS_VALUES = ["Sent", "In review", "Interview", "Rejected", "Hired"];
+  const ADS_PAGE_SIZE = 50;
+  const APPLICATIONS_PAGE_SIZE = 25;
   let usersCache = [];
   let companiesCache = [];
   let adsCache = [];
+  let adsNextCursor = null;
   let applicationsCache = [];
+  let applicationsNextCursor = null;
 
   const toNumberOrNull = (value) => {
     if (value === undefined || value === null || value === "") return null;
@@ -104,6 +154,9 @@ document.addEventListener("DOMContentLoaded", () => {
     const tr = document.createElement("tr");
     tr.className = "hover:bg-gray-50";
     tr.innerHTML = `
+      <td class="py-2 pr-2">
+        ${userData.person_id === adminId ? "" : `<input type="checkbox" class="admin-select-user" value="${userData.person_id}">`}
+      </td>
       <td class="py-2 pr-4">${userData.first_name || ""} ${userData.last_name || ""}</td>
       <td class="py-2 pr-4">${userData.email || ""}</td>
       <td class="py-2 pr-4">${userData.role}</td>
@@ -162,7 +215,7 @@ document.addEventListener("DOMContentLoaded", () => {
       });
     } catch (error) {
       console.error("Unable to load users:", error);
-      usersTableBody.innerHTML = `<tr><td colspan="5" class="py-3 text-red-600">Unable to load users.</td></tr>`;
+      usersTableBody.innerHTML = `<tr><td colspan="6" class="py-3 text-red-600">Unable to load users.</td></tr>`;
     }
   };
 
@@ -336,7 +389,8 @@ document.addEventListener("DOMContentLoaded", () => {
       <p class="text-sm text-gray-600"><strong>Salary:</strong> ${ad.salary_min ?? "—"} - ${ad.salary_max ?? "—"}</p>
       <p class="text-sm text-gray-600"><strong>Expires:</strong> ${ad.date_expiry || "—"}</p>
       <p class="text-sm text-gray-600"><strong>Description:</strong> ${ad.description || "—"}</p>
-      <div class="flex gap-2 mt-2">
+      <div class="flex items-center gap-2 mt-2">
+        <input type="checkbox" class="admin-select-ad" value="${ad.ad_id}" aria-label="Select advertisement">
         <button class="admin-edit-ad rounded bg-blue-500 px-3 py-1 text-sm font-medium text-white hover:bg-blue-600" data-id="${ad.ad_id}">
           Edit
         </button>
@@ -348,41 +402,58 @@ document.addEventListener("DOMContentLoaded", () => {
     return div;
   };
 
-  const loadAds = async () => {
+  const bindAdCard = (card) => {
+    card.querySelector(".admin-delete-ad")?.addEventListener("click", async (event) => {
+      const id = event.currentTarget.getAttribute("data-id");
+      if (!id || !confirm("Delete this advertisement?")) return;
+      try {
+        await adminFetch(`/admin/advertisements/${id}`, { method: "DELETE" });
+        await loadAds();
+        await loadOverview();
+      } catch (error) {
+        alert(error.message);
+      }
+    });
+    card.querySelector(".admin-edit-ad")?.addEventListener("click", async (event) => {
+      const id = Number(event.currentTarget.getAttribute("data-id"));
+      const advert = adsCache.find((a) => a.ad_id === id);
+      if (!advert) return;
+      await openAdEditDialog(advert);
+    });
+  };
+
+  const loadAds = async ({ append = false } = {}) => {
     if (!adsContainer) return;
-    adsContainer.innerHTML = "";
+    if (!append) {
+      adsContainer.innerHTML = "";
+      adsCache = [];
+      adsNextCursor = null;
+    }
+    adsContainer.querySelector(".admin-ads-more")?.remove();
     try {
-      const ads = await fetch(`${apiBase}/advertisements`).then(handleResponse);
-      adsCache = Array.isArray(ads) ? ads : [];
+      const params = new URLSearchParams({ limit: ADS_PAGE_SIZE });
+      if (append && adsNextCursor) params.set("cursor", adsNextCursor);
+      const page = await fetch(`${apiBase}/advertisements?${params}`).then(handleResponse);
+      const ads = Array.isArray(page?.items) ? page.items : [];
+      adsCache = adsCache.concat(ads);
+      adsNextCursor = page?.next_cursor || null;
       if (adsWrapper) adsWrapper.dataset.loaded = "true";
-      if (!Array.isArray(ads) || !ads.length) {
+      if (!adsCache.length) {
         adsContainer.innerHTML = "<p class='text-gray-500'>No advertisements posted yet.</p>";
         return;
       }
       ads.forEach((ad) => {
-        adsContainer.appendChild(renderAdCard(ad));
-      });
-      adsContainer.querySelectorAll(".admin-delete-ad").forEach((btn) => {
-        btn.addEventListener("click", async () => {
-          const id = btn.getAttribute("data-id");
-          if (!id || !confirm("Delete this advertisement?")) return;
-          try {
-            await adminFetch(`/admin/advertisements/${id}`, { method: "DELETE" });
-            await loadAds();
-            await loadOverview();
-          } catch (error) {
-            alert(error.message);
-          }
-        });
-      });
-      adsContainer.querySelectorAll(".admin-edit-ad").forEach((btn) => {
-        btn.addEventListener("click", async () => {
-          const id = Number(btn.getAttribute("data-id"));
-          const advert = adsCache.find((a) => a.ad_id === id);
-          if (!advert) return;
-          await openAdEditDialog(advert);
-        });
+        const card = renderAdCard(ad);
+        bindAdCard(card);
+        adsContainer.appendChild(card);
       });
+      if (adsNextCursor) {
+        const moreButton = document.createElement("button");
+        moreButton.className = "admin-ads-more rounded border border-gray-300 px-3 py-1 text-sm font-medium text-[#0b1e35] hover:bg-gray-50";
+        moreButton.textContent = "Load more";
+        moreButton.addEventListener("click", () => loadAds({ append: true }));
+        adsContainer.appendChild(moreButton);
+      }
     } catch (error) {
       console.error("Unable to load advertisements:", error);
       adsContainer.innerHTML = "<p class='text-red-600'>Unable to load advertisements.</p>";
@@ -457,13 +528,16 @@ document.addEventListener("DOMContentLoaded", () => {
     div.className = "border border-gray-200 rounded-lg p-4 shadow-sm";
     div.innerHTML = `
       <div class="flex flex-col md:flex-row md:justify-between md:items-start gap-3">
-        <div>
-          <h3 class="text-lg font-semibold text-[#0b1e35]">${app.title}</h3>
-          <p class="text-sm text-gray-500">${app.company_name}</p>
-          <p class="text-sm text-gray-500">Applied on ${new Date(app.application_date).toLocaleDateString()}</p>
-          <p class="text-sm text-gray-600 mt-2"><strong>Candidate:</strong> ${app.first_name} ${app.last_name}</p>
-          <p class="text-sm text-gray-600"><strong>Email:</strong> ${app.email}</p>
-          <p class="text-sm text-gray-600"><strong>Phone:</strong> ${app.phone || "—"}</p>
+        <div class="flex items-start gap-3">
+          <input type="checkbox" class="admin-select-application mt-2" value="${app.application_id}" aria-label="Select application">
+          <div>
+            <h3 class="text-lg font-semibold text-[#0b1e35]">${app.title}</h3>
+            <p class="text-sm text-gray-500">${app.company_name}</p>
+            <p class="text-sm text-gray-500">Applied on ${new Date(app.application_date).toLocaleDateString()}</p>
+            <p class="text-sm text-gray-600 mt-2"><strong>Candidate:</strong> ${app.first_name} ${app.last_name}</p>
+            <p class="text-sm text-gray-600"><strong>Email:</strong> ${app.email}</p>
+            <p class="text-sm text-gray-600"><strong>Phone:</strong> ${app.phone || "—"}</p>
+          </div>
         </div>
         <div class="text-sm">
           <label class="font-medium text-[#0b1e35]" for="status-${app.application_id}">Status</label>
@@ -485,52 +559,77 @@ document.addEventListener("DOMContentLoaded", () => {
     return div;
   };
 
-  const loadApplications = async () => {
+  const bindApplicationCard = (card) => {
+    card.querySelector(".admin-save-application")?.addEventListener("click", async (event) => {
+      const id = Number(event.currentTarget.getAttribute("data-id"));
+      if (!Number.isInteger(id)) return;
+      const select = card.querySelector(`select.admin-application-status[data-id="${id}"]`);
+      const newStatus = select?.value;
+      if (!newStatus) return;
+      try {
+        await adminFetch(`/admin/applications/${id}`, {
+          method: "PATCH",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ status: newStatus }),
+        });
+        await loadApplications();
+        await loadOverview();
+      } catch (error) {
+        alert(error.message);
+      }
+    });
+    card.querySelector(".admin-delete-application")?.addEventListener("click", async (event) => {
+      const id = event.currentTarget.getAttribute("data-id");
+      if (!id || !confirm("Delete this application?")) return;
+      try {
+        await adminFetch(`/admin/applications/${id}`, { method: "DELETE" });
+        await loadApplications();
+        await loadOverview();
+      } catch (error) {
+        alert(error.message);
+      }
+    });
+  };
+
+  const loadApplications = async ({ append = false } = {}) => {
     if (!applicationsContainer) return;
-    applicationsContainer.innerHTML = "";
+    if (!append) {
+      applicationsContainer.innerHTML = "";
+      applicationsCache = [];
+      applicationsNextCursor = null;
+    }
+    applicationsContainer.querySelector(".admin-applications-more")?.remove();
     try {
-      const applications = await adminFetchJSON("/admin/applications");
-      applicationsCache = Array.isArray(applications) ? applications : [];
-      if (!Array.isArray(applications) || !applications.length) {
+      const params = new URLSearchParams({ limit: APPLICATIONS_PAGE_SIZE });
+      const status = applicationsStatusFilter?.value;
+      if (status) params.set("status", status);
+      if (append && applicationsNextCursor) {
+        params.set("cursor", applicationsNextCursor);
+        params.set("with_total", "false");
+      }
+      const page = await adminFetchJSON(`/admin/applications?${params}`);
+      const applications = Array.isArray(page?.items) ? page.items : [];
+      applicationsCache = applicationsCache.concat(applications);
+      applicationsNextCursor = page?.next_cursor || null;
+      if (applicationsTotalEl && typeof page?.total === "number") {
+        applicationsTotalEl.textContent = `${page.total} application${page.total === 1 ? "" : "s"}`;
+      }
+      if (!applicationsCache.length) {
         applicationsContainer.innerHTML = "<p class='text-gray-500'>No applications submitted yet.</p>";
         return;
       }
       applications.forEach((app) => {
-        applicationsContainer.appendChild(renderApplicationCard(app));
-      });
-      applicationsContainer.querySelectorAll(".admin-save-application").forEach((btn) => {
-        btn.addEventListener("click", async () => {
-          const id = Number(btn.getAttribute("data-id"));
-          if (!Number.isInteger(id)) return;
-          const select = document.querySelector(`select.admin-application-status[data-id="${id}"]`);
-          const newStatus = select?.value;
-          if (!newStatus) return;
-          try {
-            await adminFetch(`/admin/applications/${id}`, {
-              method: "PATCH",
-              headers: { "Content-Type": "application/json" },
-              body: JSON.stringify({ status: newStatus }),
-            });
-            await loadApplications();
-            await loadOverview();
-          } catch (error) {
-            alert(error.message);
-          }
-        });
-      });
-      applicationsContainer.querySelectorAll(".admin-delete-application").forEach((btn) => {
-        btn.addEventListener("click", async () => {
-          const id = btn.getAttribute("data-id");
-          if (!id || !confirm("Delete this application?")) return;
-          try {
-            await adminFetch(`/admin/applications/${id}`, { method: "DELETE" });
-            await loadApplications();
-            await loadOverview();
-          } catch (error) {
-            alert(error.message);
-          }
-        });
+        const card = renderApplicationCard(app);
+        bindApplicationCard(card);
+        applicationsContainer.appendChild(card);
       });
+      if (applicationsNextCursor) {
+        const moreButton = document.createElement("button");
+        moreButton.className = "admin-applications-more rounded border border-gray-300 px-3 py-1 text-sm font-medium text-[#0b1e35] hover:bg-gray-50";
+        moreButton.textContent = "Load more";
+        moreButton.addEventListener("click", () => loadApplications({ append: true }));
+        applicationsContainer.appendChild(moreButton);
+      }
     } catch (error) {
       console.error("Unable to load applications:", error);
       applicationsContainer.innerHTML = "<p class='text-red-600'>Unable to load applications.</p>";
@@ -673,8 +772,60 @@ document.addEventListener("DOMContentLoaded", () => {
 
   document.getElementById("refresh-users")?.addEventListener("click", loadUsers);
   document.getElementById("refresh-companies")?.addEventListener("click", loadCompanies);
-  document.getElementById("refresh-ads")?.addEventListener("click", loadAds);
-  document.getElementById("refresh-applications-admin")?.addEventListener("click", loadApplications);
+  document.getElementById("refresh-ads")?.addEventListener("click", () => loadAds());
+  document.getElementById("refresh-applications-admin")?.addEventListener("click", () => loadApplications());
+  applicationsStatusFilter?.addEventListener("change", () => loadApplications());
+  document.getElementById("delete-selected-users")?.addEventListener("click", async () => {
+    const ids = selectedIds(usersTableBody, ".admin-select-user");
+    if (!ids.length || !confirm(`Delete ${ids.length} user(s)? This action is irreversible.`)) return;
+    try {
+      await runBulk("/admin/users/bulk-delete", { ids });
+      await loadUsers();
+      await loadOverview();
+    } catch (error) {
+      alert(error.message);
+    }
+  });
+  document.getElementById("delete-selected-ads")?.addEventListener("click", async () => {
+    const ids = selectedIds(adsContainer, ".admin-select-ad");
+    if (!ids.length || !confirm(`Delete ${ids.length} advertisement(s)?`)) return;
+    try {
+      await runBulk("/admin/advertisements/bulk-delete", { ids });
+      await loadAds();
+      await loadOverview();
+    } catch (error) {
+      alert(error.message);
+    }
+  });
+  document.getElementById("update-selected-applications")?.addEventListener("click", async () => {
+    const ids = selectedIds(applicationsContainer, ".admin-select-application");
+    const status = document.getElementById("admin-applications-bulk-status")?.value;
+    if (!ids.length || !status) return;
+    try {
+      await runBulk("/admin/applications/bulk-status", { ids, status });
+      await loadApplications();
+      await loadOverview();
+    } catch (error) {
+      alert(error.message);
+    }
+  });
+  document.getElementById("delete-selected-applications")?.addEventListener("click", async () => {
+    const ids = selectedIds(applicationsContainer, ".admin-select-application");
+    if (!ids.length || !confirm(`Delete ${ids.length} application(s)?`)) return;
+    try {
+      await runBulk("/admin/applications/bulk-delete", { ids });
+      await loadApplications();
+      await loadOverview();
+    } catch (error) {
+      alert(error.message);
+    }
+  });
+  document.getElementById("export-users")?.addEventListener("click", () =>
+    downloadExport("/admin/exports/users?format=csv", "users.csv").catch((error) => alert(error.message))
+  );
+  document.getElementById("export-applications")?.addEventListener("click", () =>
+    downloadExport("/admin/exports/applications?format=csv", "applications.csv").catch((error) => alert(error.message))
+  );
 
   const setupToggleButton = (button, container, loadFn) => {
     if (!button || !container) return;
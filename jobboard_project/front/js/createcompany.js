@@ -62,10 +62,14 @@ document.addEventListener("DOMContentLoaded", () => {
           localStorage.setItem("person_id", result.recruiter.person_id);
         }
       }
+      if (result.token) {
+        localStorage.setItem("token", result.token);
+      }
       localStorage.removeItem("accountData");
       localStorage.removeItem("selectedAccountType");
       alert("Company created successfully!");
-      window.location.href = "recruiterspace.html";
+      // Without a session token the recruiter space would bounce to the login page anyway.
+      window.location.href = result.token ? "recruiterspace.html" : "login.html";
 
     } catch (error) {
       console.error("Error creating company:", error);
@@ -0,0 +1,62 @@
+(() => {
+  const STORAGE_KEY = "conditionalResponses";
+  const MAX_ENTRIES = 50;
+
+  function readStored() {
+    try {
+      const raw = sessionStorage.getItem(STORAGE_KEY);
+      return raw ? JSON.parse(raw) : [];
+    } catch (error) {
+      return [];
+    }
+  }
+
+  const entries = new Map(readStored());
+
+  function persist() {
+    try {
+      sessionStorage.setItem(STORAGE_KEY, JSON.stringify([...entries]));
+    } catch (error) {
+      // Storage full or disabled: the in-memory copy still saves round trips on this page.
+    }
+  }
+
+  function remember(url, etag, data) {
+    entries.delete(url);
+    entries.set(url, { etag, data });
+    while (entries.size > MAX_ENTRIES) {
+      entries.delete(entries.keys().next().value);
+    }
+    persist();
+  }
+
+  // GET a JSON resource, revalidating the last copy with If-None-Match; a 304 reuses it.
+  async function fetchJson(url, options = {}) {
+    const cached = entries.get(url);
+    const headers = new Headers(options.headers || {});
+    if (cached) {
+      headers.set("If-None-Match", cached.etag);
+    }
+    const response = await fetch(url, { ...options, headers });
+    if (response.status === 304 && cached) {
+      remember(url, cached.etag, cached.data);
+      return cached.data;
+    }
+    if (!response.ok) {
+      const error = new Error(`Request failed with status ${response.status}`);
+      error.status = response.status;
+      throw error;
+    }
+    const data = await response.json();
+    const etag = response.headers.get("ETag");
+    if (etag) {
+      remember(url, etag, data);
+    } else if (cached) {
+      entries.delete(url);
+      persist();
+    }
+    return data;
+  }
+
+  window.fetchJson = fetchJson;
+})();
@@ -1,7 +1,16 @@
 (() => {
   const apiBase = "http://127.0.0.1:8000";
   const staticJobs = window.staticJobs ?? [];
+  const PAGE_SIZE = 12;
+  const LIST_FIELDS = "ad_id,title,summary,location,salary_min,salary_max";
   let jobList;
+  let sentinel;
+  let observer;
+  let nextCursor = null;
+  let exhausted = false;
+  let loading = false;
+  let searchTimer;
+  let generation = 0;
 
   function ensureJobList() {
     jobList = document.getElementById("job-list");
@@ -28,26 +37,127 @@
     jobList.appendChild(card);
   }
 
+  function renderAd(ad) {
+    createJobCard(
+      ad.title,
+      ad.summary || "",
+      ad.location || "Location not specified",
+      ad.salary_min && ad.salary_max ? `${ad.salary_min} - ${ad.salary_max} €` : "Salary not specified",
+      ad.ad_id,
+    );
+  }
+
+  function stopObserving() {
+    observer?.disconnect();
+    observer = null;
+    sentinel?.remove();
+    sentinel = null;
+  }
+
+  function sentinelInView() {
+    return sentinel && sentinel.getBoundingClientRect().top < window.innerHeight + 200;
+  }
+
+  function readFilters() {
+    const filters = {
+      q: document.getElementById("job-search")?.value.trim() || "",
+      location: document.getElementById("job-location")?.value.trim() || "",
+      contract_type: document.getElementById("job-contract")?.value || "",
+      salary_min: document.getElementById("job-salary-min")?.value.trim() || "",
+    };
+    return Object.fromEntries(Object.entries(filters).filter(([, value]) => value));
+  }
+
+  function buildPageUrl() {
+    const filters = readFilters();
+    const params = new URLSearchParams({ limit: PAGE_SIZE, fields: LIST_FIELDS, ...filters });
+    if (nextCursor) {
+      params.set("cursor", nextCursor);
+    }
+    const path = Object.keys(filters).length ? "/advertisements/search" : "/advertisements";
+    return `${apiBase}${path}?${params}`;
+  }
+
+  async function loadNextPage() {
+    if (loading || exhausted) {
+      return 0;
+    }
+    loading = true;
+    const requestGeneration = generation;
+    try {
+      const page = await window.fetchJson(buildPageUrl());
+      if (requestGeneration !== generation) {
+        return 0;
+      }
+      const ads = Array.isArray(page.items) ? page.items : [];
+      ads.forEach(renderAd);
+      nextCursor = page.next_cursor || null;
+      exhausted = !nextCursor;
+      return ads.length;
+    } finally {
+      if (requestGeneration === generation) {
+        loading = false;
+      }
+    }
+  }
+
+  async function loadWhileVisible() {
+    if (loading) {
+      return;
+    }
+    try {
+      while (!exhausted && sentinelInView()) {
+        if (!(await loadNextPage())) {
+          break;
+        }
+      }
+    } catch (error) {
+      console.warn("Unable to load more job offers:", error);
+    }
+    if (exhausted) {
+      stopObserving();
+    }
+  }
+
+  function observeScroll() {
+    sentinel = document.createElement("div");
+    sentinel.setAttribute("aria-hidden", "true");
+    jobList.insertAdjacentElement("afterend", sentinel);
+    observer = new IntersectionObserver((entries) => {
+      if (entries.some((entry) => entry.isIntersecting)) {
+        loadWhileVisible();
+      }
+    }, { rootMargin: "200px" });
+    observer.observe(sentinel);
+  }
+
   async function populateJobs() {
     if (!ensureJobList()) {
       return;
     }
 
+    stopObserving();
+    generation += 1;
     jobList.innerHTML = "";
+    nextCursor = null;
+    exhausted = false;
+    loading = false;
+    const currentGeneration = generation;
+    const filtered = Object.keys(readFilters()).length > 0;
 
     try {
-      const response = await fetch(`${apiBase}/advertisements`);
-      const ads = await response.json();
-      if (Array.isArray(ads) && ads.length > 0) {
-        ads.forEach((ad) => {
-          createJobCard(
-            ad.title,
-            ad.description,
-            ad.location || "Location not specified",
-            ad.salary_min && ad.salary_max ? `${ad.salary_min} - ${ad.salary_max} €` : "Salary not specified",
-            ad.ad_id,
-          );
-        });
+      const count = await loadNextPage();
+      if (currentGeneration !== generation) {
+        return;
+      }
+      if (count > 0) {
+        if (!exhausted) {
+          observeScroll();
+        }
+        return;
+      }
+      if (filtered) {
+        jobList.innerHTML = `<p class="text-gray-500">No job offers match your search.</p>`;
         return;
       }
     } catch {
@@ -59,10 +169,30 @@
     );
   }
 
+  function bindSearchForm() {
+    const form = document.getElementById("job-search-form");
+    if (!form || form.dataset.bound === "true") {
+      return;
+    }
+    form.dataset.bound = "true";
+    const scheduleSearch = () => {
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(populateJobs, 300);
+    };
+    form.addEventListener("submit", (event) => {
+      event.preventDefault();
+      clearTimeout(searchTimer);
+      populateJobs();
+    });
+    form.addEventListener("input", scheduleSearch);
+    form.addEventListener("change", scheduleSearch);
+  }
+
   function initJobsPage() {
     if (!ensureJobList()) {
       return;
     }
+    bindSearchForm();
     populateJobs();
   }
 
@@ -117,6 +247,37 @@ async function showDynamicDetails(adId) {
   }
 }
 
+const APPLY_RETRY_DELAYS = [500, 1500];
+
+function newIdempotencyKey() {
+  if (window.crypto && crypto.randomUUID) {
+    return crypto.randomUUID();
+  }
+  return `${Date.now().toString(16)}-${Math.random().toString(16).slice(2)}`;
+}
+
+// POST an application, retrying network errors and 502/503/504 with the same Idempotency-Key:
+// the server recognises a retry of an application it already stored and answers with success.
+async function postApplication(data, idempotencyKey) {
+  for (let attempt = 0; ; attempt++) {
+    try {
+      const response = await fetch("http://127.0.0.1:8000/applications", {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKey },
+        body: JSON.stringify(data)
+      });
+      if (![502, 503, 504].includes(response.status) || attempt >= APPLY_RETRY_DELAYS.length) {
+        return response;
+      }
+    } catch (error) {
+      if (attempt >= APPLY_RETRY_DELAYS.length) {
+        throw error;
+      }
+    }
+    await new Promise(resolve => setTimeout(resolve, APPLY_RETRY_DELAYS[attempt]));
+  }
+}
+
 function openApplyForm(adId, title) {
   const storedUser = (() => {
     try {
@@ -180,6 +341,8 @@ function openApplyForm(adId, title) {
     messageInput.placeholder = "Write a short message to the recruiter...";
   }
 
+  // One key per opened form: double submits and retries all refer to the same application.
+  const idempotencyKey = newIdempotencyKey();
   document.getElementById("apply-form").addEventListener("submit", async (e) => {
     e.preventDefault();
     const data = {
@@ -191,11 +354,7 @@ function openApplyForm(adId, title) {
       person_id: storedUser.person_id
     };
     try {
-      const response = await fetch("http://127.0.0.1:8000/applications", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(data)
-      });
+      const response = await postApplication(data, idempotencyKey);
       if (response.ok) {
         alert("Application submitted successfully!");
         formModal.remove();
@@ -53,6 +53,9 @@ document.addEventListener("DOMContentLoaded", () => {
       if (data.user) {
         localStorage.setItem("user", JSON.stringify(data.user));
         localStorage.setItem("person_id", data.user.person_id);
+        if (data.token) {
+          localStorage.setItem("token", data.token);
+        }
         const userRole = data.user.role;
         if (userRole === "Recruiter") {
           window.location.href = "recruiterspace.html";
@@ -159,9 +159,7 @@ document.addEventListener("DOMContentLoaded", () => {
     applicationsList.innerHTML = "";
     applicationsEmpty?.classList.add("hidden");
     try {
-      const res = await fetch(`${apiBase}/applications/applicant/${user.person_id}`);
-      if (!res.ok) throw new Error();
-      const applications = await res.json();
+      const applications = await window.fetchJson(`${apiBase}/applications/applicant/${user.person_id}`);
       if (!Array.isArray(applications) || !applications.length) {
         applicationsEmpty?.classList.remove("hidden");
         return;
@@ -20,12 +20,25 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   })();
 
-  if (!storedUser || storedUser.role !== "Recruiter" || !storedUser.company_id) {
+  const token = localStorage.getItem("token");
+  if (!storedUser || storedUser.role !== "Recruiter" || !storedUser.company_id || !token) {
     window.location.href = "login.html";
     return;
   }
 
   const companyId = storedUser.company_id;
+  const authHeaders = { Authorization: `Bearer ${token}` };
+
+  // Authenticated call; an expired or revoked session sends the recruiter back to the login page.
+  const authFetch = async (url, options = {}) => {
+    const res = await fetch(url, { ...options, headers: { ...authHeaders, ...(options.headers || {}) } });
+    if (res.status === 401) {
+      localStorage.removeItem("token");
+      localStorage.removeItem("user");
+      window.location.href = "login.html";
+    }
+    return res;
+  };
 
   const companyForm = document.getElementById("company-form");
   const companyStatus = document.getElementById("company-status");
@@ -54,6 +67,27 @@ document.addEventListener("DOMContentLoaded", () => {
   };
   const adsList = document.getElementById("ads-list");
   const adsEmpty = document.getElementById("ads-empty");
+  const STATUS_VALUES = ["Sent", "In review", "Interview", "Rejected", "Hired"];
+  const CANDIDATES_PAGE_SIZE = 20;
+
+  // Bulk endpoints answer per id; report the ones that could not be processed.
+  const postBulk = async (path, payload) => {
+    const res = await authFetch(`${apiBase}${path}`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(payload),
+    });
+    if (!res.ok) throw new Error("Bulk request failed.");
+    const summary = await res.json();
+    const failures = (summary.results || []).filter((result) => !result.ok);
+    if (failures.length) {
+      alert(
+        `${summary.succeeded} done, ${summary.failed} failed:\n` +
+          failures.map((result) => `#${result.id}: ${result.error}`).join("\n")
+      );
+    }
+    return summary;
+  };
 
   const showTemporaryStatus = (el) => {
     if (!el) return;
@@ -89,31 +123,33 @@ document.addEventListener("DOMContentLoaded", () => {
     adForm.classList.toggle("hidden");
   };
 
-  const fetchCompany = async () => {
+  // Company, postings and per-posting application counts in one request.
+  const loadDashboard = async () => {
     try {
-      const res = await fetch(`${apiBase}/companies/${companyId}`);
-      if (!res.ok) throw new Error("Unable to fetch company information.");
-      const company = await res.json();
+      const res = await authFetch(`${apiBase}/companies/${companyId}/dashboard`);
+      if (!res.ok) throw new Error("Unable to fetch the company dashboard.");
+      const dashboard = await res.json();
       Object.entries(companyFields).forEach(([key, input]) => {
         if (!input) return;
-        input.value = company[key] ? company[key] : "";
+        input.value = dashboard.company?.[key] ? dashboard.company[key] : "";
       });
+      renderAds(Array.isArray(dashboard.advertisements) ? dashboard.advertisements : []);
     } catch (error) {
       console.error(error);
-      alert("Failed to load company information.");
+      alert("Failed to load job postings.");
     }
   };
 
-  const fetchAds = async () => {
-    try {
-      const res = await fetch(`${apiBase}/companies/${companyId}/advertisements`);
-      if (!res.ok) throw new Error("Unable to fetch advertisements.");
-      const ads = await res.json();
-      renderAds(Array.isArray(ads) ? ads : []);
-    } catch (error) {
-      console.error(error);
-      alert("Failed to load job postings.");
-    }
+  const formatApplications = (summary) => {
+    if (!summary || !summary.total) return "No applications yet";
+    const byStatus = Object.entries(summary.by_status || {})
+      .filter(([, count]) => count)
+      .map(([status, count]) => `${count} ${status}`)
+      .join(", ");
+    const last = summary.last_application_date
+      ? ` · last on ${new Date(summary.last_application_date).toLocaleDateString()}`
+      : "";
+    return `${summary.total} application${summary.total === 1 ? "" : "s"} (${byStatus})${last}`;
   };
 
   const renderAds = (ads) => {
@@ -136,13 +172,18 @@ document.addEventListener("DOMContentLoaded", () => {
     header.className = "flex flex-col md:flex-row md:items-start md:justify-between gap-4";
 
     const details = document.createElement("div");
+    details.className = "flex items-start gap-3";
     details.innerHTML = `
-      <h4 class="text-xl font-semibold text-[#0b1e35]">${escapeHtml(ad.title)}</h4>
-      <p class="text-sm text-[#0b1e35]/80 mt-1">${escapeHtml(ad.location || "Location not specified")}</p>
-      <div class="mt-2 text-sm text-gray-500 space-x-3">
-        ${ad.contract_type ? `<span>${escapeHtml(ad.contract_type)}</span>` : ""}
-        ${ad.salary_min || ad.salary_max ? `<span>€${ad.salary_min ?? "?"} - €${ad.salary_max ?? "?"}</span>` : ""}
-        ${ad.date_expiry ? `<span>Expiry: ${escapeHtml(ad.date_expiry)}</span>` : ""}
+      <input type="checkbox" class="select-ad mt-2" value="${ad.ad_id}" aria-label="Select job posting">
+      <div>
+        <h4 class="text-xl font-semibold text-[#0b1e35]">${escapeHtml(ad.title)}</h4>
+        <p class="text-sm text-[#0b1e35]/80 mt-1">${escapeHtml(ad.location || "Location not specified")}</p>
+        <div class="mt-2 text-sm text-gray-500 space-x-3">
+          ${ad.contract_type ? `<span>${escapeHtml(ad.contract_type)}</span>` : ""}
+          ${ad.salary_min || ad.salary_max ? `<span>€${ad.salary_min ?? "?"} - €${ad.salary_max ?? "?"}</span>` : ""}
+          ${ad.date_expiry ? `<span>Expiry: ${escapeHtml(ad.date_expiry)}</span>` : ""}
+        </div>
+        <p class="mt-2 text-sm text-[#0b1e35]/70">${escapeHtml(formatApplications(ad.applications))}</p>
       </div>
     `;
 
@@ -163,11 +204,11 @@ document.addEventListener("DOMContentLoaded", () => {
       const confirmDelete = window.confirm("Are you sure you want to delete this job posting?");
       if (!confirmDelete) return;
       try {
-        const res = await fetch(`${apiBase}/advertisements/${ad.ad_id}`, {
+        const res = await authFetch(`${apiBase}/advertisements/${ad.ad_id}`, {
           method: "DELETE",
         });
         if (!res.ok) throw new Error("Failed to delete advertisement.");
-        await fetchAds();
+        await loadDashboard();
       } catch (error) {
         console.error(error);
         alert("Unable to delete the job posting.");
@@ -221,6 +262,30 @@ document.addEventListener("DOMContentLoaded", () => {
     adFields.title.focus();
   };
 
+  const renderCandidate = (candidate) => {
+    const item = document.createElement("li");
+    item.className = "rounded-md border border-gray-200 p-3";
+    item.innerHTML = `
+      <div class="flex flex-col md:flex-row md:items-start md:justify-between gap-2">
+        <div class="flex items-start gap-3">
+          <input type="checkbox" class="select-application mt-1" value="${candidate.application_id}" aria-label="Select application">
+          <div>
+            <p class="font-semibold text-[#0b1e35]">${escapeHtml(candidate.first_name)} ${escapeHtml(candidate.last_name)}</p>
+            <p class="text-sm text-gray-500">${escapeHtml(candidate.email || "No email provided")} · ${escapeHtml(candidate.phone || "No phone")}</p>
+          </div>
+        </div>
+        <span data-application-id="${candidate.application_id}" class="application-status inline-flex items-center rounded-full bg-orange-100 px-3 py-1 text-xs font-semibold text-orange-600">${escapeHtml(candidate.status || "Sent")}</span>
+      </div>
+      <div class="mt-2 text-sm text-[#0b1e35]/80">
+        ${candidate.skills ? `<p><strong>Skills:</strong> ${escapeHtml(candidate.skills)}</p>` : ""}
+        ${candidate.experience ? `<p class="mt-1"><strong>Experience:</strong> ${escapeHtml(candidate.experience)}</p>` : ""}
+        ${candidate.about ? `<p class="mt-1"><strong>About:</strong> ${escapeHtml(candidate.about)}</p>` : ""}
+        ${candidate.message ? `<p class="mt-2"><strong>Application message:</strong><br><span class="whitespace-pre-line block mt-1 text-[#0b1e35]">${formatMultiline(candidate.message)}</span></p>` : ""}
+      </div>
+    `;
+    return item;
+  };
+
   const toggleCandidates = async (adId, container, button) => {
     const isVisible = !container.classList.contains("hidden");
     if (isVisible) {
@@ -238,42 +303,76 @@ document.addEventListener("DOMContentLoaded", () => {
     container.innerHTML = `<p class="text-sm text-gray-500">Loading candidates...</p>`;
     container.classList.remove("hidden");
 
-    try {
-      const res = await fetch(`${apiBase}/advertisements/${adId}/candidates`);
+    const list = document.createElement("ul");
+    list.className = "space-y-3";
+    const moreButton = document.createElement("button");
+    moreButton.type = "button";
+    moreButton.className = "mt-3 rounded-md border border-gray-300 px-3 py-1 text-sm font-medium text-[#0b1e35] hover:bg-gray-50 hidden";
+    moreButton.textContent = "Load more candidates";
+    let nextCursor = null;
+
+    const loadPage = async () => {
+      const params = new URLSearchParams({ limit: CANDIDATES_PAGE_SIZE });
+      if (nextCursor) params.set("cursor", nextCursor);
+      const res = await authFetch(`${apiBase}/advertisements/${adId}/candidates?${params}`);
       if (!res.ok) throw new Error("Unable to fetch candidates.");
-      const candidates = await res.json();
+      const page = await res.json();
+      const candidates = Array.isArray(page?.items) ? page.items : [];
+      nextCursor = page?.next_cursor || null;
+      candidates.forEach((candidate) => list.appendChild(renderCandidate(candidate)));
+      moreButton.classList.toggle("hidden", !nextCursor);
+    };
+
+    moreButton.addEventListener("click", async () => {
+      moreButton.disabled = true;
+      try {
+        await loadPage();
+      } catch (error) {
+        console.error(error);
+        alert("Failed to load more candidates.");
+      } finally {
+        moreButton.disabled = false;
+      }
+    });
+
+    try {
+      await loadPage();
       container.dataset.loaded = "true";
       button.textContent = "Hide candidates";
 
-      if (!Array.isArray(candidates) || !candidates.length) {
+      if (!list.children.length) {
         container.innerHTML = `<p class="text-sm text-gray-500">No candidates yet for this posting.</p>`;
         return;
       }
 
-      const list = document.createElement("ul");
-      list.className = "space-y-3";
-      candidates.forEach((candidate) => {
-        const item = document.createElement("li");
-        item.className = "rounded-md border border-gray-200 p-3";
-        item.innerHTML = `
-          <div class="flex flex-col md:flex-row md:items-start md:justify-between gap-2">
-            <div>
-              <p class="font-semibold text-[#0b1e35]">${escapeHtml(candidate.first_name)} ${escapeHtml(candidate.last_name)}</p>
-              <p class="text-sm text-gray-500">${escapeHtml(candidate.email || "No email provided")} · ${escapeHtml(candidate.phone || "No phone")}</p>
-            </div>
-            <span class="inline-flex items-center rounded-full bg-orange-100 px-3 py-1 text-xs font-semibold text-orange-600">${escapeHtml(candidate.status || "Sent")}</span>
-          </div>
-          <div class="mt-2 text-sm text-[#0b1e35]/80">
-            ${candidate.skills ? `<p><strong>Skills:</strong> ${escapeHtml(candidate.skills)}</p>` : ""}
-            ${candidate.experience ? `<p class="mt-1"><strong>Experience:</strong> ${escapeHtml(candidate.experience)}</p>` : ""}
-            ${candidate.about ? `<p class="mt-1"><strong>About:</strong> ${escapeHtml(candidate.about)}</p>` : ""}
-            ${candidate.message ? `<p class="mt-2"><strong>Application message:</strong><br><span class="whitespace-pre-line block mt-1 text-[#0b1e35]">${formatMultiline(candidate.message)}</span></p>` : ""}
-          </div>
-        `;
-        list.appendChild(item);
+      const toolbar = document.createElement("div");
+      toolbar.className = "mb-3 flex flex-wrap items-center gap-2 text-sm";
+      toolbar.innerHTML = `
+        <span class="text-[#0b1e35]/70">Selected candidates:</span>
+        <select class="bulk-status rounded-md border border-gray-300 px-2 py-1">
+          ${STATUS_VALUES.map((status) => `<option value="${status}">${status}</option>`).join("")}
+        </select>
+        <button type="button" class="bulk-apply rounded-md bg-orange-500 px-3 py-1 font-medium text-white hover:bg-orange-600">Set status</button>
+      `;
+      toolbar.querySelector(".bulk-apply").addEventListener("click", async () => {
+        const ids = Array.from(list.querySelectorAll(".select-application:checked")).map((box) => Number(box.value));
+        const status = toolbar.querySelector(".bulk-status").value;
+        if (!ids.length) return;
+        try {
+          const summary = await postBulk("/applications/bulk-status", { ids, status });
+          summary.results
+            .filter((result) => result.ok)
+            .forEach((result) => {
+              const badge = list.querySelector(`.application-status[data-application-id="${result.id}"]`);
+              if (badge) badge.textContent = status;
+            });
+        } catch (error) {
+          console.error(error);
+          alert("Unable to update the selected applications.");
+        }
       });
       container.innerHTML = "";
-      container.appendChild(list);
+      container.append(toolbar, list, moreButton);
     } catch (error) {
       console.error(error);
       container.innerHTML = `<p class="text-sm text-red-600">Failed to load candidates.</p>`;
@@ -298,7 +397,7 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     try {
-      const res = await fetch(`${apiBase}/companies/${companyId}`, {
+      const res = await authFetch(`${apiBase}/companies/${companyId}`, {
         method: "PUT",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(payload),
@@ -311,6 +410,18 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   });
 
+  document.getElementById("delete-selected-ads")?.addEventListener("click", async () => {
+    const ids = Array.from(adsList.querySelectorAll(".select-ad:checked")).map((box) => Number(box.value));
+    if (!ids.length || !window.confirm(`Delete ${ids.length} job posting(s)?`)) return;
+    try {
+      await postBulk("/advertisements/bulk-delete", { ids });
+      await loadDashboard();
+    } catch (error) {
+      console.error(error);
+      alert("Unable to delete the selected job postings.");
+    }
+  });
+
   toggleAdFormBtn?.addEventListener("click", () => {
     toggleAdFormVisibility();
     if (!adForm.classList.contains("hidden")) {
@@ -376,7 +487,7 @@ document.addEventListener("DOMContentLoaded", () => {
       const method = isUpdate ? "PUT" : "POST";
       const body = isUpdate ? JSON.stringify(payload) : JSON.stringify({ ...payload, company_id: companyId });
 
-      const res = await fetch(endpoint, {
+      const res = await authFetch(endpoint, {
         method,
         headers: { "Content-Type": "application/json" },
         body,
@@ -396,13 +507,12 @@ document.addEventListener("DOMContentLoaded", () => {
         throw new Error(detailMessage);
       }
       resetAdForm();
-      await fetchAds();
+      await loadDashboard();
     } catch (error) {
       console.error(error);
       alert(error instanceof Error ? error.message : "Unable to save the job posting.");
     }
   });
 
-  fetchCompany();
-  fetchAds();
+  loadDashboard();
 });
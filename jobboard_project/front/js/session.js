@@ -59,8 +59,21 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   });
 
+  const revokeSession = () => {
+    const token = localStorage.getItem("token");
+    if (!token) return;
+    const apiBase = window.API_BASE_URL || `http://${window.location.hostname || "127.0.0.1"}:8000`;
+    fetch(`${apiBase}/logout`, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${token}` },
+      keepalive: true,
+    }).catch(() => {});
+  };
+
   logoutButtons.forEach((button) => {
     button.addEventListener("click", () => {
+      revokeSession();
+      localStorage.removeItem("token");
       localStorage.removeItem("user");
       localStorage.removeItem("person_id");
       localStorage.removeItem("accountData");
@@ -17,6 +17,9 @@
     return pathname.startsWith('/') ? pathname.slice(1) : pathname;
   }
 
+  // Hashed file names from the static build (asset-manifest.*.js); unbuilt pages use the plain paths.
+  const assetUrl = (path) => (window.ASSET_MANIFEST && window.ASSET_MANIFEST[path]) || path;
+
   function loadScript(src) {
     if (loadedScripts.has(src)) {
       return Promise.resolve();
@@ -39,9 +42,12 @@
     const cleanPath = pathname.split('?')[0];
 
     if (cleanPath.endsWith('jobs.html')) {
+      if (typeof window.fetchJson !== 'function') {
+        await loadScript(assetUrl('js/http.js'));
+      }
       const ensureJobsScript = typeof window.initJobsPage === 'function'
         ? Promise.resolve()
-        : loadScript('js/jobs.js');
+        : loadScript(assetUrl('js/jobs.js'));
 
       await ensureJobsScript;
       if (typeof window.initJobsPage === 'function') {